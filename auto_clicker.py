@@ -1,55 +1,114 @@
 import time
+import argparse
 import cv2
-import pandas as pd
 import json
 import sys
 import os
 from image_recognition import ImageRecognition
 from window_controller import WindowController
-import win32gui
+from debug_artifacts import DebugArtifactWriter
+from capture_backends import ReplayCaptureBackend
+from ocr_profiles import DEFAULT_PROFILE, OCR_PROFILES
+from frame_utils import Frame, frame_changed
+from concurrent.futures import ThreadPoolExecutor
+import step_plan
 
 class AutoClicker:
-    def __init__(self, config_file='csv-files/click-test1.xlsx'):
-        self.image_recognition = ImageRecognition()
-        self.window_controller = WindowController()
+    # 命名搜索区域，按窗口宽高的比例表示 (x1, y1, x2, y2)
+    NAMED_REGIONS = step_plan.NAMED_REGIONS
+    # 等待类步骤：wait_for 等待目标出现，wait_gone 等待目标消失
+    WAIT_TYPES = step_plan.WAIT_TYPES
+
+    def __init__(self, config_file='csv-files/click-test1.xlsx', incremental_ocr=False, match_method='exhaustive',
+                 debug_mode='on_failure', capture_backend=None, pipeline=False, prefetch_lead=0.5,
+                 poll_interval=0.05, poll_max_interval=1.0, poll_backoff=1.5,
+                 change_detect_size=256, poll_recheck_interval=2.0, retry_interval=1.0, max_retry_interval=10.0, sequence_timeout=None, stats_dir='run_stats',
+                 plan_cache_dir='.plan_cache', warm_up_ocr=True, ocr_server=None,
+                 window_title=None, ocr_engine=None, input_arbiter=None, debug_dir='screenshots',
+                 ocr_profile=DEFAULT_PROFILE, ocr_use_shm=False, match_color=True):
+        # 各组件的启动耗时（秒）
+        self.startup_timings = {}
+        start_time = time.perf_counter()
+        # 识别引擎在序列需要时才创建
+        self._image_recognition = None
+        self._recognition_options = {'incremental_ocr': incremental_ocr, 'match_method': match_method,
+                                     'ocr_server': ocr_server, 'ocr_engine': ocr_engine,
+                                     'ocr_profile': ocr_profile, 'ocr_use_shm': ocr_use_shm,
+                                     'match_color': match_color}
+        # 多窗口并发时由仲裁器串行化“置前台+点击”，为None时按单窗口方式运行
+        self.input_arbiter = input_arbiter
+        # 序列包含文字步骤时，是否在执行前面的非OCR步骤的同时后台预热OCR
+        self.warm_up_ocr = warm_up_ocr
+        self.window_controller = WindowController(
+            debug_writer=DebugArtifactWriter(output_dir=debug_dir, mode=debug_mode),
+            capture_backend=capture_backend
+        )
+        # 编译后的步骤序列缓存目录，配置文件未变化时跳过解析
+        self.plan_cache_dir = plan_cache_dir
+        self.startup_timings['window_controller'] = time.perf_counter() - start_time
+        start_time = time.perf_counter()
         self.config = self.load_config(config_file)
+        # 指定的窗口标题优先于配置文件中的设置
+        if window_title and self.config:
+            self.config['window_title'] = window_title
+        self.startup_timings['load_config'] = time.perf_counter() - start_time
+        # 流水线模式：在步骤延时结束前预先截图并在后台识别下一步
+        self.prefetch_lead = prefetch_lead
+        # 预取线程池在每次运行开始时创建、结束时关闭，重复运行不会累积线程
+        self.pipeline = pipeline
+        self._executor = None
+        self._prefetch = None
+        # 等待类步骤的轮询间隔：从 poll_interval 开始按 poll_backoff 倍增，不超过 poll_max_interval
+        self.poll_interval = poll_interval
+        self.poll_max_interval = poll_max_interval
+        self.poll_backoff = poll_backoff
+        # 变化检测在搜索区域的缩略图（宽 change_detect_size）上进行；
+        # 画面未变化时也至少每 poll_recheck_interval 秒真正识别一次，避免漏掉缩略图上看不出的小目标
+        self.change_detect_size = change_detect_size
+        self.poll_recheck_interval = poll_recheck_interval
+        # 步骤失败后的重试间隔：retry_interval * backoff^(失败次数-1)，不超过 max_retry_interval
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        # 整个序列的最长执行时间（秒），None表示不限制
+        self.sequence_timeout = sequence_timeout
+        # 本次运行的截止时刻（perf_counter），所有等待都不超过截止时刻
+        self._run_deadline = None
+        # 每次运行的重试统计导出目录，None表示不导出
+        self.stats_dir = stats_dir
+        self.last_run_stats = None
             
+    @property
+    def image_recognition(self):
+        """图像识别引擎，首次使用时创建（OCR引擎在其内部同样延迟创建）"""
+        if self._image_recognition is None:
+            start_time = time.perf_counter()
+            self._image_recognition = ImageRecognition(**self._recognition_options)
+            self.startup_timings['image_recognition'] = time.perf_counter() - start_time
+        return self._image_recognition
+        
+    def needs_ocr(self):
+        """序列中是否有需要OCR的步骤"""
+        return any(step.type == "text" or (step.type in self.WAIT_TYPES and step.wait_kind == "text")
+                   for step in self.config.get("click_sequence", []))
+        
     def get_icon_path(self, icon_name):
-        return f"images/icons/{icon_name}.png"
+        return step_plan.get_icon_path(icon_name)
         
     def load_config(self, config_file):
         """
-        从Excel文件加载配置
+        从Excel / CSV / JSON文件加载配置
+        
+        配置编译为步骤序列后缓存到磁盘，文件未修改时直接读取缓存
         """
         try:
-            # 读取Excel文件
-            df = pd.read_excel(config_file)
-            
-            # 验证必要的列是否存在
-            required_columns = ['type', 'target', 'click_type', 'delay', 'shift']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Excel文件缺少必要的列: {', '.join(missing_columns)}")
-                
-            # 构建点击序列
-            click_sequence = []
-            for _, row in df.iterrows():
-                if pd.isna(row['target']):  # 跳过空行
-                    continue
-                click_sequence.append({
-                    'type': row['type'],
-                    'target': row['target'],
-                    'click_type': row['click_type'],
-                    'delay': float(row['delay']),
-                    'shift': str(row['shift']) if not pd.isna(row['shift']) else '0'
-                })
+            plan = step_plan.load_plan(config_file, cache_dir=self.plan_cache_dir)
             
             return {
                 # 'window_title': 'Ace云手机',
                 # 'window_title': '新VIP-0R4O',
                 # 'window_title': 'Weixin',
-                'window_title': 'click-test1.xlsx - WPS Office',
-                'click_sequence': click_sequence
+                'window_title': plan.window_title or 'click-test1.xlsx - WPS Office',
+                'click_sequence': plan.steps
             }
         except FileNotFoundError:
             print(f"未找到配置文件: {config_file}")
@@ -60,39 +119,340 @@ class AutoClicker:
             
     def parse_shift(self, shift_str):
         """
-        解析偏移值，返回x和y的偏移量
-        例如：'L50' -> (-50, 0)  # 左移50像素
-             'R30' -> (30, 0)   # 右移30像素
-             'U20' -> (0, -20)  # 上移20像素
-             'D40' -> (0, 40)   # 下移40像素
+        解析偏移值，返回x和y的偏移量，详见 step_plan.parse_shift
         """
-        if not shift_str or shift_str == '0':
-            return (0, 0)
+        return step_plan.parse_shift(shift_str)
+
+    def resolve_roi(self, roi, window_width, window_height):
+        """
+        解析搜索区域，返回窗口坐标下的 (x1, y1, x2, y2)
+        例如：'100:50:800:400' -> (100, 50, 800, 400)
+             'top-bar'        -> 按 NAMED_REGIONS 中的比例换算为像素
+        roi 也可以是编译好的区域（step_plan.parse_roi 的返回值）
+        无效或未设置时返回None，表示搜索整个窗口
+        """
+        if isinstance(roi, str):
+            roi = step_plan.parse_roi(roi)
+        return step_plan.resolve_roi(roi, window_width, window_height)
+
+    def parse_wait_target(self, target):
+        """
+        解析等待类步骤的目标，详见 step_plan.parse_wait_target
+        """
+        return step_plan.parse_wait_target(target)
+        
+    def template_icon_paths(self):
+        """序列中用到的所有图标路径"""
+        icon_paths = set()
+        for step in self.config["click_sequence"]:
+            icon_paths.update(step.icon_paths)
+        return icon_paths
+        
+    def wait_for_target(self, action, screenshot, window_width, window_height):
+        """
+        轮询等待目标出现（wait_for）或消失（wait_gone）
+        
+        轮询间隔从短到长递增；搜索区域与上一次识别时相比没有变化时跳过识别，
+        但距上一次识别超过 poll_recheck_interval 秒时仍然识别。
+        
+        Args:
+            action: 步骤配置
+            screenshot: 步骤开始时已截取的画面（Frame），作为第一次检查的画面
             
-        try:
-            # 如果是纯数字，直接返回(0, 0)
-            if isinstance(shift_str, (int, float)) or shift_str.isdigit():
-                return (0, 0)
+        Returns:
+            bool: 超时前是否达到等待条件
+        """
+        probe = action.probe()
+        value = action.wait_value
+        appear = action.type == "wait_for"
+        timeout = self._clamp_to_deadline(action.get("timeout", 10.0))
+        roi = self.resolve_roi(action.roi_spec, window_width, window_height)
+        
+        start = time.perf_counter()
+        deadline = start + timeout
+        interval = self.poll_interval
+        last_thumb = None
+        last_check = start
+        found = None
+        checks = 0
+        while True:
+            region, _ = screenshot.crop(roi)
+            if region.size == 0:
+                # 搜索区域在窗口之外（如窗口被缩小），视为目标不存在
+                if found is None:
+                    print(f"搜索区域 {roi} 为空")
+                found = False
+                last_thumb = None
+            else:
+                thumb = region.thumbnail(self.change_detect_size)
+                if (found is None or frame_changed(last_thumb, thumb)
+                        or time.perf_counter() - last_check >= self.poll_recheck_interval):
+                    found = self.locate_target(probe, screenshot, roi) is not None
+                    last_thumb = thumb
+                    last_check = time.perf_counter()
+                    checks += 1
+                
+            if found == appear:
+                print(f"等待完成: {'出现' if appear else '消失'} '{value}'，耗时 {time.perf_counter() - start:.2f}秒，识别 {checks} 次")
+                return True
                 
-            direction = shift_str[0].upper()
-            pixels = int(shift_str[1:])
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                print(f"等待超时 ({timeout}秒): '{value}' 仍{'未出现' if appear else '存在'}")
+                return False
+                
+            time.sleep(min(interval, remaining))
+            interval = min(interval * self.poll_backoff, self.poll_max_interval)
+            
+            screenshot_data = self.window_controller.capture_window()
+            if screenshot_data is None:
+                continue
+            screenshot = Frame(screenshot_data[0])
+        
+    def locate_target(self, action, screenshot, roi):
+        """
+        识别步骤的目标位置（只识别，不点击）
+        
+        Returns:
+            fixed/text/template: 目标在窗口中的位置 (x, y)，未找到返回None
+            template_all: 匹配结果列表
+        """
+        step_type = action.type
+        if step_type == "fixed":
+            # 固定坐标在编译时已解析
+            if action.point is None:
+                raise ValueError(f"无效的固定坐标: {action.target}")
+            return action.point
+        elif step_type == "text":
+            # 同一画面的多个文字步骤共用一次OCR结果建立的文字索引
+            return self.image_recognition.find_text_location(screenshot, action.target, roi=roi,
+                                                             fuzzy=bool(action.fuzzy), max_distance=action.fuzzy or 1,
+                                                             profile=action.profile)
+        elif step_type == "template":
+            return self.image_recognition.find_icon(screenshot, action.icon_paths[0], threshold=0.7, roi=roi)
+        elif step_type == "template_all":
+            templates = {os.path.splitext(os.path.basename(path))[0]: path for path in action.icon_paths}
+            return self.image_recognition.find_all(screenshot, templates, threshold=0.7, roi=roi)
+        raise ValueError(f"未知的步骤类型: {step_type}")
+        
+    def perform_action(self, action, located, window_pos, window_width, window_height):
+        """
+        根据识别结果执行点击
+        
+        Returns:
+            bool: 步骤是否成功
+        """
+        step_type = action.type
+        click_type = action.click_type
+        
+        # 偏移在编译时已解析
+        shift_x, shift_y = action.offset
+        
+        if step_type == "template_all":
+            matches = located
+            if not matches:
+                print(f"未找到图标: '{action['target']}'")
+                return False
+                
+            # 按从上到下、从左到右的顺序依次点击
+            matches = sorted(matches, key=lambda m: (m['center'][1], m['center'][0]))
+            print(f"找到 {len(matches)} 个匹配图标")
+            clicked = 0
+            for match in matches:
+                click_x = match['center'][0] + shift_x
+                click_y = match['center'][1] + shift_y
+                
+                # 计算全局坐标
+                global_x = window_pos[0] + click_x
+                global_y = window_pos[1] + click_y
+                
+                if self._click(global_x, global_y, click_type):
+                    clicked += 1
+                else:
+                    print(f"点击图标 '{match['template']}' ({click_x}, {click_y}) 失败")
+            return clicked > 0
+            
+        names = {"fixed": "坐标", "text": "文字位置", "template": "图标位置"}
+        if located is None:
+            print(f"未找到{'文字' if step_type == 'text' else '图标'}: '{action['target']}'")
+            return False
+            
+        x, y = located
+        
+        # 计算偏移后的坐标
+        click_x = x + shift_x
+        click_y = y + shift_y
+        
+        # 检查坐标是否在窗口范围内
+        if x < 0 or y < 0 or (window_width > 0 and x >= window_width) or (window_height > 0 and y >= window_height):
+            print(f"警告: {names[step_type]} ({x}, {y}) 可能超出窗口范围 ({window_width}x{window_height})，但仍将尝试点击")
+        
+        # 计算全局坐标
+        global_x = window_pos[0] + click_x
+        global_y = window_pos[1] + click_y
+        
+        success = self._click(global_x, global_y, click_type)
+        if not success:
+            if step_type == "fixed":
+                print(f"点击固定位置 ({x}, {y}) 失败")
+            elif step_type == "text":
+                print(f"点击文字 '{action['target']}' 失败")
+            else:
+                print(f"点击图标 '{action['target']}' 失败")
+        return success
+        
+    def _click(self, global_x, global_y, click_type):
+        """
+        点击全局坐标。多窗口并发时持有输入仲裁器，
+        保证“置前台+移动+点击”不被其他窗口的点击打断
+        """
+        if self.input_arbiter is None:
+            return self.window_controller.force_click(global_x, global_y, click_type, move_duration=None)
+        with self.input_arbiter:
+            if not self.window_controller.set_foreground():
+                return False
+            return self.window_controller.force_click(global_x, global_y, click_type, move_duration=None)
+        
+    def _clamp_to_deadline(self, seconds):
+        """等待时间不超过序列截止时间的剩余时间"""
+        if self._run_deadline is None:
+            return seconds
+        return max(0.0, min(seconds, self._run_deadline - time.perf_counter()))
+        
+    def _prefetchable(self, action):
+        """需要识别的步骤才值得预取"""
+        return action["type"] in ("text", "template", "template_all")
+        
+    def _wait_with_prefetch(self, delay, next_index):
+        """
+        等待步骤延时，并在延时结束前截图、在后台线程中预先识别下一步
+        """
+        delay = self._clamp_to_deadline(delay)
+        deadline = time.perf_counter() + delay
+        next_action = self.config["click_sequence"][next_index]
+        lead = min(self.prefetch_lead, delay)
+        time.sleep(max(0.0, delay - lead))
+        
+        screenshot_data = self.window_controller.capture_window()
+        if screenshot_data is not None:
+            screenshot = Frame(screenshot_data[0])
+            window_height, window_width = screenshot.shape[:2]
+            roi = self.resolve_roi(next_action.roi_spec, window_width, window_height)
+            future = self._executor.submit(self.locate_target, next_action, screenshot, roi)
+            self._prefetch = (next_index, screenshot.fingerprint(), future)
             
-            if direction == 'L':
-                return (-pixels, 0)
-            elif direction == 'R':
-                return (pixels, 0)
-            elif direction == 'U':
-                return (0, -pixels)
-            elif direction == 'D':
-                return (0, pixels)
-        except (IndexError, ValueError, TypeError) as e:
-            print(f"无效的偏移值: {shift_str}, 错误: {str(e)}")
-        return (0, 0)
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+        
+    def _take_prefetch(self, step_index, screenshot):
+        """
+        取出当前步骤的预取结果
+        
+        Returns:
+            (是否命中, 识别结果)；画面在预取之后发生变化时不命中
+        """
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch is None or prefetch[0] != step_index:
+            return False, None
+        _, fingerprint, future = prefetch
+        
+        # 无论是否命中都等待后台识别结束，避免与主线程同时调用识别引擎
+        try:
+            located = future.result()
+        except Exception as e:
+            print(f"预取识别失败: {str(e)}")
+            return False, None
+            
+        if fingerprint != screenshot.fingerprint():
+            print("画面已变化，丢弃预取结果")
+            return False, None
+        print("使用预取的识别结果")
+        return True, located
+
+    def parse_on_fail(self, on_fail):
+        """
+        解析重试次数或时间用尽后的处理方式
+        例如：'abort'  -> ('abort', None)   终止整个序列
+             'skip'   -> ('skip', None)    跳过该步骤
+             'goto:3' -> ('goto', 2)       跳转到第3步（恢复步骤）
+        无效值按 'abort' 处理
+        """
+        if not on_fail:
+            return ('abort', None)
+        on_fail = str(on_fail).strip().lower()
+        if on_fail in ('abort', 'skip'):
+            return (on_fail, None)
+        if on_fail.startswith('goto:'):
+            try:
+                target = int(on_fail[5:])
+                if 1 <= target <= len(self.config["click_sequence"]):
+                    return ('goto', target - 1)
+            except ValueError:
+                pass
+        print(f"无效的失败处理方式: {on_fail}，按 abort 处理")
+        return ('abort', None)
+        
+    def retry_wait(self, action, failures):
+        """
+        计算第 failures 次失败后的重试等待时间
+
+        未找到目标、截图失败和执行异常都按步骤的 backoff 递增等待，
+        max_retries 因此对应一段确定的时间，而不是几次紧接着的截图
+        """
+        backoff = action.get("backoff") or 1.0
+        return min(self.retry_interval * backoff ** (failures - 1), self.max_retry_interval)
+        
+    def _finish_run(self, outcome, run_start, step_stats):
+        """
+        汇总并导出本次运行的统计
+        
+        Returns:
+            bool: 序列是否全部执行完毕
+        """
+        total_time = time.perf_counter() - run_start
+        steps = [step_stats[i] for i in sorted(step_stats)]
+        self.last_run_stats = {
+            'outcome': outcome,
+            'total_time': round(total_time, 3),
+            'total_retries': sum(s['retries'] for s in steps),
+            'total_retry_time': round(sum(s['retry_time'] for s in steps), 3),
+            'steps': steps
+        }
+        print(f"运行结果: {outcome}，总耗时 {total_time:.2f}秒，重试 {self.last_run_stats['total_retries']} 次，"
+              f"重试耗时 {self.last_run_stats['total_retry_time']:.2f}秒")
+        
+        if self.stats_dir:
+            try:
+                os.makedirs(self.stats_dir, exist_ok=True)
+                # 文件名包含窗口标题，多窗口并发运行时不会互相覆盖
+                window_tag = "".join(c if c.isalnum() else "_" for c in self.config.get("window_title", ""))[:40]
+                stats_path = os.path.join(self.stats_dir, time.strftime("run_%Y%m%d_%H%M%S") + f"_{window_tag}.json")
+                with open(stats_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.last_run_stats, f, ensure_ascii=False, indent=2)
+                print(f"运行统计已保存到: {stats_path}")
+            except OSError as e:
+                print(f"保存运行统计失败: {str(e)}")
+                
+        self.window_controller.debug_writer.close()
+        return outcome == 'completed'
+
+    def _stop_prefetch(self):
+        """关闭预取线程池，丢弃未使用的预取结果"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._prefetch = None
 
     def run(self):
         """
         运行自动点击流程
         """
+        try:
+            return self._run_sequence()
+        finally:
+            self._stop_prefetch()
+            self._run_deadline = None
+
+    def _run_sequence(self):
         if not self.config:
             print("配置无效，请检查配置文件")
             return False
@@ -102,145 +462,173 @@ class AutoClicker:
             print(f"未找到窗口：{self.config['window_title']}")
             return False
             
-        print(f"开始执行点击序列，共 {len(self.config['click_sequence'])} 步")
+        sequence = self.config["click_sequence"]
+        print(f"开始执行点击序列，共 {len(sequence)} 步")
+        
+        # 需要OCR时在后台预热，前面的非OCR步骤可以同时执行
+        if self.warm_up_ocr and self.needs_ocr():
+            self.image_recognition.warm_up(background=True)
         
         # 执行点击序列
+        run_start = time.perf_counter()
+        self._run_deadline = run_start + self.sequence_timeout if self.sequence_timeout else None
+        step_stats = {}
         step_index = 0
-        retry_count = 0
-        while step_index < len(self.config["click_sequence"]):
-            # 在每个步骤执行前检查窗口是否存在
-            if not self.window_controller.set_foreground():
+        # 当前步骤本轮的开始时间和失败次数（成功、跳过或跳转后重置）
+        visit_start = run_start
+        visit_failures = 0
+        icons_preloaded = False
+        self._prefetch = None
+        if self.pipeline and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        while step_index < len(sequence):
+            # 整个序列的截止时间
+            if self._run_deadline is not None and time.perf_counter() >= self._run_deadline:
+                print(f"序列执行超时 ({self.sequence_timeout}秒)，终止")
+                return self._finish_run('deadline', run_start, step_stats)
+                
+            # 在每个步骤执行前检查窗口是否存在；多窗口并发时只在点击前置前台
+            if self.input_arbiter is not None:
+                window_ok = self.window_controller.is_window_alive()
+            else:
+                window_ok = self.window_controller.set_foreground()
+            if not window_ok:
                 print("窗口已关闭或不存在")
-                return False
+                return self._finish_run('window_lost', run_start, step_stats)
 
-            action = self.config["click_sequence"][step_index]
-            print(f"执行步骤 {step_index + 1}/{len(self.config['click_sequence'])}: {action['type']} - {action['target']}")
+            action = sequence[step_index]
+            entry = step_stats.setdefault(step_index, {
+                'step': step_index + 1, 'type': action['type'], 'target': str(action['target']),
+                'attempts': 0, 'retries': 0, 'retry_time': 0.0, 'result': None
+            })
+            entry['attempts'] += 1
+            attempt_start = time.perf_counter()
+            print(f"执行步骤 {step_index + 1}/{len(sequence)}: {action['type']} - {action['target']}")
+            
+            # 根据步骤类型执行不同操作
+            success = False
+            # 截图失败或执行出错（区别于未找到目标），仅用于提示信息
+            error = False
+            delay = 1.0
             
             # 捕获当前窗口画面
             screenshot_data = self.window_controller.capture_window()
             if screenshot_data is None:
                 print("截图失败，重试...")
-                time.sleep(1)
-                retry_count += 1
-                continue
+                error = True
+            else:
+                screenshot, window_pos = screenshot_data
+                # 灰度图、缩小图、指纹等在本次截图的所有识别间共用
+                screenshot = Frame(screenshot)
                 
-            screenshot, window_pos = screenshot_data
-            
-            # 获取截图尺寸作为窗口尺寸
-            window_height, window_width = screenshot.shape[:2]
-            
-            # 根据步骤类型执行不同操作
-            success = False
-            try:
-                step_type = action["type"]
-                target = action["target"]
-                shift = action.get("shift", "0")
-                click_type = action.get("click_type", "single")
-                delay = float(action.get("delay", 1.0))
+                # 获取截图尺寸作为窗口尺寸
+                window_height, window_width = screenshot.shape[:2]
                 
-                # 解析偏移
-                shift_x, shift_y = self.parse_shift(shift)
+                # 首次截图后预加载序列中用到的所有图标
+                if not icons_preloaded:
+                    icon_paths = self.template_icon_paths()
+                    if icon_paths:
+                        loaded = self.image_recognition.template_cache.preload(sorted(icon_paths), window_width)
+                        print(f"已预加载 {loaded}/{len(icon_paths)} 个图标")
+                    icons_preloaded = True
                 
-                # 根据类型执行操作
-                if step_type == "fixed":
-                    # 解析固定坐标
-                    try:
-                        x, y = map(int, target.split(":"))
-                            
-                        # 计算偏移后的坐标
-                        click_x = x + shift_x
-                        click_y = y + shift_y
-                        
-                        # 检查坐标是否在窗口范围内
-                        if x < 0 or y < 0 or (window_width > 0 and x >= window_width) or (window_height > 0 and y >= window_height):
-                            print(f"警告: 坐标 ({x}, {y}) 可能超出窗口范围 ({window_width}x{window_height})，但仍将尝试点击")
-                        
-                        # 计算全局坐标
-                        global_x = window_pos[0] + click_x
-                        global_y = window_pos[1] + click_y
-                            
-                        success = self.window_controller.force_click(global_x, global_y, click_type, move_duration=0.3)
-                        if not success:
-                            print(f"点击固定位置 ({x}, {y}) 失败")
-                            continue
-                    except Exception as e:
-                        print(f"解析固定坐标时出错: {str(e)}")
-                        continue
-                elif action["type"] == "text":
-                    target_pos = self.image_recognition.find_text_location(
-                        screenshot, action["target"]
-                    )
-                    if target_pos:
-                        # 计算偏移后的坐标
-                        click_x = target_pos[0] + shift_x
-                        click_y = target_pos[1] + shift_y
-                        
-                        # 检查坐标是否在窗口范围内
-                        if target_pos[0] < 0 or target_pos[1] < 0 or (window_width > 0 and target_pos[0] >= window_width) or (window_height > 0 and target_pos[1] >= window_height):
-                            print(f"警告: 文字位置 ({target_pos[0]}, {target_pos[1]}) 可能超出窗口范围 ({window_width}x{window_height})，但仍将尝试点击")
-                        
-                        # 计算全局坐标
-                        global_x = window_pos[0] + click_x
-                        global_y = window_pos[1] + click_y
-                        
-                        success = self.window_controller.force_click(global_x, global_y, click_type, move_duration=0.3)
-                        if not success:
-                            print(f"点击文字 '{action['target']}' 失败")
-                            continue
+                try:
+                    delay = float(action.get("delay", 1.0))
+                    
+                    if action["type"] in self.WAIT_TYPES:
+                        # 等待类步骤只等待条件满足，不点击；等待时间不超过步骤剩余的时间预算
+                        wait_action = action
+                        if action.get("timeout"):
+                            remaining = action["timeout"] - (time.perf_counter() - visit_start)
+                            wait_action = action.copy(timeout=max(0.0, remaining))
+                        success = self.wait_for_target(wait_action, screenshot, window_width, window_height)
                     else:
-                        print(f"未找到文字: '{action['target']}'")
-                        continue
-                elif action["type"] == "template":
-                    # 获取图标路径
-                    icon_path = self.get_icon_path(action["target"])
-                    if icon_path is not None:
-                        target_pos = self.image_recognition.find_icon(
-                            screenshot, icon_path, threshold=0.7
-                        )
-                        if target_pos:
-                            # 计算偏移后的坐标
-                            click_x = target_pos[0] + shift_x
-                            click_y = target_pos[1] + shift_y
+                        # 优先使用延时期间预取的识别结果
+                        hit, located = self._take_prefetch(step_index, screenshot)
+                        if not hit:
+                            # 解析搜索区域
+                            roi = self.resolve_roi(action.roi_spec, window_width, window_height)
+                            located = self.locate_target(action, screenshot, roi)
                             
-                            # 检查坐标是否在窗口范围内
-                            if target_pos[0] < 0 or target_pos[1] < 0 or (window_width > 0 and target_pos[0] >= window_width) or (window_height > 0 and target_pos[1] >= window_height):
-                                print(f"警告: 图标位置 ({target_pos[0]}, {target_pos[1]}) 可能超出窗口范围 ({window_width}x{window_height})，但仍将尝试点击")
-                            
-                            # 计算全局坐标
-                            global_x = window_pos[0] + click_x
-                            global_y = window_pos[1] + click_y
-                            
-                            success = self.window_controller.force_click(global_x, global_y, click_type, move_duration=0.3)
-                            if not success:
-                                print(f"点击图标 '{action['target']}' 失败")
-                                continue
-                        else:
-                            print(f"未找到图标: '{action['target']}'")
-                            continue
-                    else:
-                        print(f"无法加载图标: {action['target']}")
-                        continue
-                else:
-                    print(f"未知的步骤类型: {step_type}")
-                    continue
-            except Exception as e:
-                print(f"执行步骤 {step_index + 1} 时出错: {str(e)}")
-                success = False
+                        success = self.perform_action(action, located, window_pos, window_width, window_height)
+                except Exception as e:
+                    print(f"执行步骤 {step_index + 1} 时出错: {str(e)}")
+                    success = False
+                    error = True
                 
-            if not success:
-                print(f"步骤 {step_index + 1} 失败，等待重试...")
-                time.sleep(1)  # 失败后等待1秒再重试
+            if success:
+                entry['result'] = 'ok'
+                print(f"步骤 {step_index + 1} 完成")
+                # 等待指定时间，流水线模式下在等待期间预取下一步的识别结果
+                next_index = step_index + 1
+                if (self._executor is not None and next_index < len(sequence)
+                        and self._prefetchable(sequence[next_index])):
+                    self._wait_with_prefetch(delay, next_index)
+                else:
+                    time.sleep(self._clamp_to_deadline(delay))
+                # 成功后移动到下一步
+                step_index += 1
+                visit_start = time.perf_counter()
+                visit_failures = 0
                 continue
                 
-            print(f"步骤 {step_index + 1} 完成")
-            # 等待指定时间
-            time.sleep(delay)
-            # 成功后移动到下一步
-            step_index += 1
+            # 步骤失败
+            visit_failures += 1
+            
+            # 检查重试次数和时间预算
+            max_retries = action.get("max_retries")
+            timeout = action.get("timeout")
+            elapsed = time.perf_counter() - visit_start
+            exhausted = ((max_retries is not None and visit_failures > max_retries)
+                         or (timeout is not None and elapsed >= timeout))
+            # on_failure 模式下保存失败前的截图
+            self.window_controller.debug_writer.report_failure(f"step{step_index + 1}")
+            if exhausted:
+                entry['retry_time'] += time.perf_counter() - attempt_start
+                mode, goto_index = self.parse_on_fail(action.get("on_fail"))
+                print(f"步骤 {step_index + 1} 失败 {visit_failures} 次，耗时 {elapsed:.2f}秒，处理方式: {mode}")
+                visit_start = time.perf_counter()
+                visit_failures = 0
+                if mode == 'skip':
+                    entry['result'] = 'skipped'
+                    step_index += 1
+                    continue
+                if mode == 'goto':
+                    entry['result'] = f"goto:{goto_index + 1}"
+                    step_index = goto_index
+                    continue
+                entry['result'] = 'aborted'
+                return self._finish_run('aborted', run_start, step_stats)
+                
+            wait = self.retry_wait(action, visit_failures)
+            if timeout is not None:
+                wait = min(wait, max(0.0, timeout - elapsed))
+            wait = self._clamp_to_deadline(wait)
+            reason = "失败" if error else "未找到目标"
+            print(f"步骤 {step_index + 1} {reason}，{wait:.2f}秒后重试...")
+            time.sleep(wait)
+            entry['retries'] += 1
+            entry['retry_time'] += time.perf_counter() - attempt_start
                 
         print("所有步骤执行完毕")
-        return True
+        return self._finish_run('completed', run_start, step_stats)
         
 if __name__ == "__main__":
-    auto_clicker = AutoClicker()
+    parser = argparse.ArgumentParser(description='自动点击工具')
+    parser.add_argument('--config', type=str, default='csv-files/click-test1.xlsx', help='步骤配置文件')
+    parser.add_argument('--replay', type=str, default=None, help='回放录制画面（图片、目录或通配符），不操作真实窗口')
+    parser.add_argument('--ocr_server', type=str, default=None, help="常驻OCR服务地址，如 'unix:/tmp/autoclick_ocr.sock'")
+    parser.add_argument('--ocr_shm', action='store_true', help='通过共享内存向OCR服务传递画面（服务需在本机）')
+    parser.add_argument('--deadline', type=float, default=None, help='整个序列的最长执行时间（秒）')
+    parser.add_argument('--pipeline', action='store_true', help='在步骤延时期间预取下一步的识别结果')
+    parser.add_argument('--ocr_profile', type=str, default=DEFAULT_PROFILE, choices=list(OCR_PROFILES), help='OCR配置档')
+    parser.add_argument('--gray_match', action='store_true', help='图标匹配使用灰度图（更快，但不区分颜色）')
+    parser.add_argument('--debug_mode', type=str, default='on_failure', choices=DebugArtifactWriter.MODES, help='调试截图保存方式')
+    args = parser.parse_args()
+    
+    capture_backend = ReplayCaptureBackend(args.replay) if args.replay else None
+    auto_clicker = AutoClicker(args.config, debug_mode=args.debug_mode, capture_backend=capture_backend,
+                               pipeline=args.pipeline, sequence_timeout=args.deadline, ocr_server=args.ocr_server,
+                               ocr_profile=args.ocr_profile, ocr_use_shm=args.ocr_shm,
+                               match_color=not args.gray_match)
     auto_clicker.run()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import os
+import glob
+import numpy as np
+import cv2
+from cv_utils import imread_cn
+
+try:
+    from PIL import ImageGrab
+except ImportError:
+    ImageGrab = None
+
+
+class CaptureBackend:
+    """
+    截图后端接口
+
+    capture() 返回 (BGR格式的numpy数组, 窗口左上角屏幕坐标)，失败时返回 None。
+    requires_window 为 False 的后端不依赖真实窗口，可在没有桌面的环境中运行。
+    """
+
+    requires_window = True
+
+    def capture(self, window_controller):
+        """
+        截取一帧画面
+
+        Args:
+            window_controller: 调用方的 WindowController，用于获取窗口位置
+
+        Returns:
+            (截图, (left, top)) 或 None
+        """
+        raise NotImplementedError
+
+
+class GDICaptureBackend(CaptureBackend):
+    """使用 win32gui 获取窗口位置、PIL.ImageGrab 截取屏幕区域"""
+
+    def capture(self, window_controller):
+        if not window_controller.window_handle:
+            print("错误: 未找到窗口")
+            return None
+
+        # 获取窗口位置
+        rect = window_controller.get_window_rect()
+        if not rect:
+            print("错误: 无法获取窗口位置")
+            return None
+
+        left, top, width, height = rect
+
+        # 使用PIL截取屏幕
+        screenshot = ImageGrab.grab(bbox=(left, top, left + width, top + height))
+
+        # 转换为OpenCV格式
+        screenshot_np = np.array(screenshot)
+        screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
+        return (screenshot_cv, (left, top))
+
+
+class ReplayCaptureBackend(CaptureBackend):
+    """
+    回放录制好的画面
+
+    按文件名顺序依次返回单个图片文件、目录或通配符匹配到的图片，
+    用于在没有窗口的环境（如Linux构建机）上运行和分析完整的识别流程。
+    """
+
+    requires_window = False
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    def __init__(self, source, loop=True, origin=(0, 0), preload=False):
+        """
+        Args:
+            source: 图片文件、目录或通配符
+            loop: 播放完毕后是否从头开始，否则一直返回最后一帧
+            origin: 模拟的窗口左上角屏幕坐标
+            preload: 是否在初始化时读取全部图片，避免回放过程中的磁盘读取
+        """
+        if os.path.isdir(source):
+            paths = [os.path.join(source, name) for name in os.listdir(source)]
+        elif os.path.isfile(source):
+            paths = [source]
+        else:
+            paths = glob.glob(source)
+        self.paths = sorted(p for p in paths if p.lower().endswith(self.IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise ValueError(f"回放源中没有图片: {source}")
+        self.loop = loop
+        self.origin = tuple(origin)
+        self.index = 0
+        self._frames = {}
+        if preload:
+            for path in self.paths:
+                self._load(path)
+
+    def _load(self, path):
+        frame = self._frames.get(path)
+        if frame is None:
+            frame = imread_cn(path)
+            if frame is not None:
+                self._frames[path] = frame
+        return frame
+
+    def capture(self, window_controller=None):
+        if self.index >= len(self.paths):
+            self.index = 0 if self.loop else len(self.paths) - 1
+        path = self.paths[self.index]
+        self.index += 1
+        frame = self._load(path)
+        if frame is None:
+            return None
+        # 返回副本，避免调用方修改缓存的画面
+        return (frame.copy(), self.origin)
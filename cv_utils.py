@@ -2,6 +2,8 @@ import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
+import threading
+from collections import OrderedDict
 
 def imread_cn(file_path):
     """
@@ -23,6 +25,162 @@ def imread_cn(file_path):
         print(f"读取图片失败: {file_path}, 错误: {str(e)}")
         return None
 
+# 常见中文字体路径，按优先级排列
+CHINESE_FONT_PATHS = [
+    os.path.join(os.environ.get('WINDIR', 'C:/Windows'), 'Fonts/simhei.ttf'),
+    'C:/Windows/Fonts/simhei.ttf',
+    'C:/Windows/Fonts/simsun.ttc',
+    'C:/Windows/Fonts/msyh.ttc',
+    'C:/Windows/Fonts/simkai.ttf',
+    # Linux: Noto CJK / 文泉驿
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/usr/share/fonts/wqy-microhei/wqy-microhei.ttc',
+    '/usr/share/fonts/wqy-zenhei/wqy-zenhei.ttc',
+    # macOS
+    '/System/Library/Fonts/PingFang.ttc',
+    '/System/Library/Fonts/STHeiti Medium.ttc',
+]
+
+class FontRegistry:
+    """
+    字体注册表
+    
+    字体路径只查找一次；按字号缓存字体对象，按 (字体, 文字) 缓存文字尺寸，均为LRU淘汰。
+    标注大量文字时避免反复查找字体文件和加载字体。
+    """
+    
+    def __init__(self, font_paths=None, max_fonts=16, max_measurements=4096):
+        """
+        Args:
+            font_paths: 候选字体路径，默认使用 CHINESE_FONT_PATHS
+            max_fonts: 最多缓存的字号数
+            max_measurements: 最多缓存的文字尺寸数
+        """
+        self.font_paths = list(font_paths or CHINESE_FONT_PATHS)
+        self.max_fonts = max_fonts
+        self.max_measurements = max_measurements
+        self._font_path = None
+        self._resolved = False
+        self._fonts = OrderedDict()
+        self._bboxes = OrderedDict()
+        self._lock = threading.Lock()
+        
+    @property
+    def font_path(self):
+        """第一个存在的中文字体路径，找不到时为None"""
+        if not self._resolved:
+            self._font_path = next((path for path in self.font_paths if os.path.exists(path)), None)
+            self._resolved = True
+            if self._font_path is None:
+                print("警告: 找不到中文字体，使用默认字体")
+        return self._font_path
+        
+    def get(self, text_size):
+        """
+        获取指定大小的字体对象
+        
+        Args:
+            text_size: 文字大小
+            
+        Returns:
+            PIL字体对象，找不到中文字体时为PIL默认字体
+        """
+        with self._lock:
+            font = self._fonts.get(text_size)
+            if font is not None:
+                self._fonts.move_to_end(text_size)
+                return font
+            font = None
+            if self.font_path is not None:
+                try:
+                    font = ImageFont.truetype(self.font_path, text_size)
+                except IOError:
+                    print(f"警告: 加载字体失败: {self.font_path}，使用默认字体")
+            if font is None:
+                font = ImageFont.load_default()
+            self._fonts[text_size] = font
+            if len(self._fonts) > self.max_fonts:
+                self._fonts.popitem(last=False)
+            return font
+            
+    def bbox(self, font, text):
+        """
+        文字相对绘制位置的范围 (左, 上, 右, 下)
+        
+        Returns:
+            范围，字体不支持getbbox时为None
+        """
+        if not hasattr(font, 'getbbox'):
+            return None
+        # 键中持有字体对象本身，字体被淘汰后也不会与新对象混淆
+        key = (font, text)
+        with self._lock:
+            bbox = self._bboxes.get(key)
+            if bbox is not None:
+                self._bboxes.move_to_end(key)
+                return bbox
+        bbox = font.getbbox(text)
+        with self._lock:
+            self._bboxes[key] = bbox
+            if len(self._bboxes) > self.max_measurements:
+                self._bboxes.popitem(last=False)
+        return bbox
+        
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+            self._bboxes.clear()
+            self._resolved = False
+            self._font_path = None
+
+# 所有绘制函数共用的字体注册表
+font_registry = FontRegistry()
+
+def load_chinese_font(text_size):
+    """
+    加载指定大小的中文字体，找不到中文字体时使用PIL默认字体
+    
+    Args:
+        text_size: 文字大小
+        
+    Returns:
+        PIL字体对象
+    """
+    return font_registry.get(text_size)
+
+def measure_text(font, text, text_size, draw=None):
+    """
+    计算文字的宽高
+    
+    Args:
+        font: PIL字体对象
+        text: 文字
+        text_size: 文字大小，无法计算时用于估计
+        draw: 旧版PIL需要的ImageDraw对象
+        
+    Returns:
+        (宽, 高)
+    """
+    try:
+        # 新版PIL使用font.getbbox或font.getsize
+        bbox = font_registry.bbox(font, text)
+        if bbox is not None:
+            return bbox[2] - bbox[0], bbox[3] - bbox[1]
+        elif hasattr(font, 'getsize'):
+            return font.getsize(text)
+        else:
+            # 旧版PIL使用draw.textsize
+            return draw.textsize(text, font=font)
+    except Exception as e:
+        # 如果计算失败，使用估计值
+        print(f"警告: 无法计算文本大小: {str(e)}")
+        return len(text) * text_size * 0.6, text_size * 1.2
+
 def put_chinese_text(img, text, position, text_color=(0, 0, 255), text_size=30):
     """
     在图片上添加中文文字
@@ -48,30 +206,7 @@ def put_chinese_text(img, text, position, text_color=(0, 0, 255), text_size=30):
     draw = ImageDraw.Draw(img_pil)
     
     # 加载中文字体
-    fontpath = os.path.join(os.environ.get('WINDIR', 'C:/Windows'), 'Fonts/simhei.ttf')
-    
-    # 如果找不到系统字体，使用备选路径
-    if not os.path.exists(fontpath):
-        # 尝试其他常见字体路径
-        common_fonts = [
-            'C:/Windows/Fonts/simhei.ttf',
-            'C:/Windows/Fonts/simsun.ttc',
-            'C:/Windows/Fonts/msyh.ttc',
-            'C:/Windows/Fonts/simkai.ttf'
-        ]
-        
-        for font in common_fonts:
-            if os.path.exists(font):
-                fontpath = font
-                break
-    
-    # 创建字体对象
-    try:
-        font = ImageFont.truetype(fontpath, text_size)
-    except IOError:
-        # 如果找不到任何中文字体，使用默认字体
-        font = ImageFont.load_default()
-        print("警告: 找不到中文字体，使用默认字体")
+    font = load_chinese_font(text_size)
     
     # 在图片上绘制文字
     draw.text(position, text, font=font, fill=text_color)
@@ -106,47 +241,10 @@ def draw_text_with_box(img, text, position, text_color=(0, 0, 255), bg_color=(25
     draw = ImageDraw.Draw(img_pil)
     
     # 加载中文字体
-    fontpath = os.path.join(os.environ.get('WINDIR', 'C:/Windows'), 'Fonts/simhei.ttf')
-    
-    # 如果找不到系统字体，使用备选路径
-    if not os.path.exists(fontpath):
-        # 尝试其他常见字体路径
-        common_fonts = [
-            'C:/Windows/Fonts/simhei.ttf',
-            'C:/Windows/Fonts/simsun.ttc',
-            'C:/Windows/Fonts/msyh.ttc',
-            'C:/Windows/Fonts/simkai.ttf'
-        ]
-        
-        for font in common_fonts:
-            if os.path.exists(font):
-                fontpath = font
-                break
-    
-    # 创建字体对象
-    try:
-        font = ImageFont.truetype(fontpath, text_size)
-    except IOError:
-        font = ImageFont.load_default()
-        print("警告: 找不到中文字体，使用默认字体")
+    font = load_chinese_font(text_size)
     
     # 计算文本大小
-    try:
-        # 新版PIL使用font.getbbox或font.getsize
-        if hasattr(font, 'getbbox'):
-            bbox = font.getbbox(text)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-        elif hasattr(font, 'getsize'):
-            text_width, text_height = font.getsize(text)
-        else:
-            # 旧版PIL使用draw.textsize
-            text_width, text_height = draw.textsize(text, font=font)
-    except Exception as e:
-        # 如果计算失败，使用估计值
-        print(f"警告: 无法计算文本大小: {str(e)}")
-        text_width = len(text) * text_size * 0.6
-        text_height = text_size * 1.2
+    text_width, text_height = measure_text(font, text, text_size, draw)
     
     # 计算背景框位置
     x, y = position
@@ -175,6 +273,72 @@ def draw_text_with_box(img, text, position, text_color=(0, 0, 255), bg_color=(25
     img_opencv = cv2.cvtColor(np.array(img_pil.convert('RGB')), cv2.COLOR_RGB2BGR)
     return img_opencv
 
+def _text_extent(font, text, text_size):
+    """文字相对绘制位置实际占用的范围 (左, 上, 右, 下)"""
+    try:
+        bbox = font_registry.bbox(font, text)
+        if bbox is not None:
+            return bbox
+    except Exception:
+        pass
+    # 无法得到精确范围时按字号放宽估计
+    return 0, 0, len(text) * text_size * 1.2, text_size * 1.5
+
+def draw_labels(img, labels, text_color=(0, 0, 255), bg_color=(255, 255, 255),
+                text_size=30, padding=5, alpha=0.7):
+    """
+    批量绘制带背景框的中文文字，效果与逐个调用 draw_text_with_box 相同
+    
+    只对每个标签覆盖的区域（背景框与文字范围的并集）做颜色转换和透明合成，
+    不再每个标签都转换整张图片。
+    
+    Args:
+        img: OpenCV格式的图片
+        labels: [(文字, (x, y)), ...]，按顺序绘制，后面的标签覆盖前面的
+        text_color: 文字颜色
+        bg_color: 背景颜色
+        text_size: 文字大小
+        padding: 文字与边框的间距
+        alpha: 背景透明度 (0-1)
+        
+    Returns:
+        添加文字后的图片（新数组，不修改原图）
+    """
+    result = img.copy()
+    if not labels:
+        return result
+    font = load_chinese_font(text_size)
+    img_h, img_w = result.shape[:2]
+    
+    for text, position in labels:
+        x, y = position
+        text_width, text_height = measure_text(font, text, text_size)
+        box_position = [x - padding, y - padding, x + text_width + padding, y + text_height + padding]
+        
+        # 需要处理的区域：背景框与文字实际范围的并集，多留1像素给抗锯齿边缘
+        left, top, right, bottom = _text_extent(font, text, text_size)
+        x1 = int(np.floor(min(box_position[0], x + left))) - 1
+        y1 = int(np.floor(min(box_position[1], y + top))) - 1
+        x2 = int(np.ceil(max(box_position[2], x + right))) + 2
+        y2 = int(np.ceil(max(box_position[3], y + bottom))) + 2
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(img_w, x2), min(img_h, y2)
+        if x1 >= x2 or y1 >= y2:
+            continue
+            
+        # 在区域内按与 draw_text_with_box 相同的方式合成
+        region = Image.fromarray(cv2.cvtColor(result[y1:y2, x1:x2], cv2.COLOR_BGR2RGB)).convert('RGBA')
+        overlay = Image.new('RGBA', region.size, (0, 0, 0, 0))
+        ImageDraw.Draw(overlay).rectangle(
+            [box_position[0] - x1, box_position[1] - y1, box_position[2] - x1, box_position[3] - y1],
+            fill=(*bg_color, int(255 * alpha))
+        )
+        region = Image.alpha_composite(region, overlay)
+        ImageDraw.Draw(region).text((x - x1, y - y1), text, font=font, fill=(*text_color, 255))
+        result[y1:y2, x1:x2] = cv2.cvtColor(np.array(region.convert('RGB')), cv2.COLOR_RGB2BGR)
+        
+    return result
+
 def draw_box_with_text(img, text, box, text_color=(0, 0, 255), box_color=(0, 255, 0), 
                       text_size=20, thickness=2):
     """
@@ -0,0 +1,153 @@
+import os
+import queue
+import threading
+from collections import deque
+import cv2
+
+
+class DebugArtifactWriter:
+    """
+    调试截图后台写入器
+
+    截图和点击可视化图像放入队列，由后台线程编码并写入磁盘，不阻塞截图和点击流程。
+
+    模式:
+        'off'        不保存任何调试图像
+        'sampled'    每 sample_every 帧保存一帧
+        'on_failure' 只在内存中保留最近几帧，步骤失败时才写入磁盘
+
+    队列已满时直接丢弃新的图像；每种标签只保留最近 keep 个文件。
+    提交的图像在写入前不会被复制，调用方提交后不应再修改它。
+    """
+
+    MODES = ('off', 'sampled', 'on_failure')
+
+    def __init__(self, output_dir='screenshots', mode='on_failure', sample_every=1, keep=20,
+                 queue_size=4, failure_history=3):
+        """
+        Args:
+            output_dir: 调试图像保存目录
+            mode: 'off'、'sampled' 或 'on_failure'
+            sample_every: sampled 模式下每隔多少帧保存一帧
+            keep: 每种标签最多保留的文件数量
+            queue_size: 等待写入的最大图像数量
+            failure_history: on_failure 模式下在内存中保留的最近帧数
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"无效的调试图像模式: {mode}，可选: {', '.join(self.MODES)}")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.sample_every = max(1, int(sample_every))
+        self.keep = max(1, int(keep))
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._history = deque(maxlen=failure_history)
+        self._counter = 0
+        self._sequence = 0
+        self._files = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        # 已向后台线程发送停止标记、线程尚未退出
+        self._stopping = False
+
+    def submit(self, frame, tag='screenshot', annotate=None):
+        """
+        提交一帧调试图像
+
+        Args:
+            frame: OpenCV格式的图片
+            tag: 文件名前缀
+            annotate: 可选的绘制函数，在后台线程中以图像为参数调用，返回要保存的图像
+        """
+        if self.mode == 'off' or frame is None:
+            return
+        if self.mode == 'on_failure':
+            self._history.append((frame, tag, annotate))
+            return
+        with self._lock:
+            self._counter += 1
+            if (self._counter - 1) % self.sample_every:
+                return
+        self._enqueue(frame, tag, annotate)
+
+    def report_failure(self, label='failure'):
+        """
+        报告一次失败，on_failure 模式下将内存中保留的最近几帧写入磁盘
+
+        Args:
+            label: 失败标识，作为文件名前缀的一部分
+        """
+        if self.mode != 'on_failure':
+            return
+        while self._history:
+            frame, tag, annotate = self._history.popleft()
+            self._enqueue(frame, f"{label}_{tag}", annotate)
+
+    def close(self, timeout=5.0):
+        """
+        等待队列中的图像写完并停止后台线程
+
+        超时仍未写完时保留线程，之后再次调用 close 继续等待
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        if not self._stopping:
+            self._stopping = True
+            self._queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"调试图像写入未在 {timeout} 秒内完成，后台线程继续写入")
+            return
+        with self._lock:
+            self._thread = None
+            self._stopping = False
+
+    def _enqueue(self, frame, tag, annotate):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((frame, tag, annotate))
+        except queue.Full:
+            # 写入跟不上时丢弃，避免拖慢主流程
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is not None and not self._thread.is_alive():
+                # 线程已处理完停止标记退出，之后提交的图像由新线程写入
+                self._thread = None
+                self._stopping = False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="debug-artifact-writer")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, tag, annotate = item
+            try:
+                image = annotate(frame) if annotate is not None else frame
+                self._write(image, tag)
+            except Exception as e:
+                print(f"保存调试图像失败: {str(e)}")
+
+    def _write(self, image, tag):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._sequence += 1
+        path = os.path.join(self.output_dir, f"{tag}_{self._sequence:06d}.png")
+        cv2.imwrite(path, image)
+        self.written += 1
+
+        # 滚动保留：每种标签只保留最近 keep 个文件
+        files = self._files.setdefault(tag, deque())
+        files.append(path)
+        while len(files) > self.keep:
+            old_path = files.popleft()
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
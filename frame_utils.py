@@ -0,0 +1,189 @@
+import hashlib
+import cv2
+import numpy as np
+
+
+def frame_fingerprint(image, size=128):
+    """
+    计算画面的快速指纹
+
+    将画面缩小到固定宽度后做哈希，用于判断两次截图内容是否相同，
+    比对整幅图像做哈希快得多。
+
+    Args:
+        image: OpenCV格式的图片
+        size: 缩略图宽度，越大越能区分细小变化
+
+    Returns:
+        指纹字符串，尺寸不同的画面指纹必然不同
+    """
+    height, width = image.shape[:2]
+    thumb_width = min(size, width)
+    thumb_height = max(1, int(height * thumb_width / width))
+    thumb = cv2.resize(image, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+    digest = hashlib.blake2b(np.ascontiguousarray(thumb).tobytes(), digest_size=16)
+    digest.update(f"{width}x{height}x{image.shape[2] if image.ndim == 3 else 1}".encode())
+    return digest.hexdigest()
+
+
+def frame_thumbnail(image, size=64):
+    """
+    生成用于变化检测的灰度缩略图
+
+    Args:
+        image: OpenCV格式的图片
+        size: 缩略图宽度
+
+    Returns:
+        灰度缩略图
+    """
+    height, width = image.shape[:2]
+    thumb_width = min(size, width)
+    thumb_height = max(1, int(height * thumb_width / width))
+    thumb = cv2.resize(image, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+    if thumb.ndim == 3:
+        thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+    return thumb
+
+
+def frame_changed(previous_thumb, thumb, threshold=8):
+    """
+    比较两张缩略图，判断画面是否发生变化
+
+    Args:
+        previous_thumb: 上一次的缩略图，为 None 时视为已变化
+        thumb: 当前缩略图
+        threshold: 任一像素灰度差超过该值即视为变化
+
+    Returns:
+        bool: 画面是否变化
+    """
+    if previous_thumb is None or previous_thumb.shape != thumb.shape:
+        return True
+    return int(cv2.absdiff(previous_thumb, thumb).max()) > threshold
+
+
+class Frame:
+    """
+    一次截图及其派生视图
+
+    灰度图、缩小1/2和1/4的图、ROI裁剪、指纹和缩略图都在首次使用时计算并缓存，
+    模板匹配、OCR和变化检测共用同一份结果，同一画面上检查多个模板时不必重复转换。
+    """
+
+    def __init__(self, image, parent=None, roi=None):
+        """
+        Args:
+            image: OpenCV格式的图片
+            parent: 由 crop() 创建时的原始画面，灰度图等直接从原始画面的结果中裁剪
+            roi: 在原始画面中的区域 (x1, y1, x2, y2)
+        """
+        self.image = image
+        self._parent = parent
+        self._roi = roi
+        self._cache = {}
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    @property
+    def width(self):
+        return self.image.shape[1]
+
+    @property
+    def height(self):
+        return self.image.shape[0]
+
+    @property
+    def size(self):
+        return self.image.size
+
+    @property
+    def gray(self):
+        """灰度图"""
+        gray = self._cache.get('gray')
+        if gray is None:
+            if self._parent is not None:
+                x1, y1, x2, y2 = self._roi
+                gray = self._parent.gray[y1:y2, x1:x2]
+            elif self.image.ndim == 3:
+                gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+            else:
+                gray = self.image
+            self._cache['gray'] = gray
+        return gray
+
+    def scaled(self, level, gray=True):
+        """
+        缩小 2^level 倍的图
+
+        Args:
+            level: 缩小层数，1为1/2，2为1/4
+            gray: 是否使用灰度图
+        """
+        if level <= 0:
+            return self.gray if gray else self.image
+        key = ('scaled', level, gray)
+        scaled = self._cache.get(key)
+        if scaled is None:
+            source = self.gray if gray else self.image
+            scale = 1 << level
+            scaled = cv2.resize(source, (source.shape[1] // scale, source.shape[0] // scale),
+                                interpolation=cv2.INTER_AREA)
+            self._cache[key] = scaled
+        return scaled
+
+    @property
+    def half(self):
+        """缩小1/2的灰度图"""
+        return self.scaled(1)
+
+    @property
+    def quarter(self):
+        """缩小1/4的灰度图"""
+        return self.scaled(2)
+
+    def crop(self, roi):
+        """
+        裁剪搜索区域
+
+        Args:
+            roi: (x1, y1, x2, y2)，为 None 时返回整幅画面
+
+        Returns:
+            (区域对应的 Frame, 区域左上角在原图中的坐标 (x, y))
+        """
+        if roi is None:
+            return self, (0, 0)
+        height, width = self.image.shape[:2]
+        x1, y1, x2, y2 = roi
+        x1, x2 = max(0, min(int(x1), width)), max(0, min(int(x2), width))
+        y1, y2 = max(0, min(int(y1), height)), max(0, min(int(y2), height))
+        key = ('crop', x1, y1, x2, y2)
+        cropped = self._cache.get(key)
+        if cropped is None:
+            cropped = Frame(self.image[y1:y2, x1:x2], parent=self, roi=(x1, y1, x2, y2))
+            self._cache[key] = cropped
+        return cropped, (x1, y1)
+
+    def fingerprint(self, size=128):
+        """画面指纹，见 frame_fingerprint"""
+        key = ('fingerprint', size)
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = frame_fingerprint(self.image, size)
+        return value
+
+    def thumbnail(self, size=64):
+        """变化检测用的灰度缩略图，见 frame_thumbnail"""
+        key = ('thumbnail', size)
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = frame_thumbnail(self.gray, size)
+        return value
+
+
+def as_frame(image):
+    """把截图包装为 Frame，已经是 Frame 时直接返回"""
+    return image if isinstance(image, Frame) else Frame(image)
@@ -1,83 +1,513 @@
+import os
+import threading
 import cv2
 import numpy as np
-from paddleocr import PaddleOCR
+from collections import OrderedDict
+from functools import partial
 from cv_utils import imread_cn
+from frame_utils import Frame, as_frame
+from incremental_ocr import IncrementalOCR
+from ocr_result import OCRResult
+from text_index import TextIndex
+from ocr_server import OCRClient, connect_or_none
+from ocr_profiles import DEFAULT_PROFILE, get_profile, use_cls, engine_options
+from template_matcher import match_exhaustive, match_pyramid, match_all, non_max_suppression
 import time
 
+# 图标模板截取时的屏幕宽度
+ICON_BASE_WIDTH = 1920
+
+
+def crop_roi(image, roi):
+    """
+    按感兴趣区域裁剪图像（返回视图，不复制数据）
+    
+    Args:
+        image: 图像数据或 Frame
+        roi: 区域 (x1, y1, x2, y2)，为 None 时返回整幅图像
+        
+    Returns:
+        (裁剪后的图像, (x偏移, y偏移))，传入 Frame 时返回区域对应的 Frame
+    """
+    if isinstance(image, Frame):
+        return image.crop(roi)
+    if roi is None:
+        return image, (0, 0)
+    height, width = image.shape[:2]
+    x1, y1, x2, y2 = roi
+    x1, x2 = max(0, min(int(x1), width)), max(0, min(int(x2), width))
+    y1, y2 = max(0, min(int(y1), height)), max(0, min(int(y2), height))
+    return image[y1:y2, x1:x2], (x1, y1)
+
+
+def create_ocr_engine(ocr_server=None, profile=None, use_gpu=True, lang='ch', use_shm=False):
+    """
+    创建OCR引擎（延迟导入paddleocr），配置了OCR服务时优先连接服务
+    
+    Args:
+        ocr_server: 常驻OCR服务地址，不可用时回退到进程内OCR
+        profile: OCR配置档名称（见 ocr_profiles），为None时使用默认配置档
+        use_gpu: 是否使用GPU，没有可用GPU时自动改用CPU
+        lang: 语言
+        use_shm: 连接OCR服务时是否通过共享内存传递画面
+        
+    Returns:
+        提供 ocr(image, cls) 接口的引擎
+    """
+    if ocr_server:
+        client = connect_or_none(ocr_server, use_shm=use_shm)
+        if client is not None:
+            return client
+            
+    from paddleocr import PaddleOCR
+    return PaddleOCR(**engine_options(profile, use_gpu=use_gpu, lang=lang))
+
+
+def engine_ocr(engine, image, profile):
+    """
+    用引擎识别图像
+
+    支持配置档的引擎（OCR服务客户端、引擎池）同时传入配置档，由其选择对应的模型；
+    其他引擎只能按创建时的配置档识别。
+    """
+    if getattr(engine, 'supports_profiles', False):
+        return engine.ocr(image, cls=use_cls(profile), profile=profile)
+    return engine.ocr(image, cls=use_cls(profile))
+
+
+class TemplateCache:
+    """
+    图标模板缓存
+
+    每个图标只读取一次，并保存按当前截图宽度缩放后的版本及其灰度图。
+    图标文件修改时间或截图宽度变化时缓存项失效，超出容量时按LRU淘汰。
+    """
+
+    def __init__(self, max_size=64, base_width=ICON_BASE_WIDTH):
+        """
+        Args:
+            max_size: 最多缓存的模板数量
+            base_width: 图标截取时的屏幕宽度
+        """
+        self.max_size = max_size
+        self.base_width = base_width
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, icon_path, screen_width):
+        """
+        获取按截图宽度缩放后的模板
+
+        Args:
+            icon_path: 图标文件路径
+            screen_width: 当前截图宽度
+
+        Returns:
+            (彩色模板, 灰度模板)，如果读取失败则返回 None
+        """
+        try:
+            mtime = os.path.getmtime(icon_path)
+        except OSError:
+            print(f"无法读取图标: {icon_path}")
+            return None
+
+        entry = self._entries.get(icon_path)
+        if entry is not None and entry[0] == mtime and entry[1] == screen_width:
+            self._entries.move_to_end(icon_path)
+            self.hits += 1
+            return entry[2], entry[3]
+
+        self.misses += 1
+        icon = imread_cn(icon_path)
+        if icon is None:
+            print(f"无法读取图标: {icon_path}")
+            self._entries.pop(icon_path, None)
+            return None
+
+        # 计算缩放比例 (假设图标是在1920宽的屏幕上截取的)
+        scale_ratio = screen_width / self.base_width
+        if scale_ratio != 1.0:
+            # 调整图标大小，确保尺寸至少为1x1
+            new_width = max(1, int(icon.shape[1] * scale_ratio))
+            new_height = max(1, int(icon.shape[0] * scale_ratio))
+
+            print(f"调整图标大小: 原始 {icon.shape[1]}x{icon.shape[0]} -> 新 {new_width}x{new_height} (比例: {scale_ratio:.2f})")
+            icon = cv2.resize(icon, (new_width, new_height), interpolation=cv2.INTER_AREA)
+
+        icon_gray = cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY)
+        self._entries[icon_path] = (mtime, screen_width, icon, icon_gray)
+        self._entries.move_to_end(icon_path)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return icon, icon_gray
+
+    def preload(self, icon_paths, screen_width):
+        """
+        预先加载一组图标，使后续查找不再需要读取和缩放
+
+        Args:
+            icon_paths: 图标文件路径列表
+            screen_width: 当前截图宽度
+
+        Returns:
+            成功加载的图标数量
+        """
+        loaded = 0
+        for icon_path in icon_paths:
+            if self.get(icon_path, screen_width) is not None:
+                loaded += 1
+        return loaded
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+
+
+class OCRResultCache:
+    """
+    OCR结果缓存
+
+    以画面指纹为键保存解析后的OCR结果，同一画面上的多个文字步骤及重试
+    只需运行一次OCR。
+    """
+
+    def __init__(self, max_size=8, fingerprint_size=128):
+        """
+        Args:
+            max_size: 最多缓存的画面数量
+            fingerprint_size: 计算画面指纹时缩略图的宽度
+        """
+        self.max_size = max_size
+        self.fingerprint_size = fingerprint_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, image):
+        """计算画面对应的缓存键"""
+        return as_frame(image).fingerprint(self.fingerprint_size)
+
+    def get(self, key):
+        """
+        获取缓存的OCR结果
+
+        Returns:
+            解析后的结果列表，未命中则返回 None
+        """
+        lines = self._entries.get(key)
+        if lines is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return lines
+
+    def put(self, key, lines):
+        """保存OCR结果"""
+        self._entries[key] = lines
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+
+
 class ImageRecognition:
-    def __init__(self):
-        # 使用GPU加速，并使用轻量级模型
-        self.ocr = PaddleOCR(
-            use_angle_cls=True, 
-            lang='ch', 
-            use_gpu=True,  # 启用GPU
-            show_log=False,
-            # 使用轻量级模型提高速度
-            det_db_thresh=0.3,
-            det_db_box_thresh=0.5
-        )
-        
-    def find_text_location(self, image, target_text):
+    def __init__(self, template_cache_size=64, ocr_cache_size=8, incremental_ocr=False,
+                 match_method='exhaustive', pyramid_levels=2, pyramid_candidates=3, ocr_server=None,
+                 ocr_engine=None, ocr_profile=DEFAULT_PROFILE, ocr_use_shm=False, match_color=True):
+        # OCR引擎在首次使用（或预热）时才创建，只用模板匹配时不加载PaddleOCR；
+        # 也可以传入共享的引擎（如多窗口共用的引擎池），步骤指定其他配置档时该引擎需支持配置档
+        self._ocr = ocr_engine
+        self._shared_engine = ocr_engine is not None
+        # 默认OCR配置档，步骤可以指定其他配置档，对应的引擎在首次使用时创建
+        get_profile(ocr_profile)
+        self.ocr_profile = ocr_profile
+        self._profile_engines = {}
+        self._ocr_lock = threading.Lock()
+        self._warm_up_thread = None
+        # OCR引擎创建耗时（秒），未创建时为None
+        self.ocr_init_time = None
+        # 常驻OCR服务地址，可用时使用服务端已预热的模型，不可用或运行中断开时回退到进程内OCR
+        self.ocr_server = ocr_server
+        self.ocr_use_shm = ocr_use_shm
+        # 图标模板缓存，避免每次查找都重新读取和缩放图标
+        self.template_cache = TemplateCache(max_size=template_cache_size)
+        # OCR结果缓存，画面未变化时复用上一次的识别结果
+        self.ocr_cache = OCRResultCache(max_size=ocr_cache_size)
+        # 按OCR结果缓存文字索引，同一画面上的多个文字查询共用一个索引
+        self._text_indexes = OrderedDict()
+        self._text_index_cache_size = ocr_cache_size
+        # 增量OCR：只识别相对上一帧发生变化的区域
+        self.incremental_ocr = IncrementalOCR(self._run_ocr) if incremental_ocr else None
+        # 模板匹配方式：'exhaustive' 全分辨率匹配，'pyramid' 由粗到细的金字塔匹配
+        self.match_method = match_method
+        self.pyramid_levels = pyramid_levels
+        self.pyramid_candidates = pyramid_candidates
+        # 图标模板匹配使用彩色图（三通道，能区分只有颜色不同的图标）还是灰度图（更快）
+        self.match_color = match_color
+        
+    def _create_ocr(self):
+        """创建OCR引擎并记录耗时"""
+        start_time = time.perf_counter()
+        ocr = create_ocr_engine(self.ocr_server, self.ocr_profile, use_shm=self.ocr_use_shm)
+        self.ocr_init_time = time.perf_counter() - start_time
+        print(f"OCR引擎初始化耗时: {self.ocr_init_time:.2f}秒")
+        return ocr
+        
+    @property
+    def ocr(self):
+        """OCR引擎，首次访问时创建；后台预热进行中时等待其完成"""
+        thread = self._warm_up_thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join()
+        if self._ocr is None:
+            with self._ocr_lock:
+                if self._ocr is None:
+                    self._ocr = self._create_ocr()
+        return self._ocr
+        
+    def engine_for(self, profile=None):
+        """
+        获取指定配置档的OCR引擎
+        
+        Args:
+            profile: 配置档名称，为None或与默认配置档相同时返回默认引擎
+
+        共享引擎和OCR服务客户端支持配置档时直接返回，识别时再传入配置档；
+        不支持配置档的共享引擎无法切换配置档，抛出 ValueError。
+        """
+        if not profile or profile == self.ocr_profile:
+            return self.ocr
+        if self._shared_engine or self.ocr_server:
+            engine = self.ocr
+            if getattr(engine, 'supports_profiles', False):
+                return engine
+            if self._shared_engine:
+                raise ValueError(f"共享的OCR引擎不支持按步骤指定配置档: {profile}")
+        engine = self._profile_engines.get(profile)
+        if engine is None:
+            with self._ocr_lock:
+                engine = self._profile_engines.get(profile)
+                if engine is None:
+                    get_profile(profile)
+                    start_time = time.perf_counter()
+                    engine = create_ocr_engine(None, profile)
+                    print(f"OCR引擎({profile})初始化耗时: {time.perf_counter() - start_time:.2f}秒")
+                    self._profile_engines[profile] = engine
+        return engine
+        
+    def warm_up(self, background=True):
+        """
+        预热OCR引擎：创建引擎并对一幅小图做一次识别，消除首次识别的额外开销
+        
+        Args:
+            background: 是否在后台线程中预热，主线程可同时执行不需要OCR的步骤
+        """
+        def run():
+            try:
+                start_time = time.perf_counter()
+                with self._ocr_lock:
+                    if self._ocr is None:
+                        self._ocr = self._create_ocr()
+                    engine_ocr(self._ocr, np.full((32, 128, 3), 255, dtype=np.uint8), self.ocr_profile)
+                print(f"OCR预热完成，耗时: {time.perf_counter() - start_time:.2f}秒")
+            except Exception as e:
+                print(f"OCR预热失败: {str(e)}")
+                
+        if not background:
+            run()
+            return
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=run, name="ocr-warm-up")
+            self._warm_up_thread.daemon = True
+            self._warm_up_thread.start()
+        
+    def _run_ocr(self, image, profile=None):
+        """
+        对图像执行完整OCR并解析结果
+        
+        Returns:
+            OCRResult
+        """
+        profile = profile or self.ocr_profile
+        engine = self.engine_for(profile)
+        try:
+            return OCRResult.from_paddle(engine_ocr(engine, image, profile))
+        except (ConnectionError, OSError) as e:
+            if not isinstance(engine, OCRClient):
+                raise
+            print(f"OCR服务连接失败: {str(e)}，改用进程内OCR")
+            self._drop_ocr_server(engine)
+            return OCRResult.from_paddle(engine_ocr(self.engine_for(profile), image, profile))
+        
+    def _drop_ocr_server(self, client):
+        """OCR服务不可用时关闭客户端，之后的识别都使用进程内OCR"""
+        with self._ocr_lock:
+            self.ocr_server = None
+            client.close()
+            if self._ocr is client:
+                self._ocr = self._create_ocr()
+        
+    def recognize_text(self, image, profile=None):
+        """
+        识别图像中的所有文字，画面未变化时直接返回缓存结果
+        
+        Args:
+            image: 图像数据或 Frame
+            profile: OCR配置档，为None时使用默认配置档
+            
+        Returns:
+            OCRResult，逐行迭代得到 (文字框坐标, 文字, 置信度)
+        """
+        frame = as_frame(image)
+        profile = profile or self.ocr_profile
+        key = (self.ocr_cache.key(frame), profile)
+        lines = self.ocr_cache.get(key)
+        if lines is not None:
+            return lines
+            
+        if profile != self.ocr_profile:
+            # 增量OCR的状态只对应默认配置档
+            lines = self._run_ocr(frame.image, profile)
+        elif self.incremental_ocr is not None:
+            lines = self.incremental_ocr.recognize(frame)
+        else:
+            lines = self._run_ocr(frame.image)
+        
+        self.ocr_cache.put(key, lines)
+        return lines
+        
+    def text_index(self, image, profile=None):
+        """
+        获取图像的文字索引，同一OCR结果只建立一次
+        
+        Args:
+            image: 图像数据
+            profile: OCR配置档
+            
+        Returns:
+            TextIndex
+        """
+        lines = self.recognize_text(image, profile)
+        # 以结果对象为键，缓存中同时持有结果本身，不会与新对象的id混淆
+        key = id(lines)
+        cached = self._text_indexes.get(key)
+        if cached is not None and cached.result is lines:
+            self._text_indexes.move_to_end(key)
+            return cached
+        index = TextIndex(lines)
+        self._text_indexes[key] = index
+        if len(self._text_indexes) > self._text_index_cache_size:
+            self._text_indexes.popitem(last=False)
+        return index
+        
+    def find_texts(self, image, targets, roi=None, fuzzy=False, max_distance=1, profile=None):
+        """
+        在同一画面中查找多个文字，只识别一次
+        
+        Args:
+            image: 图像数据
+            targets: 目标文字列表
+            roi: 搜索区域 (x1, y1, x2, y2)，为 None 时搜索整幅图像
+            fuzzy: 是否允许编辑距离匹配
+            max_distance: 模糊匹配允许的最大编辑距离
+            profile: OCR配置档，为None时使用默认配置档
+            
+        Returns:
+            {目标文字: 最佳候选}，候选的 center 已换算为整幅图像坐标，未找到为None
+        """
+        image, (offset_x, offset_y) = crop_roi(as_frame(image), roi)
+        if image.size == 0:
+            print(f"搜索区域 {roi} 为空")
+            return {target: None for target in targets}
+            
+        index = self.text_index(image, profile)
+        found = {}
+        for target in targets:
+            match = index.best(target, fuzzy=fuzzy, max_distance=max_distance)
+            if match is not None:
+                match = dict(match, center=(match['center'][0] + offset_x, match['center'][1] + offset_y))
+            found[target] = match
+        return found
+        
+    def find_text_location(self, image, target_text, roi=None, fuzzy=False, max_distance=1, profile=None):
         """
         在图像中查找指定文字的位置
         
+        文字经过归一化（全角/半角、空白、标点、大小写）后比较，
+        多个候选时按 精确 > 前缀 > 包含 > 模糊 的顺序及置信度选择。
+        
         Args:
             image: 图像数据
             target_text: 要查找的文字
+            roi: 搜索区域 (x1, y1, x2, y2)，为 None 时搜索整幅图像
+            fuzzy: 是否允许编辑距离匹配（容忍个别字识别错误）
+            max_distance: 模糊匹配允许的最大编辑距离
+            profile: OCR配置档，为None时使用默认配置档
             
         Returns:
             文字的中心位置坐标 (x, y)，如果未找到则返回 None
         """
         start_time = time.time()
         
-        # 使用OCR识别图像中的所有文字
-        result = self.ocr.ocr(image, cls=True)
+        # 识别图像中的所有文字（画面未变化时复用缓存结果和索引）
+        match = self.find_texts(image, [target_text], roi=roi, fuzzy=fuzzy, max_distance=max_distance,
+                                profile=profile)[target_text]
         
-        # 如果没有识别结果，返回None
-        if not result or not result[0]:
-            end_time = time.time()
-            print(f"文字识别耗时: {end_time - start_time:.2f}秒，未找到任何文字")
+        end_time = time.time()
+        if match is None:
+            print(f"文字识别耗时: {end_time - start_time:.2f}秒，未找到目标文字: '{target_text}'")
             return None
             
-        # 遍历识别结果，查找匹配的文字
-        for line in result:
-            for item in line:
-                box = item[0]  # 文字框坐标
-                text = item[1][0]  # 识别的文字
-                confidence = item[1][1]  # 置信度
-                
-                # 如果文字包含目标文字，返回文字框的中心位置
-                if target_text in text:
-                    # 计算文字框的中心位置
-                    center_x = int(sum(point[0] for point in box) / 4)
-                    center_y = int(sum(point[1] for point in box) / 4)
-                    
-                    end_time = time.time()
-                    print(f"文字识别耗时: {end_time - start_time:.2f}秒，找到文字: '{text}' (置信度: {confidence:.2f})")
-                    return (center_x, center_y)
-        
-        # 如果未找到匹配的文字，返回None
-        end_time = time.time()
-        print(f"文字识别耗时: {end_time - start_time:.2f}秒，未找到目标文字: '{target_text}'")
-        return None
+        print(f"文字识别耗时: {end_time - start_time:.2f}秒，找到文字: '{match['text']}' "
+              f"(置信度: {match['confidence']:.2f}, 匹配方式: {match['kind']})")
+        return match['center']
         
-    def template_matching(self, image, template, threshold=0.7):
+    def template_matching(self, image, template, threshold=0.7, roi=None, method=None, color=None):
         """
         模板匹配查找图像
         
         Args:
-            image: 大图
-            template: 要查找的小图模板
+            image: 大图或 Frame
+            template: 要查找的小图模板，灰度匹配时彩色模板会先转换为灰度
             threshold: 匹配阈值，越高要求越严格
+            roi: 搜索区域 (x1, y1, x2, y2)，为 None 时搜索整幅图像
+            method: 'exhaustive' 或 'pyramid'，为 None 时使用初始化时的设置
+            color: 是否在彩色图上匹配（模板为单通道时总是灰度匹配），为 None 时使用初始化时的设置
             
         Returns:
             模板在图像中的中心位置 (x, y)，如果未找到则返回 None
         """
-        # 进行模板匹配
-        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+        # 只在搜索区域内匹配
+        frame, (offset_x, offset_y) = crop_roi(as_frame(image), roi)
         
-        # 找到匹配度最高的位置
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        # 搜索区域小于模板时无法匹配
+        if frame.height < template.shape[0] or frame.width < template.shape[1]:
+            return None
+            
+        color = self.match_color if color is None else color
+        if color and template.ndim == 3 and frame.image.ndim == 3:
+            source = frame.image
+            downscale = partial(frame.scaled, gray=False)
+        else:
+            # 单通道匹配比三通道快得多，灰度图和缩小图在同一画面的多次匹配间共用
+            if template.ndim == 3:
+                template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+            source = frame.gray
+            downscale = frame.scaled
+            
+        # 进行模板匹配，找到匹配度最高的位置
+        if (method or self.match_method) == 'pyramid':
+            max_val, max_loc = match_pyramid(
+                source, template, levels=self.pyramid_levels, candidates=self.pyramid_candidates,
+                downscale=downscale
+            )
+        else:
+            max_val, max_loc = match_exhaustive(source, template)
         
         # 如果最高匹配度低于阈值，认为未找到
         if max_val < threshold:
@@ -85,47 +515,91 @@ class ImageRecognition:
             
         # 计算模板中心在原图中的位置
         h, w = template.shape[:2]
-        center_x = max_loc[0] + w // 2
-        center_y = max_loc[1] + h // 2
+        center_x = max_loc[0] + w // 2 + offset_x
+        center_y = max_loc[1] + h // 2 + offset_y
         
         return (center_x, center_y)
         
-    def find_icon(self, image, icon_path, threshold=0.7):
+    def find_icon(self, image, icon_path, threshold=0.7, roi=None, color=None):
         """
         在图像中查找图标
         
         Args:
-            image: 图像数据
+            image: 图像数据或 Frame
             icon_path: 图标文件路径
             threshold: 匹配阈值，越高要求越严格
+            roi: 搜索区域 (x1, y1, x2, y2)，为 None 时搜索整幅图像
+            color: 是否在彩色图上匹配，为 None 时使用初始化时的设置
             
         Returns:
             图标在图像中的中心位置 (x, y)，如果未找到则返回 None
         """
-        # 读取图标图片
-        icon = imread_cn(icon_path)
-        if icon is None:
-            print(f"无法读取图标: {icon_path}")
+        frame = as_frame(image)
+        # 从缓存获取已按截图宽度缩放的图标
+        cached = self.template_cache.get(icon_path, frame.width)
+        if cached is None:
             return None
+        color = self.match_color if color is None else color
+        icon = cached[0] if color else cached[1]
+        
+        # 使用模板匹配查找图标
+        return self.template_matching(frame, icon, threshold, roi=roi, color=color)
+
+        
+    def find_all(self, image, templates, threshold=0.7, roi=None, iou_threshold=0.3):
+        """
+        查找多个模板在图像中的所有匹配位置
+        
+        所有模板共用同一幅灰度图，每个模板返回全部超过阈值的匹配，
+        再对所有结果统一做非极大值抑制。
+        
+        Args:
+            image: 图像数据或 Frame
+            templates: 图标路径列表，或 {名称: 图标路径} 字典
+            threshold: 匹配阈值，越高要求越严格
+            roi: 搜索区域 (x1, y1, x2, y2)，为 None 时搜索整幅图像
+            iou_threshold: 重叠度超过该值的匹配只保留匹配度最高的一个
             
-        # 获取当前图像的宽度
-        screenshot_width = image.shape[1]
+        Returns:
+            匹配结果列表，每项为 {'template', 'score', 'box', 'center'}，按匹配度从高到低排列
+        """
+        if not isinstance(templates, dict):
+            templates = {path: path for path in templates}
             
-        # 计算缩放比例 (假设图标是在1920宽的屏幕上截取的)
-        original_width = 1920
-        scale_ratio = screenshot_width / original_width
+        frame = as_frame(image)
+        screenshot_width = frame.width
+        region, (offset_x, offset_y) = crop_roi(frame, roi)
+        gray = region.gray
         
-        if scale_ratio != 1.0:
-            # 调整图标大小
-            new_width = int(icon.shape[1] * scale_ratio)
-            new_height = int(icon.shape[0] * scale_ratio)
+        names = []
+        all_scores = []
+        all_boxes = []
+        for name, icon_path in templates.items():
+            cached = self.template_cache.get(icon_path, screenshot_width)
+            if cached is None:
+                continue
+            scores, boxes = match_all(gray, cached[1], threshold, iou_threshold)
+            names.extend([name] * len(scores))
+            all_scores.append(scores)
+            all_boxes.append(boxes)
             
-            # 确保尺寸至少为1x1
-            new_width = max(1, new_width)
-            new_height = max(1, new_height)
+        if not names:
+            return []
             
-            print(f"调整图标大小: 原始 {icon.shape[1]}x{icon.shape[0]} -> 新 {new_width}x{new_height} (比例: {scale_ratio:.2f})")
-            icon = cv2.resize(icon, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        scores = np.concatenate(all_scores)
+        boxes = np.concatenate(all_boxes)
+        # 不同模板命中同一位置时只保留匹配度最高的
+        keep = non_max_suppression(boxes, scores, iou_threshold)
         
-        # 使用模板匹配查找图标
-        return self.template_matching(image, icon, threshold)
+        matches = []
+        for i in keep:
+            x1, y1, x2, y2 = (int(v) for v in boxes[i])
+            x1, x2 = x1 + offset_x, x2 + offset_x
+            y1, y2 = y1 + offset_y, y2 + offset_y
+            matches.append({
+                'template': names[i],
+                'score': float(scores[i]),
+                'box': (x1, y1, x2, y2),
+                'center': ((x1 + x2) // 2, (y1 + y2) // 2)
+            })
+        return matches
@@ -0,0 +1,163 @@
+import cv2
+import numpy as np
+from frame_utils import as_frame
+from ocr_result import OCRResult
+
+
+class IncrementalOCR:
+    """
+    增量OCR
+
+    将画面划分为若干图块，与上一次识别的画面比较，只对发生变化的图块
+    运行检测和识别，未变化区域直接沿用上一次的结果。
+    """
+
+    def __init__(self, ocr_func, tile_size=128, diff_threshold=12, full_ratio=0.5):
+        """
+        Args:
+            ocr_func: 对一幅图像执行完整OCR的函数，返回 OCRResult
+            tile_size: 图块边长（像素）
+            diff_threshold: 像素灰度差超过该值视为发生变化
+            full_ratio: 变化区域占比超过该值时直接对整幅画面做OCR
+        """
+        self.ocr_func = ocr_func
+        self.tile_size = tile_size
+        self.diff_threshold = diff_threshold
+        self.full_ratio = full_ratio
+        self._prev_gray = None
+        self._prev_lines = None
+        # 最近一次识别实际处理的面积占比，便于统计节省的OCR开销
+        self.last_ocr_ratio = 1.0
+
+    def reset(self):
+        """丢弃上一次的画面，下一次识别将处理整幅画面"""
+        self._prev_gray = None
+        self._prev_lines = None
+
+    def recognize(self, image):
+        """
+        识别图像中的文字，只处理相对上一次识别发生变化的区域
+
+        Args:
+            image: OpenCV格式的图片或 Frame
+
+        Returns:
+            OCRResult，坐标为整幅画面坐标
+        """
+        frame = as_frame(image)
+        image, gray = frame.image, frame.gray
+
+        if self._prev_gray is None or self._prev_gray.shape != gray.shape:
+            return self._full(image, gray)
+
+        regions = self._dirty_regions(gray)
+        if not regions:
+            self._prev_gray = gray
+            self.last_ocr_ratio = 0.0
+            return self._prev_lines
+
+        height, width = gray.shape
+        dirty_area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+        if dirty_area > self.full_ratio * width * height:
+            return self._full(image, gray)
+
+        # 保留完全位于未变化区域内的旧结果
+        keep = np.ones(len(self._prev_lines), dtype=bool)
+        for region in regions:
+            keep &= ~self._prev_lines.intersecting(region)
+        parts = [self._prev_lines[keep]]
+
+        # 只对变化区域做OCR，并把坐标映射回整幅画面
+        for x1, y1, x2, y2 in regions:
+            parts.append(self.ocr_func(image[y1:y2, x1:x2]).offset(x1, y1))
+
+        # 按从上到下、从左到右排序，与整幅识别的结果顺序保持一致
+        lines = OCRResult.concat(parts).sorted()
+
+        self._prev_gray = gray
+        self._prev_lines = lines
+        self.last_ocr_ratio = dirty_area / float(width * height)
+        return lines
+
+    def _full(self, image, gray):
+        """对整幅画面做OCR并记录状态"""
+        lines = self.ocr_func(image)
+        self._prev_gray = gray
+        self._prev_lines = lines
+        self.last_ocr_ratio = 1.0
+        return lines
+
+    def _dirty_regions(self, gray):
+        """
+        找出发生变化的区域
+
+        Returns:
+            [(x1, y1, x2, y2), ...]，已扩展到覆盖与之相交的旧文字框
+        """
+        height, width = gray.shape
+        tile = self.tile_size
+        rows = (height + tile - 1) // tile
+        cols = (width + tile - 1) // tile
+
+        changed = cv2.absdiff(gray, self._prev_gray) > self.diff_threshold
+        if not changed.any():
+            return []
+
+        # 补齐到图块整数倍后统计每个图块是否有变化
+        padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+        padded[:height, :width] = changed
+        dirty = padded.reshape(rows, tile, cols, tile).any(axis=(1, 3)).astype(np.uint8)
+
+        # 向外扩展一个图块，覆盖跨越图块边界的文字
+        dirty = cv2.dilate(dirty, np.ones((3, 3), np.uint8))
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(dirty, connectivity=8)
+        regions = []
+        for label in range(1, count):
+            tx, ty, tw, th = stats[label][:4]
+            regions.append((tx * tile, ty * tile, min(width, (tx + tw) * tile), min(height, (ty + th) * tile)))
+
+        # 与变化区域相交的旧文字需要整行重新识别；扩展后可能碰到新的文字行或其他区域，
+        # 反复扩展、合并直到不再变化，保证每行旧文字要么完整位于区域内，要么与区域不相交
+        rects = self._prev_lines.rects
+        regions = _merge_overlapping(regions)
+        while True:
+            expanded = []
+            for region in regions:
+                x1, y1, x2, y2 = region
+                hit = rects[self._prev_lines.intersecting(region)]
+                if len(hit):
+                    x1, y1 = min(x1, int(hit[:, 0].min())), min(y1, int(hit[:, 1].min()))
+                    x2, y2 = max(x2, int(hit[:, 2].max())), max(y2, int(hit[:, 3].max()))
+                expanded.append((max(0, x1), max(0, y1), min(width, x2), min(height, y2)))
+            expanded = _merge_overlapping(expanded)
+            if sorted(expanded) == sorted(regions):
+                return expanded
+            regions = expanded
+
+
+def _intersects(a, b):
+    """判断两个矩形是否相交"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _merge_overlapping(rects):
+    """合并相互重叠的矩形，避免同一区域被识别两次"""
+    merged = list(rects)
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        while merged:
+            current = merged.pop()
+            for i, other in enumerate(merged):
+                if _intersects(current, other):
+                    merged.pop(i)
+                    merged.append((min(current[0], other[0]), min(current[1], other[1]),
+                                   max(current[2], other[2]), max(current[3], other[3])))
+                    changed = True
+                    break
+            else:
+                result.append(current)
+        merged = result
+    return merged
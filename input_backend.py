@@ -0,0 +1,414 @@
+import time
+import threading
+import ctypes
+from ctypes import wintypes
+
+# SendInput 相关常量
+INPUT_MOUSE = 0
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_RIGHTDOWN = 0x0008
+MOUSEEVENTF_RIGHTUP = 0x0010
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+# 各点击类型对应的 (按下, 释放) 标志
+BUTTON_FLAGS = {
+    'single': (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP),
+    'double': (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP),
+    'right': (MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP),
+}
+
+
+class POINT(ctypes.Structure):
+    _fields_ = [("x", ctypes.c_long), ("y", ctypes.c_long)]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        # ULONG_PTR，直接存值，不需要为每个事件分配指针
+        ("dwExtraInfo", ctypes.c_size_t)
+    ]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [
+        ("type", wintypes.DWORD),
+        ("mi", MOUSEINPUT)
+    ]
+
+
+class ClickTiming:
+    """
+    点击各阶段之间的等待时间（秒）
+
+    某个间隔为0时，前后两段事件会合并到同一次 SendInput 调用中。
+    默认的 settle/press 都不为0，单击分为 移动 | 按下 | 释放 三次调用（双击五次），
+    因为部分应用会忽略没有悬停或按下时间的点击；确定目标应用不需要时，
+    ClickTiming(settle=0, press=0) 可以把整个单击合并为一次调用。
+    """
+
+    def __init__(self, settle=0.05, press=0.05, double_interval=0.1):
+        """
+        Args:
+            settle: 移动到目标位置后到按下之间的等待
+            press: 按下到释放之间的等待
+            double_interval: 双击两次点击之间的等待
+        """
+        self.settle = settle
+        self.press = press
+        self.double_interval = double_interval
+
+
+def build_input_array(events):
+    """
+    将事件列表一次性构造成 INPUT 数组
+
+    Args:
+        events: [(dwFlags, dx, dy), ...]
+
+    Returns:
+        ctypes INPUT 数组
+    """
+    inputs = (INPUT * len(events))()
+    for item, (flags, dx, dy) in zip(inputs, events):
+        item.type = INPUT_MOUSE
+        item.mi.dx = dx
+        item.mi.dy = dy
+        item.mi.dwFlags = flags
+    return inputs
+
+
+class InputBackend:
+    """
+    鼠标输入后端基类
+
+    子类实现 screen_size、cursor_pos 和 send，点击序列的构造和分段发送由基类完成。
+    """
+
+    def __init__(self, timing=None):
+        self.timing = timing if timing is not None else ClickTiming()
+
+    def screen_size(self):
+        """返回屏幕尺寸 (宽, 高)"""
+        raise NotImplementedError
+
+    def cursor_pos(self):
+        """返回鼠标当前位置 (x, y)"""
+        raise NotImplementedError
+
+    def send(self, events):
+        """
+        一次性发送一组事件
+
+        Args:
+            events: [(dwFlags, dx, dy), ...]
+        """
+        raise NotImplementedError
+
+    def sleep(self, seconds):
+        """事件分段之间的等待"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def to_absolute(self, x, y):
+        """屏幕坐标转换为 SendInput 使用的绝对坐标 (0-65535范围)"""
+        screen_width, screen_height = self.screen_size()
+        return int(65535 * x / screen_width), int(65535 * y / screen_height)
+
+    def move_event(self, x, y):
+        """构造移动到屏幕坐标 (x, y) 的事件"""
+        abs_x, abs_y = self.to_absolute(x, y)
+        return (MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE, abs_x, abs_y)
+
+    def move_to(self, x, y):
+        """直接移动鼠标到屏幕坐标 (x, y)"""
+        self.send([self.move_event(x, y)])
+
+    def move_path(self, points):
+        """
+        沿一组屏幕坐标移动鼠标，所有点在一次 send 中发送
+
+        Args:
+            points: [(x, y), ...]
+        """
+        if points:
+            self.send([self.move_event(x, y) for x, y in points])
+
+    def click_segments(self, x, y, click_type='single'):
+        """
+        构造点击序列
+
+        Returns:
+            [(事件列表, 之后的等待时间), ...]，相邻分段之间等待为0时已合并
+        """
+        if click_type not in BUTTON_FLAGS:
+            raise ValueError(f"不支持的点击类型: {click_type}")
+        down, up = BUTTON_FLAGS[click_type]
+        abs_x, abs_y = self.to_absolute(x, y)
+        timing = self.timing
+
+        plan = [([self.move_event(x, y)], timing.settle),
+                ([(down, abs_x, abs_y)], timing.press),
+                ([(up, abs_x, abs_y)], 0)]
+        if click_type == 'double':
+            plan[-1] = (plan[-1][0], timing.double_interval)
+            plan += [([(down, abs_x, abs_y)], timing.press),
+                     ([(up, abs_x, abs_y)], 0)]
+
+        segments = []
+        for events, gap in plan:
+            if segments and segments[-1][1] <= 0:
+                segments[-1] = (segments[-1][0] + events, gap)
+            else:
+                segments.append((events, gap))
+        return segments
+
+    def click(self, x, y, click_type='single'):
+        """
+        移动到屏幕坐标 (x, y) 并点击
+
+        Args:
+            x: 屏幕X坐标
+            y: 屏幕Y坐标
+            click_type: 'single', 'double', 或 'right'
+        """
+        for events, gap in self.click_segments(x, y, click_type):
+            self.send(events)
+            self.sleep(gap)
+
+
+class SendInputBackend(InputBackend):
+    """通过 user32.SendInput 发送鼠标事件"""
+
+    def __init__(self, timing=None):
+        super().__init__(timing)
+        self._user32 = ctypes.windll.user32
+
+    def screen_size(self):
+        return self._user32.GetSystemMetrics(0), self._user32.GetSystemMetrics(1)
+
+    def cursor_pos(self):
+        point = POINT()
+        self._user32.GetCursorPos(ctypes.byref(point))
+        return point.x, point.y
+
+    def send(self, events):
+        inputs = build_input_array(events)
+        sent = self._user32.SendInput(len(events), inputs, ctypes.sizeof(INPUT))
+        if sent != len(events):
+            raise OSError(f"SendInput 只发送了 {sent}/{len(events)} 个事件")
+        return sent
+
+
+class RecordingInputBackend(InputBackend):
+    """
+    记录事件而不真正发送
+
+    每次 send 构造的 INPUT 数组保存在 batches 中，等待时间保存在 gaps 中，
+    可在没有Windows的环境中测试和统计输入层。
+    """
+
+    def __init__(self, timing=None, screen_size=(1920, 1080), real_sleep=False):
+        """
+        Args:
+            timing: 点击时序
+            screen_size: 模拟的屏幕尺寸
+            real_sleep: 是否真正等待分段之间的间隔
+        """
+        super().__init__(timing)
+        self._screen_size = tuple(screen_size)
+        self._cursor = (0, 0)
+        self.real_sleep = real_sleep
+        self.batches = []
+        self.gaps = []
+
+    def screen_size(self):
+        return self._screen_size
+
+    def cursor_pos(self):
+        return self._cursor
+
+    def send(self, events):
+        inputs = build_input_array(events)
+        self.batches.append(inputs)
+        for flags, dx, dy in events:
+            if flags & MOUSEEVENTF_ABSOLUTE:
+                width, height = self._screen_size
+                self._cursor = (round(dx * width / 65535), round(dy * height / 65535))
+        return len(events)
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.gaps.append(seconds)
+            if self.real_sleep:
+                time.sleep(seconds)
+
+    @property
+    def event_count(self):
+        """已记录的事件总数"""
+        return sum(len(batch) for batch in self.batches)
+
+    def clear(self):
+        """清空记录"""
+        self.batches = []
+        self.gaps = []
+
+
+# DD驱动按键码
+DD_BUTTONS = {
+    'single': (1, 2),
+    'double': (1, 2),
+    'right': (4, 8),
+}
+
+# SendInput 按键标志对应的DD驱动操作，按同一事件内的执行顺序排列
+DD_EVENT_BUTTONS = (
+    (MOUSEEVENTF_LEFTDOWN, 'press', 1),
+    (MOUSEEVENTF_LEFTUP, 'release', 2),
+    (MOUSEEVENTF_RIGHTDOWN, 'press', 4),
+    (MOUSEEVENTF_RIGHTUP, 'release', 8),
+)
+
+
+class DDDriverSession:
+    """
+    DD键鼠驱动会话
+
+    每个进程只加载和初始化一次驱动，所有操作在锁内执行以保证线程安全。
+    操作失败后标记为失效，下一次使用时重新初始化。
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, dll_path='dd43390.dll'):
+        self.dll_path = dll_path
+        self._dll = None
+        self._lock = threading.RLock()
+        # 初始化次数和累计耗时，正常运行中应只初始化一次
+        self.init_count = 0
+        self.init_time = 0.0
+
+    @classmethod
+    def get(cls, dll_path='dd43390.dll'):
+        """获取指定驱动路径对应的进程级共享会话"""
+        with cls._instances_lock:
+            session = cls._instances.get(dll_path)
+            if session is None:
+                session = cls(dll_path)
+                cls._instances[dll_path] = session
+            return session
+
+    def ensure_ready(self):
+        """加载并初始化驱动（已初始化时直接返回）"""
+        with self._lock:
+            if self._dll is not None:
+                return self._dll
+            start = time.perf_counter()
+            dll = ctypes.windll.LoadLibrary(self.dll_path)
+            st = dll.DD_btn(0)
+            if st != 1:
+                raise OSError(f"DD驱动初始化失败，状态码: {st}")
+            self._dll = dll
+            self.init_count += 1
+            self.init_time += time.perf_counter() - start
+            print(f"DD驱动初始化成功，耗时: {time.perf_counter() - start:.3f}秒")
+            return dll
+
+    def invalidate(self):
+        """标记会话失效，下一次操作时重新初始化"""
+        with self._lock:
+            self._dll = None
+
+    def run(self, operations):
+        """
+        批量执行驱动操作
+
+        Args:
+            operations: [('move', x, y) | ('press', code) | ('release', code) | ('sleep', 秒), ...]
+        """
+        with self._lock:
+            dll = self.ensure_ready()
+            try:
+                for op in operations:
+                    kind = op[0]
+                    if kind == 'move':
+                        dll.DD_mov(int(op[1]), int(op[2]))
+                    elif kind in ('press', 'release'):
+                        dll.DD_btn(op[1])
+                    elif kind == 'sleep':
+                        if op[1] > 0:
+                            time.sleep(op[1])
+                    else:
+                        raise ValueError(f"未知的驱动操作: {kind}")
+            except Exception:
+                self.invalidate()
+                raise
+
+
+class DDInputBackend(InputBackend):
+    """通过DD键鼠驱动发送鼠标操作，驱动在进程内只初始化一次"""
+
+    def __init__(self, timing=None, session=None):
+        if timing is None:
+            timing = ClickTiming(settle=0.1, press=0.05, double_interval=0.05)
+        super().__init__(timing)
+        self.session = session if session is not None else DDDriverSession.get()
+
+    def screen_size(self):
+        user32 = ctypes.windll.user32
+        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+
+    def cursor_pos(self):
+        point = POINT()
+        ctypes.windll.user32.GetCursorPos(ctypes.byref(point))
+        return point.x, point.y
+
+    def event_operations(self, events):
+        """
+        将 SendInput 事件转换为驱动操作序列
+
+        绝对坐标移动换算回屏幕坐标，按键标志映射为DD按键码；不支持相对移动。
+        """
+        operations = []
+        screen_size = None
+        for flags, dx, dy in events:
+            if flags & MOUSEEVENTF_MOVE:
+                if not flags & MOUSEEVENTF_ABSOLUTE:
+                    raise ValueError("DD驱动不支持相对移动事件")
+                if screen_size is None:
+                    screen_size = self.screen_size()
+                operations.append(('move', round(dx * screen_size[0] / 65535), round(dy * screen_size[1] / 65535)))
+            for flag, kind, code in DD_EVENT_BUTTONS:
+                if flags & flag:
+                    operations.append((kind, code))
+        return operations
+
+    def send(self, events):
+        self.session.run(self.event_operations(events))
+        return len(events)
+
+    def move_to(self, x, y):
+        self.session.run([('move', x, y)])
+
+    def click_operations(self, x, y, click_type='single'):
+        """构造点击对应的驱动操作序列"""
+        if click_type not in DD_BUTTONS:
+            raise ValueError(f"不支持的点击类型: {click_type}")
+        down, up = DD_BUTTONS[click_type]
+        timing = self.timing
+        operations = [('move', x, y), ('sleep', timing.settle),
+                      ('press', down), ('sleep', timing.press), ('release', up)]
+        if click_type == 'double':
+            operations += [('sleep', timing.double_interval),
+                           ('press', down), ('sleep', timing.press), ('release', up)]
+        return operations
+
+    def click(self, x, y, click_type='single'):
+        self.session.run(self.click_operations(x, y, click_type))
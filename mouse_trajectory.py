@@ -0,0 +1,146 @@
+import math
+import time
+import numpy as np
+
+
+def _linear(t):
+    return t
+
+
+def _ease_in_out(t):
+    return t * t * (3.0 - 2.0 * t)
+
+
+def _ease_out(t):
+    return 1.0 - (1.0 - t) ** 2
+
+
+CURVES = {
+    'linear': _linear,
+    'ease_in_out': _ease_in_out,
+    'ease_out': _ease_out,
+}
+
+
+class TrajectoryEngine:
+    """
+    鼠标移动轨迹引擎
+
+    预先计算整条路径，按 time.perf_counter 截止时间发送各点，不会因 sleep
+    超时而累积延迟；移动时长随距离缩放，并限制在最小/最大时长之间。
+    相邻的轨迹点按 batch_interval 分组，每组在一次输入调用中发送。
+    """
+
+    def __init__(self, curve='ease_in_out', speed=3000.0, min_duration=0.05, max_duration=0.3, rate=120,
+                 batch_interval=1.0 / 30):
+        """
+        Args:
+            curve: 轨迹曲线，'linear'、'ease_in_out' 或 'ease_out'
+            speed: 自动计算时长时的移动速度（像素/秒）
+            min_duration: 最短移动时长（秒）
+            max_duration: 最长移动时长（秒）
+            rate: 每秒发送的轨迹点数
+            batch_interval: 每组轨迹点覆盖的时长（秒），组内的点一次发送；0表示每个点单独发送
+        """
+        if curve not in CURVES:
+            raise ValueError(f"不支持的轨迹曲线: {curve}，可选: {', '.join(CURVES)}")
+        self.curve = curve
+        self.speed = speed
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.rate = rate
+        self.batch_interval = batch_interval
+        # 最近一次移动的统计
+        self.last_stats = None
+        # 累计统计：请求时长与实际时长之和，用于衡量移动开销
+        self.total_requested = 0.0
+        self.total_achieved = 0.0
+
+    def duration_for(self, start, end):
+        """根据移动距离计算时长"""
+        distance = math.hypot(end[0] - start[0], end[1] - start[1])
+        if distance < 1:
+            return 0.0
+        return min(self.max_duration, max(self.min_duration, distance / self.speed))
+
+    def plan(self, start, end, duration):
+        """
+        计算整条轨迹
+
+        Args:
+            start: 起点 (x, y)
+            end: 终点 (x, y)
+            duration: 移动时长（秒）
+
+        Returns:
+            (轨迹点 (N, 2) 整数数组, 每个点相对起始时刻的截止时间 (N,) 数组)，最后一点为终点
+        """
+        count = max(1, int(math.ceil(duration * self.rate)))
+        t = np.arange(1, count + 1, dtype=np.float64) / count
+        progress = CURVES[self.curve](t)
+        start = np.asarray(start, dtype=np.float64)
+        end = np.asarray(end, dtype=np.float64)
+        points = np.rint(start + (end - start) * progress[:, None]).astype(np.int64)
+        return points, t * duration
+
+    def batches(self, deadlines):
+        """
+        按截止时间将轨迹点分组
+
+        Returns:
+            [(起始下标, 结束下标), ...]，每组在其最后一点的截止时间发送
+        """
+        groups = []
+        begin = 0
+        for i in range(1, len(deadlines) + 1):
+            if i == len(deadlines) or deadlines[i] - deadlines[begin] >= self.batch_interval:
+                groups.append((begin, i))
+                begin = i
+        return groups
+
+    def move(self, start, end, send_points, duration=None):
+        """
+        沿轨迹移动鼠标
+
+        Args:
+            start: 起点 (x, y)
+            end: 终点 (x, y)
+            send_points: 一次发送一组轨迹点的函数，参数为 [(x, y), ...]
+            duration: 移动时长（秒），为 None 时按距离自动计算
+
+        Returns:
+            统计信息 {'requested', 'achieved', 'points', 'sent', 'calls'}
+        """
+        if duration is None:
+            duration = self.duration_for(start, end)
+        if duration <= 0:
+            send_points([(int(end[0]), int(end[1]))])
+            stats = {'requested': 0.0, 'achieved': 0.0, 'points': 1, 'sent': 1, 'calls': 1}
+            self.last_stats = stats
+            return stats
+
+        points, deadlines = self.plan(start, end, duration)
+        groups = self.batches(deadlines)
+        last = len(groups) - 1
+        sent = 0
+        calls = 0
+        start_time = time.perf_counter()
+        for g, (begin, stop) in enumerate(groups):
+            now = time.perf_counter() - start_time
+            # 落后超过一组的时间时跳过中间组，只保证终点一定发送
+            if g < last and now > deadlines[groups[g + 1][1] - 1]:
+                continue
+            remaining = deadlines[stop - 1] - now
+            if remaining > 0:
+                time.sleep(remaining)
+            send_points([(int(x), int(y)) for x, y in points[begin:stop]])
+            sent += stop - begin
+            calls += 1
+        achieved = time.perf_counter() - start_time
+
+        self.total_requested += duration
+        self.total_achieved += achieved
+        stats = {'requested': duration, 'achieved': achieved, 'points': len(points), 'sent': sent,
+                 'calls': calls}
+        self.last_stats = stats
+        return stats
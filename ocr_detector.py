@@ -1,33 +1,59 @@
 import os
 import sys
 import cv2
+import glob
+import json
 import numpy as np
 import argparse
-from paddleocr import PaddleOCR
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.font_manager import FontProperties
-import matplotlib
-from cv_utils import put_chinese_text, draw_box_with_text, draw_text_with_box, imread_cn
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from ocr_server import OCRClient, connect_or_none
+from ocr_result import OCRResult
+from ocr_profiles import DEFAULT_PROFILE, OCR_PROFILES, engine_options, use_cls
+from cv_utils import put_chinese_text, draw_box_with_text, draw_labels, imread_cn
 
 class OCRDetector:
-    def __init__(self, use_gpu=True, lang='ch'):
+    def __init__(self, use_gpu=True, lang='ch', server=None, profile=DEFAULT_PROFILE, use_shm=False):
         """
         初始化OCR检测器
         
         Args:
-            use_gpu: 是否使用GPU加速
+            use_gpu: 是否使用GPU加速，没有可用GPU时自动改用CPU
             lang: 语言，默认为中文
+            server: 常驻OCR服务地址，可用时不在本进程加载模型
+            profile: OCR配置档 fast / balanced / accurate
+            use_shm: 是否通过共享内存向OCR服务传递画面
         """
-        self.ocr = PaddleOCR(
-            use_angle_cls=True,  # 使用方向分类器
-            lang=lang,           # 语言
-            use_gpu=use_gpu,     # 使用GPU
-            show_log=False       # 不显示日志
-        )
-        print(f"OCR初始化完成，使用GPU: {use_gpu}, 语言: {lang}")
+        self.profile = profile
+        self.cls = use_cls(profile)
+        self.use_gpu = use_gpu
+        self.lang = lang
+        self.ocr = connect_or_none(server, use_shm=use_shm)
+        if self.ocr is None:
+            self.ocr = self._create_local()
+            
+    def _create_local(self):
+        """创建进程内的PaddleOCR"""
+        # 延迟导入，只使用OpenCV可视化或不需要OCR的代码路径不必加载paddleocr
+        from paddleocr import PaddleOCR
+        options = engine_options(self.profile, use_gpu=self.use_gpu, lang=self.lang)
+        ocr = PaddleOCR(**options)
+        print(f"OCR初始化完成，配置档: {self.profile}, 使用GPU: {options['use_gpu']}, 语言: {self.lang}")
+        return ocr
         
-    def detect(self, image_path):
+    def _run_ocr(self, image_path):
+        """识别图片；OCR服务断开时改用进程内OCR"""
+        if not isinstance(self.ocr, OCRClient):
+            return self.ocr.ocr(image_path, cls=self.cls)
+        try:
+            return self.ocr.ocr(image_path, cls=self.cls, profile=self.profile)
+        except (ConnectionError, OSError) as e:
+            print(f"OCR服务连接失败: {str(e)}，改用进程内OCR")
+            self.ocr.close()
+            self.ocr = self._create_local()
+            return self.ocr.ocr(image_path, cls=self.cls)
+        
+    def detect_result(self, image_path):
         """
         检测图片中的文字
         
@@ -35,40 +61,33 @@ class OCRDetector:
             image_path: 图片路径
             
         Returns:
-            检测结果列表，每项包含位置和文本信息
+            OCRResult，图片不存在时返回None
         """
         if not os.path.exists(image_path):
             print(f"图片不存在: {image_path}")
             return None
             
         print(f"正在处理图片: {image_path}")
-        result = self.ocr.ocr(image_path, cls=True)
+        result = OCRResult.from_paddle(self._run_ocr(image_path))
         
-        if not result or len(result) == 0:
+        if not result:
             print("未检测到文字")
-            return []
-            
-        # 处理结果
-        detected_texts = []
-        for line in result:
-            for item in line:
-                box = item[0]  # 文本框坐标 [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-                text = item[1][0]  # 文本内容
-                confidence = item[1][1]  # 置信度
-                
-                # 计算中心点
-                center_x = int(sum(point[0] for point in box) / 4)
-                center_y = int(sum(point[1] for point in box) / 4)
-                
-                detected_texts.append({
-                    'box': box,
-                    'text': text,
-                    'confidence': confidence,
-                    'center': (center_x, center_y)
-                })
-                
-        print(f"检测到 {len(detected_texts)} 个文本区域")
-        return detected_texts
+        else:
+            print(f"检测到 {len(result)} 个文本区域")
+        return result
+        
+    def detect(self, image_path):
+        """
+        检测图片中的文字
+        
+        Args:
+            image_path: 图片路径
+            
+        Returns:
+            检测结果列表，每项包含位置(box)、文本(text)、置信度(confidence)和中心点(center)
+        """
+        result = self.detect_result(image_path)
+        return None if result is None else result.to_dicts()
         
     def visualize(self, image_path, detected_texts, output_path=None):
         """
@@ -83,6 +102,11 @@ class OCRDetector:
             print("没有检测结果可视化")
             return
             
+        # 延迟导入matplotlib，只在需要matplotlib可视化时加载
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as patches
+        from matplotlib.font_manager import FontProperties
+            
         # 读取图片
         image = cv2.imread(image_path)
         image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
@@ -146,7 +170,8 @@ class OCRDetector:
             print(f"无法读取图片: {image_path}")
             return
             
-        # 在图片上绘制检测结果
+        # 先绘制所有检测框和中心点
+        labels = []
         for i, item in enumerate(detected_texts):
             box = item['box']
             text = item['text']
@@ -164,17 +189,17 @@ class OCRDetector:
             # 绘制中心点
             cv2.circle(image, center, 5, (255, 0, 0), -1)
             
-            # 添加文字标签
-            label = f"{i+1}: {text} ({confidence:.2f})"
-            image = draw_text_with_box(
-                image, 
-                label, 
-                (center[0] + 10, center[1]), 
-                text_color=(0, 0, 255),
-                bg_color=(255, 255, 255),
-                text_size=20,
-                alpha=0.7
-            )
+            labels.append((f"{i+1}: {text} ({confidence:.2f})", (center[0] + 10, center[1])))
+            
+        # 再一次性绘制所有文字标签
+        image = draw_labels(
+            image,
+            labels,
+            text_color=(0, 0, 255),
+            bg_color=(255, 255, 255),
+            text_size=20,
+            alpha=0.7
+        )
         
         # 添加标题
         image = put_chinese_text(
@@ -196,6 +221,160 @@ class OCRDetector:
             
         return image
         
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# 批量模式下每个工作进程各自持有的检测器
+_worker_detector = None
+
+
+def collect_images(sources):
+    """
+    展开图片文件、目录和通配符
+    
+    Args:
+        sources: 路径列表
+        
+    Returns:
+        去重排序后的图片路径列表
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(os.path.join(source, name) for name in os.listdir(source))
+        elif os.path.isfile(source):
+            paths.append(source)
+        else:
+            paths.extend(glob.glob(source, recursive=True))
+    return sorted(set(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS)))
+
+
+def visual_name(image_path, base_dir):
+    """
+    可视化图片的文件名，由相对于 base_dir 的路径生成，不同子目录中的同名图片不会互相覆盖
+    例如：'shots/a/1.png', base_dir='shots' -> 'a__1_visual_opencv.png'
+    """
+    relative = os.path.splitext(os.path.relpath(os.path.abspath(image_path), base_dir))[0]
+    relative = relative.replace(os.sep, '__').replace('/', '__')
+    return f"{relative}_visual_opencv.png"
+
+
+def load_done_images(jsonl_path):
+    """读取已有的JSONL结果，返回已成功处理的图片绝对路径集合，用于断点续跑"""
+    done = set()
+    if not os.path.exists(jsonl_path):
+        return done
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 上次中断时可能留下不完整的最后一行
+                continue
+            if record.get('error') is None and record.get('image'):
+                done.add(os.path.abspath(record['image']))
+    return done
+
+
+def _init_worker(use_gpu, lang, server, profile, use_shm=False):
+    global _worker_detector
+    _worker_detector = OCRDetector(use_gpu=use_gpu, lang=lang, server=server, profile=profile, use_shm=use_shm)
+
+
+def _detect_worker(image_path, visual_path=None):
+    """工作进程中检测一张图片，返回可写入JSONL的记录"""
+    try:
+        result = _worker_detector.detect_result(image_path)
+        if result is None:
+            return {'image': image_path, 'error': '图片不存在', 'texts': []}
+        detected_texts = result.to_dicts()
+        if visual_path and detected_texts:
+            _worker_detector.visualize_opencv(image_path, detected_texts, visual_path)
+        return {'image': image_path, 'error': None, 'texts': detected_texts}
+    except Exception as e:
+        return {'image': image_path, 'error': str(e), 'texts': []}
+
+
+def run_batch(sources, output_dir, workers=2, use_gpu=True, lang='ch', server=None, visual=False, resume=True,
+              profile=DEFAULT_PROFILE, use_shm=False, max_attempts=2):
+    """
+    批量检测图片，按完成顺序把结果逐行写入 output_dir/results.jsonl
+    
+    Args:
+        sources: 图片文件、目录或通配符列表
+        output_dir: 输出目录
+        workers: 工作进程数，每个进程各自加载OCR模型
+        visual: 是否保存OpenCV可视化图片，文件名由图片的相对路径生成
+        resume: 是否跳过JSONL中已有结果（需要可视化时还要求可视化图片存在）的图片
+        profile: OCR配置档
+        use_shm: 是否通过共享内存向OCR服务传递画面
+        max_attempts: 工作进程崩溃时，未完成的图片最多尝试的次数
+        
+    Returns:
+        (成功数, 失败数)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jsonl_path = os.path.join(output_dir, 'results.jsonl')
+    images = collect_images(sources)
+    if not images:
+        print("没有需要处理的图片")
+        return 0, 0
+    base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in images])
+    visual_paths = {p: os.path.join(output_dir, visual_name(p, base_dir)) if visual else None for p in images}
+    if resume:
+        done = load_done_images(jsonl_path)
+        skipped = len(images)
+        images = [p for p in images if os.path.abspath(p) not in done
+                  or (visual_paths[p] and not os.path.exists(visual_paths[p]))]
+        skipped -= len(images)
+        if skipped:
+            print(f"跳过已有结果的图片 {skipped} 张")
+    if not images:
+        print("没有需要处理的图片")
+        return 0, 0
+        
+    succeeded = failed = 0
+    total = len(images)
+    print(f"开始批量检测 {total} 张图片，工作进程数: {workers}")
+    with open(jsonl_path, 'a', encoding='utf-8') as out:
+        def write(record):
+            nonlocal succeeded, failed
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            # 每行立即落盘，中断后可以从断点继续
+            out.flush()
+            if record['error'] is None:
+                succeeded += 1
+            else:
+                failed += 1
+                print(f"处理失败: {record['image']} ({record['error']})")
+            print(f"进度: {succeeded + failed}/{total}")
+            
+        pending = images
+        for attempt in range(1, max_attempts + 1):
+            # 某个工作进程崩溃时整个进程池失效，未完成的图片在新的进程池中重试
+            crashed = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(use_gpu, lang, server, profile, use_shm)) as pool:
+                futures = {pool.submit(_detect_worker, path, visual_paths[path]): path for path in pending}
+                for future in as_completed(futures):
+                    try:
+                        record = future.result()
+                    except BrokenProcessPool:
+                        crashed.append(futures[future])
+                        continue
+                    write(record)
+            if not crashed:
+                break
+            print(f"工作进程异常退出，{len(crashed)} 张图片未完成"
+                  + (f"，第 {attempt + 1} 次尝试" if attempt < max_attempts else ""))
+            pending = sorted(crashed)
+        else:
+            for path in pending:
+                write({'image': path, 'error': '工作进程异常退出', 'texts': []})
+            
+    print(f"批量检测完成: 成功 {succeeded}，失败 {failed}，结果: {jsonl_path}")
+    return succeeded, failed
+
+
 def main():
     # 参数解析
     parser = argparse.ArgumentParser(description='OCR检测工具')
@@ -203,13 +382,27 @@ def main():
     parser.add_argument('--output_dir', type=str, default='ocr_results', help='结果输出目录')
     parser.add_argument('--no_gpu', action='store_true', help='不使用GPU')
     parser.add_argument('--lang', type=str, default='ch', help='语言: ch(中文)或en(英文)')
+    parser.add_argument('--server', type=str, default=None, help="常驻OCR服务地址，如 'unix:/tmp/autoclick_ocr.sock'")
+    parser.add_argument('--ocr_shm', action='store_true', help='通过共享内存向OCR服务传递画面（服务需在本机）')
     parser.add_argument('--no_visual', action='store_true', help='不显示可视化结果')
+    parser.add_argument('--profile', type=str, default=DEFAULT_PROFILE, choices=list(OCR_PROFILES), help='OCR配置档')
+    parser.add_argument('--input', type=str, nargs='+', default=None, help='批量模式: 图片目录或通配符，结果写入JSONL')
+    parser.add_argument('--workers', type=int, default=2, help='批量模式的工作进程数')
+    parser.add_argument('--visual', action='store_true', help='批量模式下保存可视化图片')
+    parser.add_argument('--no_resume', action='store_true', help='批量模式下不跳过已有结果的图片')
     
     args = parser.parse_args()
     
-    # 创建OCR检测器
     use_gpu = not args.no_gpu
-    detector = OCRDetector(use_gpu=use_gpu, lang=args.lang)
+    if args.input:
+        run_batch(args.input, args.output_dir, workers=args.workers, use_gpu=use_gpu, lang=args.lang,
+                  server=args.server, visual=args.visual, resume=not args.no_resume, profile=args.profile,
+                  use_shm=args.ocr_shm)
+        return
+        
+    # 创建OCR检测器
+    detector = OCRDetector(use_gpu=use_gpu, lang=args.lang, server=args.server, profile=args.profile,
+                           use_shm=args.ocr_shm)
     
     # 检测图像
     image_path = args.image_path
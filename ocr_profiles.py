@@ -0,0 +1,106 @@
+import os
+
+# OCR配置档
+#   fast      不使用方向分类器，检测图缩小到640，CPU下启用MKL-DNN，适合无GPU的机器
+#   balanced  不使用方向分类器，检测图960，CPU下启用MKL-DNN
+#   accurate  使用方向分类器，与原来的默认设置相同
+OCR_PROFILES = {
+    'fast': {
+        'use_angle_cls': False,      # 是否加载方向分类器，同时决定识别时是否传 cls=True
+        'det_limit_side_len': 640,   # 检测图的最长边
+        'det_db_thresh': 0.3,
+        'det_db_box_thresh': 0.6,    # 提高文字框阈值，减少弱小文字框的识别开销
+        'rec_batch_num': 16,         # 识别批大小
+        'enable_mkldnn': True,       # 仅在CPU下生效
+        'cpu_threads': None,         # None 表示使用全部CPU核
+    },
+    'balanced': {
+        'use_angle_cls': False,
+        'det_limit_side_len': 960,
+        'det_db_thresh': 0.3,
+        'det_db_box_thresh': 0.5,
+        'rec_batch_num': 8,
+        'enable_mkldnn': True,
+        'cpu_threads': None,
+    },
+    'accurate': {
+        'use_angle_cls': True,
+        'det_limit_side_len': 960,
+        'det_db_thresh': 0.3,
+        'det_db_box_thresh': 0.5,
+        'rec_batch_num': 6,
+        'enable_mkldnn': False,
+        'cpu_threads': 10,
+    },
+}
+
+# 默认配置档，保持与原来的识别效果一致
+DEFAULT_PROFILE = 'accurate'
+
+_gpu_available = None
+
+
+def get_profile(name=None):
+    """
+    获取配置档
+
+    Args:
+        name: 配置档名称，为None时使用默认配置档
+
+    Returns:
+        配置字典（副本）
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in OCR_PROFILES:
+        raise ValueError(f"未知的OCR配置档: {name}，可选: {', '.join(OCR_PROFILES)}")
+    return dict(OCR_PROFILES[name])
+
+
+def use_cls(name=None):
+    """识别时是否使用方向分类器"""
+    return get_profile(name)['use_angle_cls']
+
+
+def gpu_available():
+    """paddle 是否编译了CUDA且有可用的GPU，结果只检测一次"""
+    global _gpu_available
+    if _gpu_available is None:
+        try:
+            import paddle
+            _gpu_available = bool(paddle.device.is_compiled_with_cuda() and
+                                  paddle.device.cuda.device_count() > 0)
+        except Exception:
+            _gpu_available = False
+    return _gpu_available
+
+
+def engine_options(name=None, use_gpu=True, lang='ch'):
+    """
+    生成创建PaddleOCR所需的参数
+
+    Args:
+        name: 配置档名称
+        use_gpu: 是否希望使用GPU，没有可用GPU时自动改用CPU
+        lang: 语言
+
+    Returns:
+        传给 PaddleOCR(...) 的参数字典
+    """
+    profile = get_profile(name)
+    if use_gpu and not gpu_available():
+        print("未检测到可用的GPU，OCR改用CPU")
+        use_gpu = False
+    options = {
+        'use_angle_cls': profile['use_angle_cls'],
+        'lang': lang,
+        'use_gpu': use_gpu,
+        'show_log': False,
+        'det_limit_side_len': profile['det_limit_side_len'],
+        'det_db_thresh': profile['det_db_thresh'],
+        'det_db_box_thresh': profile['det_db_box_thresh'],
+        'rec_batch_num': profile['rec_batch_num'],
+    }
+    if not use_gpu:
+        options['enable_mkldnn'] = profile['enable_mkldnn']
+        options['cpu_threads'] = profile['cpu_threads'] or os.cpu_count() or 4
+    return options
@@ -0,0 +1,170 @@
+import numpy as np
+
+
+class OCRResult:
+    """
+    OCR识别结果
+
+    文字框以 (N, 4, 2) 的 float32 数组保存，置信度为并列的数组，文字为字符串列表。
+    中心点、外接矩形、面积等几何量用NumPy向量化计算，避免每行结果创建大量Python对象。
+
+    迭代时逐行返回 (文字框坐标, 文字, 置信度)，与原来的列表结果兼容；
+    需要字典形式时使用 to_dicts()。
+    """
+
+    __slots__ = ('boxes', 'texts', 'confidences', '_centers', '_rects')
+
+    def __init__(self, boxes=None, texts=None, confidences=None):
+        """
+        Args:
+            boxes: 文字框坐标，可转换为 (N, 4, 2) 数组
+            texts: 文字列表
+            confidences: 置信度
+        """
+        texts = list(texts or [])
+        if boxes is None or len(texts) == 0:
+            boxes = np.zeros((0, 4, 2), dtype=np.float32)
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+        self.texts = texts
+        if confidences is None:
+            confidences = np.ones(len(texts), dtype=np.float32)
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        if not (len(self.boxes) == len(self.texts) == len(self.confidences)):
+            raise ValueError(f"文字框、文字和置信度数量不一致: "
+                             f"{len(self.boxes)}, {len(self.texts)}, {len(self.confidences)}")
+        self._centers = None
+        self._rects = None
+
+    @classmethod
+    def from_paddle(cls, result):
+        """
+        从PaddleOCR的返回值创建
+
+        Args:
+            result: PaddleOCR.ocr 的结果 [[[box, (text, confidence)], ...], ...]
+        """
+        boxes, texts, confidences = [], [], []
+        for line in result or []:
+            # 没有文字的图片，PaddleOCR返回 [None]
+            for item in line or []:
+                boxes.append(item[0])
+                texts.append(item[1][0])
+                confidences.append(item[1][1])
+        return cls(boxes, texts, confidences)
+
+    @classmethod
+    def from_lines(cls, lines):
+        """从 [(文字框坐标, 文字, 置信度), ...] 创建"""
+        lines = list(lines)
+        return cls([line[0] for line in lines], [line[1] for line in lines], [line[2] for line in lines])
+
+    @classmethod
+    def concat(cls, results):
+        """合并多个识别结果"""
+        results = [result for result in results if len(result)]
+        if not results:
+            return cls()
+        if len(results) == 1:
+            return results[0]
+        texts = []
+        for result in results:
+            texts.extend(result.texts)
+        return cls(np.concatenate([result.boxes for result in results]), texts,
+                   np.concatenate([result.confidences for result in results]))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        for box, text, confidence in zip(self.boxes, self.texts, self.confidences):
+            yield box, text, float(confidence)
+
+    def __getitem__(self, index):
+        """
+        整数下标返回单行 (文字框坐标, 文字, 置信度)；
+        切片、布尔掩码或下标数组返回新的 OCRResult
+        """
+        if isinstance(index, (int, np.integer)):
+            return self.boxes[index], self.texts[index], float(self.confidences[index])
+        indices = np.arange(len(self))[index]
+        return OCRResult(self.boxes[indices], [self.texts[i] for i in indices], self.confidences[indices])
+
+    def __repr__(self):
+        return f"OCRResult({len(self)} lines)"
+
+    @property
+    def centers(self):
+        """文字框中心点 (N, 2) int32，与原来逐点求和再取整的结果相同"""
+        if self._centers is None:
+            self._centers = self.boxes.mean(axis=1).astype(np.int32)
+        return self._centers
+
+    @property
+    def rects(self):
+        """文字框外接矩形 (N, 4) int32，每行为 (x1, y1, x2, y2)"""
+        if self._rects is None:
+            mins = np.floor(self.boxes.min(axis=1))
+            maxs = np.ceil(self.boxes.max(axis=1))
+            self._rects = np.concatenate([mins, maxs], axis=1).astype(np.int32)
+        return self._rects
+
+    @property
+    def areas(self):
+        """文字框（四边形）面积 (N,)"""
+        x = self.boxes[:, :, 0]
+        y = self.boxes[:, :, 1]
+        return 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - y * np.roll(x, -1, axis=1), axis=1))
+
+    def filter(self, min_confidence=None, min_area=None):
+        """
+        按置信度和面积过滤
+
+        Args:
+            min_confidence: 最低置信度
+            min_area: 文字框最小面积（像素）
+
+        Returns:
+            过滤后的 OCRResult
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if min_confidence is not None:
+            mask &= self.confidences >= min_confidence
+        if min_area is not None:
+            mask &= self.areas >= min_area
+        return self if mask.all() else self[mask]
+
+    def intersecting(self, rect):
+        """与矩形 (x1, y1, x2, y2) 相交的文字框掩码"""
+        rects = self.rects
+        return ((rects[:, 0] < rect[2]) & (rect[0] < rects[:, 2]) &
+                (rects[:, 1] < rect[3]) & (rect[1] < rects[:, 3]))
+
+    def offset(self, dx, dy):
+        """平移所有文字框，返回新的 OCRResult（如把ROI内的坐标映射回整幅画面）"""
+        if not dx and not dy:
+            return self
+        return OCRResult(self.boxes + np.array([dx, dy], dtype=np.float32), self.texts, self.confidences)
+
+    def sorted(self):
+        """按从上到下、从左到右排序"""
+        if len(self) < 2:
+            return self
+        rects = self.rects
+        return self[np.lexsort((rects[:, 0], rects[:, 1]))]
+
+    def to_dicts(self):
+        """
+        转换为字典列表，与 OCRDetector.detect 原来的返回格式相同
+
+        Returns:
+            [{'box', 'text', 'confidence', 'center'}, ...]
+        """
+        boxes = self.boxes.tolist()
+        confidences = self.confidences.tolist()
+        centers = self.centers.tolist()
+        return [{
+            'box': boxes[i],
+            'text': self.texts[i],
+            'confidence': confidences[i],
+            'center': tuple(centers[i])
+        } for i in range(len(self))]
@@ -0,0 +1,384 @@
+import os
+import json
+import time
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+import numpy as np
+from ocr_profiles import DEFAULT_PROFILE, OCR_PROFILES, engine_options, get_profile, use_cls
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = resource_tracker = None
+
+# 默认地址：支持Unix套接字的系统使用Unix套接字，否则使用本机回环TCP
+DEFAULT_ADDRESS = 'unix:/tmp/autoclick_ocr.sock' if hasattr(socket, 'AF_UNIX') else 'tcp:127.0.0.1:8765'
+
+_HEADER = struct.Struct('>I')
+
+
+def parse_address(address):
+    """
+    解析服务地址
+    例如：'unix:/tmp/ocr.sock'   -> (AF_UNIX, '/tmp/ocr.sock')
+         'tcp:127.0.0.1:8765'  -> (AF_INET, ('127.0.0.1', 8765))
+    """
+    kind, _, rest = address.partition(':')
+    if kind == 'unix':
+        return socket.AF_UNIX, rest
+    if kind == 'tcp':
+        host, _, port = rest.rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"无效的OCR服务地址: {address}")
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("连接已关闭")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock, header, payload=b''):
+    """发送一条消息：4字节头长度 + JSON头 + 原始数据"""
+    header = dict(header, size=len(payload))
+    data = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_message(sock):
+    """接收一条消息，返回 (头, 原始数据)"""
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, length).decode('utf-8'))
+    size = header.get('size', 0)
+    payload = _recv_exact(sock, size) if size else b''
+    return header, payload
+
+
+def _attach_shared_memory(name):
+    """打开客户端创建的共享内存，并避免本进程退出时将其删除"""
+    shm = shared_memory.SharedMemory(name=name)
+    if resource_tracker is not None and os.name != 'nt':
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+    return shm
+
+
+def _serialize_result(result):
+    """将PaddleOCR结果转换为可JSON序列化的结构，保持 [[box, [text, conf]], ...] 的格式"""
+    serialized = []
+    for line in result or []:
+        items = []
+        for item in line or []:
+            box = [[float(p[0]), float(p[1])] for p in item[0]]
+            items.append([box, [str(item[1][0]), float(item[1][1])]])
+        serialized.append(items)
+    return serialized
+
+
+class OCRServer:
+    """
+    常驻OCR服务
+
+    启动时加载并预热模型，之后通过本机套接字处理识别请求，画面以原始像素
+    数据或共享内存传递，不经过图片编码。多个客户端可同时连接，识别请求串行执行。
+    请求可以指定其他OCR配置档，对应的模型在首次请求时加载。
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, ocr=None, profile=None, **ocr_options):
+        """
+        Args:
+            address: 服务地址，'unix:路径' 或 'tcp:主机:端口'
+            ocr: 已创建的OCR引擎，为 None 时使用 ocr_options 创建PaddleOCR
+            profile: OCR配置档（见 ocr_profiles），为None时使用默认配置档
+            ocr_options: 传给PaddleOCR的参数，覆盖配置档中的设置
+        """
+        self.address = address
+        self.profile = profile or DEFAULT_PROFILE
+        self.ocr = ocr
+        self.ocr_options = ocr_options
+        # 请求指定的其他配置档的引擎，首次请求时创建
+        self._profile_engines = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self._server = None
+
+    def _create(self, profile, overrides=True):
+        from paddleocr import PaddleOCR
+        options = engine_options(profile, use_gpu=self.ocr_options.get('use_gpu', True),
+                                 lang=self.ocr_options.get('lang', 'ch'))
+        # use_gpu 已按GPU是否可用处理，其他参数覆盖默认配置档中的设置
+        if overrides:
+            options.update((k, v) for k, v in self.ocr_options.items() if k not in ('use_gpu', 'lang'))
+        start_time = time.perf_counter()
+        ocr = PaddleOCR(**options)
+        print(f"OCR模型({profile})加载耗时: {time.perf_counter() - start_time:.2f}秒")
+        return ocr
+
+    def _load(self):
+        if self.ocr is None:
+            self.ocr = self._create(self.profile)
+        # 预热，消除首次识别的额外开销
+        self.ocr.ocr(np.full((32, 128, 3), 255, dtype=np.uint8), cls=use_cls(self.profile))
+
+    def engine_for(self, profile=None):
+        """获取配置档对应的引擎，需在 self._lock 内调用"""
+        if not profile or profile == self.profile:
+            return self.ocr
+        engine = self._profile_engines.get(profile)
+        if engine is None:
+            get_profile(profile)
+            engine = self._profile_engines[profile] = self._create(profile, overrides=False)
+        return engine
+
+    def handle(self, header, payload):
+        """处理一条请求，返回响应头"""
+        op = header.get('op')
+        if op == 'ping':
+            return {'ok': True}
+        if op != 'ocr':
+            return {'ok': False, 'error': f"未知的请求: {op}"}
+
+        shape = tuple(header['shape'])
+        dtype = np.dtype(header.get('dtype', 'uint8'))
+        shm = None
+        image = None
+        try:
+            if header.get('shm'):
+                shm = _attach_shared_memory(header['shm'])
+                image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            else:
+                image = np.frombuffer(payload, dtype=dtype).reshape(shape)
+            profile = header.get('profile') or self.profile
+            with self._lock:
+                result = self.engine_for(profile).ocr(image, cls=header.get('cls', use_cls(profile)))
+                self.requests += 1
+            return {'ok': True, 'result': _serialize_result(result)}
+        finally:
+            if shm is not None:
+                # 先释放对共享内存的引用才能关闭
+                image = None
+                shm.close()
+
+    def serve_forever(self):
+        """
+        加载模型并开始处理请求
+
+        Unix套接字文件已存在时先尝试连接：有服务应答则拒绝启动，
+        没有应答说明是上次异常退出留下的文件，删除后启动。
+        """
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            if server_running(self.address):
+                raise RuntimeError(f"OCR服务已在运行: {self.address}")
+            os.remove(address)
+        self._load()
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        header, payload = recv_message(self.request)
+                    except (ConnectionError, OSError):
+                        return
+                    try:
+                        response = server.handle(header, payload)
+                    except Exception as e:
+                        response = {'ok': False, 'error': str(e)}
+                    send_message(self.request, response)
+
+        if family == socket.AF_UNIX:
+            class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+                daemon_threads = True
+        else:
+            class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+                daemon_threads = True
+                allow_reuse_address = True
+
+        self._server = Server(address, Handler)
+        print(f"OCR服务已启动: {self.address}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if family == socket.AF_UNIX and os.path.exists(address):
+                os.remove(address)
+
+    def shutdown(self):
+        """停止服务"""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class OCRClient:
+    """
+    OCR服务客户端
+
+    提供与PaddleOCR相同的 ocr(image, cls) 接口，可直接替换进程内的OCR引擎；
+    额外的 profile 参数指定服务端使用的OCR配置档。
+    """
+
+    # ocr() 接受 profile 参数，一个客户端即可使用所有配置档
+    supports_profiles = True
+
+    def __init__(self, address=DEFAULT_ADDRESS, use_shm=False, timeout=30.0):
+        """
+        Args:
+            address: 服务地址
+            use_shm: 是否通过共享内存传递画面（需要服务与客户端在同一台机器）
+            timeout: 单次请求超时（秒）
+        """
+        self.address = address
+        self.use_shm = use_shm and shared_memory is not None
+        self.timeout = timeout
+        self._sock = None
+        self._shm = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """连接服务并确认可用，失败时抛出异常"""
+        with self._lock:
+            self._connect()
+            send_message(self._sock, {'op': 'ping'})
+            header, _ = recv_message(self._sock)
+            if not header.get('ok'):
+                raise ConnectionError(header.get('error', 'OCR服务不可用'))
+        return self
+
+    def _connect(self):
+        if self._sock is not None:
+            return
+        family, address = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(address)
+        self._sock = sock
+
+    def close(self):
+        """断开连接并释放共享内存"""
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+    def _shared_buffer(self, size):
+        """获取至少 size 字节的共享内存，复用已有的段"""
+        if self._shm is None or self._shm.size < size:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        return self._shm
+
+    def ocr(self, image, cls=True, profile=None):
+        """
+        识别图像中的文字
+
+        Args:
+            image: OpenCV格式的图片或图片路径
+            cls: 是否使用方向分类器
+            profile: OCR配置档，为None时使用服务端的默认配置档
+
+        Returns:
+            与 PaddleOCR.ocr 相同结构的结果
+        """
+        if isinstance(image, str):
+            from cv_utils import imread_cn
+            image = imread_cn(image)
+            if image is None:
+                return [None]
+        image = np.ascontiguousarray(image)
+        header = {'op': 'ocr', 'shape': list(image.shape), 'dtype': str(image.dtype), 'cls': cls}
+        if profile:
+            header['profile'] = profile
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._connect()
+                    if self.use_shm:
+                        shm = self._shared_buffer(image.nbytes)
+                        np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+                        send_message(self._sock, dict(header, shm=shm.name))
+                    else:
+                        send_message(self._sock, header, image.data.cast('B'))
+                    response, _ = recv_message(self._sock)
+                    break
+                except (ConnectionError, OSError):
+                    # 连接断开时重连一次
+                    if self._sock is not None:
+                        self._sock.close()
+                        self._sock = None
+                    if attempt:
+                        raise
+        if not response.get('ok'):
+            raise RuntimeError(f"OCR服务出错: {response.get('error')}")
+        return response['result']
+
+
+def server_running(address, timeout=2.0):
+    """地址上是否有应答的OCR服务"""
+    client = OCRClient(address, timeout=timeout)
+    try:
+        client.connect()
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+def connect_or_none(address, use_shm=False):
+    """
+    尝试连接OCR服务
+
+    Returns:
+        已连接的 OCRClient，服务不可用时返回 None
+    """
+    if not address:
+        return None
+    try:
+        client = OCRClient(address, use_shm=use_shm).connect()
+        print(f"已连接OCR服务: {address}")
+        return client
+    except Exception as e:
+        print(f"无法连接OCR服务 {address}: {str(e)}，使用进程内OCR")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常驻OCR服务')
+    parser.add_argument('--address', type=str, default=DEFAULT_ADDRESS, help="服务地址，'unix:路径' 或 'tcp:主机:端口'")
+    parser.add_argument('--no_gpu', action='store_true', help='不使用GPU')
+    parser.add_argument('--lang', type=str, default='ch', help='语言: ch(中文)或en(英文)')
+    parser.add_argument('--profile', type=str, default=DEFAULT_PROFILE, choices=list(OCR_PROFILES), help='OCR配置档')
+    args = parser.parse_args()
+
+    server = OCRServer(args.address, profile=args.profile, use_gpu=not args.no_gpu, lang=args.lang)
+    try:
+        server.serve_forever()
+    except RuntimeError as e:
+        print(str(e))
+    except KeyboardInterrupt:
+        print("OCR服务已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import queue
+import threading
+import time
+
+from auto_clicker import AutoClicker
+from debug_artifacts import DebugArtifactWriter
+from image_recognition import create_ocr_engine
+from ocr_server import OCRClient
+from ocr_profiles import DEFAULT_PROFILE, OCR_PROFILES
+
+
+class OCREnginePool:
+    """
+    OCR引擎池
+
+    对外提供与PaddleOCR相同的 ocr(image, cls) 接口，可以直接作为共享引擎传给
+    ImageRecognition；每次调用时借出一个空闲引擎，用完归还。引擎在首次需要时才创建。
+    额外的 profile 参数选择OCR配置档，每个配置档有各自的引擎，互不混用。
+    """
+
+    # ocr() 接受 profile 参数，步骤可以指定与默认不同的配置档
+    supports_profiles = True
+
+    def __init__(self, size=1, factory=create_ocr_engine, profile=DEFAULT_PROFILE, **factory_options):
+        """
+        Args:
+            size: 每个配置档的引擎数量（GPU显存有限时通常为1~2）
+            factory: 引擎创建函数，以 profile=配置档 调用
+            profile: 默认配置档
+            factory_options: 传给创建函数的其他参数（如 ocr_server）
+        """
+        self.size = max(1, size)
+        self.profile = profile
+        self._factory = factory
+        self._factory_options = factory_options
+        # {配置档: 空闲引擎队列}、{配置档: 已创建数量}
+        self._idle = {}
+        self._created = {}
+        self._lock = threading.Lock()
+        # 等待空闲引擎的累计时间（秒）和调用次数
+        self.wait_time = 0.0
+        self.calls = 0
+
+    def _acquire(self, profile):
+        with self._lock:
+            idle = self._idle.get(profile)
+            if idle is None:
+                idle = self._idle[profile] = queue.Queue()
+                self._created[profile] = 0
+        try:
+            return idle.get_nowait()
+        except queue.Empty:
+            pass
+        while True:
+            with self._lock:
+                if self._created[profile] < self.size:
+                    self._created[profile] += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                return self._create(profile)
+            # 引擎创建失败时名额会被释放，定期醒来检查，避免一直等待不会归还的引擎
+            try:
+                return idle.get(timeout=0.5)
+            except queue.Empty:
+                pass
+
+    def _create(self, profile):
+        """创建引擎，占用的名额由调用方预先计入，失败时释放"""
+        try:
+            return self._factory(profile=profile, **self._factory_options)
+        except Exception:
+            with self._lock:
+                self._created[profile] -= 1
+            raise
+
+    def ocr(self, image, cls=True, profile=None):
+        profile = profile or self.profile
+        start_time = time.perf_counter()
+        engine = self._acquire(profile)
+        with self._lock:
+            self.wait_time += time.perf_counter() - start_time
+            self.calls += 1
+        try:
+            result = self._run(engine, image, cls, profile)
+        except (ConnectionError, OSError) as e:
+            if not isinstance(engine, OCRClient):
+                self._idle[profile].put(engine)
+                raise
+            # OCR服务断开：换成进程内引擎，之后创建的引擎也不再连接服务；
+            # 已关闭的客户端不再放回空闲队列，进程内引擎创建失败时释放名额
+            print(f"OCR服务连接失败: {str(e)}，改用进程内OCR")
+            engine.close()
+            with self._lock:
+                self._factory_options = dict(self._factory_options, ocr_server=None)
+            engine = self._create(profile)
+            try:
+                return self._run(engine, image, cls, profile)
+            finally:
+                self._idle[profile].put(engine)
+        except Exception:
+            self._idle[profile].put(engine)
+            raise
+        self._idle[profile].put(engine)
+        return result
+
+    @staticmethod
+    def _run(engine, image, cls, profile):
+        # 引擎按配置档创建；OCR服务客户端需要在请求中指明配置档
+        if getattr(engine, 'supports_profiles', False):
+            return engine.ocr(image, cls=cls, profile=profile)
+        return engine.ocr(image, cls=cls)
+
+
+class InputArbiter:
+    """
+    输入仲裁器
+
+    鼠标和前台窗口是全局资源，“置前台+移动+点击”必须作为一个整体执行。
+    以上下文管理器的方式使用，并统计等待和占用时间。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired_at = None
+        self.wait_time = 0.0
+        self.hold_time = 0.0
+        self.acquisitions = 0
+
+    def __enter__(self):
+        start_time = time.perf_counter()
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        self.wait_time += self._acquired_at - start_time
+        self.acquisitions += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.hold_time += time.perf_counter() - self._acquired_at
+        self._lock.release()
+        return False
+
+
+def overlapping_windows(rects):
+    """
+    找出互相重叠的窗口
+
+    Args:
+        rects: {窗口标题: (left, top, width, height)}
+
+    Returns:
+        [(标题1, 标题2), ...]
+    """
+    items = list(rects.items())
+    overlaps = []
+    for i, (title_a, (ax, ay, aw, ah)) in enumerate(items):
+        for title_b, (bx, by, bw, bh) in items[i + 1:]:
+            if ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah:
+                overlaps.append((title_a, title_b))
+    return overlaps
+
+
+class Orchestrator:
+    """
+    按窗口并发运行多个点击序列
+
+    截图与识别在各窗口的线程中并发进行，OCR引擎由引擎池共享，鼠标输入由仲裁器串行化。
+    注意: 截图使用屏幕抓取，各窗口需要平铺排列、互不遮挡；
+    运行前检查窗口位置，有重叠时拒绝运行（allow_overlap=True 时只给出警告）。
+    """
+
+    def __init__(self, jobs, ocr_pool_size=1, ocr_server=None, repeat=1, ocr_profile=DEFAULT_PROFILE,
+                 ocr_use_shm=False, allow_overlap=False, **clicker_options):
+        """
+        Args:
+            jobs: [(配置文件, 窗口标题), ...]，窗口标题为None时使用配置文件中的设置
+            ocr_pool_size: 共享OCR引擎数量
+            ocr_server: 常驻OCR服务地址
+            repeat: 每个窗口重复运行序列的次数
+            ocr_profile: 默认OCR配置档，步骤指定的其他配置档由引擎池另行创建引擎
+            ocr_use_shm: 连接OCR服务时是否通过共享内存传递画面
+            allow_overlap: 窗口重叠时是否仍然运行
+            clicker_options: 传给 AutoClicker 的其他参数
+        """
+        self.jobs = list(jobs)
+        self.repeat = repeat
+        self.allow_overlap = allow_overlap
+        self.ocr_pool = OCREnginePool(ocr_pool_size, ocr_server=ocr_server, profile=ocr_profile, use_shm=ocr_use_shm)
+        self.input_arbiter = InputArbiter()
+        self.clicker_options = dict(clicker_options, ocr_profile=ocr_profile)
+        self.results = []
+        self._results_lock = threading.Lock()
+
+    def _make_clicker(self, index, config_file, window_title):
+        return AutoClicker(
+            config_file,
+            window_title=window_title,
+            ocr_engine=self.ocr_pool,
+            input_arbiter=self.input_arbiter,
+            debug_dir=f"screenshots/window_{index}",
+            **self.clicker_options
+        )
+
+    def check_layout(self, clickers):
+        """
+        检查各窗口是否平铺、互不重叠
+
+        Args:
+            clickers: [(AutoClicker, 窗口标题), ...]
+
+        Returns:
+            bool: 是否可以运行
+        """
+        rects = {}
+        for clicker, title in clickers:
+            controller = clicker.window_controller
+            if controller.offline or not clicker.config:
+                continue
+            if controller.find_window(title):
+                rect = controller.get_window_rect()
+                if rect is not None:
+                    rects[title] = rect
+        overlaps = overlapping_windows(rects)
+        for title_a, title_b in overlaps:
+            print(f"窗口 '{title_a}' 与 '{title_b}' 重叠，屏幕截图会截到其他窗口的画面")
+        if overlaps and not self.allow_overlap:
+            print("请平铺排列窗口后重新运行（或指定 allow_overlap 忽略此检查）")
+            return False
+        return True
+
+    def _run_job(self, clicker, title):
+        for run_index in range(self.repeat):
+            start_time = time.perf_counter()
+            try:
+                completed = clicker.run()
+            except Exception as e:
+                print(f"窗口 '{title}' 第 {run_index + 1} 次运行出错: {str(e)}")
+                completed = False
+            with self._results_lock:
+                self.results.append({
+                    'window': title,
+                    'run': run_index + 1,
+                    'completed': bool(completed),
+                    'time': time.perf_counter() - start_time,
+                    'outcome': (clicker.last_run_stats or {}).get('outcome')
+                })
+            if not completed and (clicker.last_run_stats or {}).get('outcome') == 'window_lost':
+                print(f"窗口 '{title}' 已关闭，停止后续运行")
+                break
+
+    def run(self):
+        """
+        并发运行所有窗口的序列
+
+        Returns:
+            dict: 吞吐统计，窗口重叠而拒绝运行时返回None
+        """
+        clickers = []
+        for index, (config_file, window_title) in enumerate(self.jobs):
+            try:
+                clicker = self._make_clicker(index, config_file, window_title)
+            except Exception as e:
+                print(f"窗口 {index} 初始化失败: {str(e)}")
+                continue
+            title = clicker.config.get("window_title", "") if clicker.config else window_title
+            clickers.append((clicker, title))
+        if not self.check_layout(clickers):
+            return None
+
+        start_time = time.perf_counter()
+        threads = []
+        for index, (clicker, title) in enumerate(clickers):
+            thread = threading.Thread(target=self._run_job, args=(clicker, title),
+                                      name=f"orchestrator-window-{index}")
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - start_time
+        completed = sum(1 for r in self.results if r['completed'])
+        summary = {
+            'windows': len(self.jobs),
+            'runs': len(self.results),
+            'completed_runs': completed,
+            'elapsed': elapsed,
+            'runs_per_hour': completed * 3600.0 / elapsed if elapsed > 0 else 0.0,
+            'ocr_wait_time': self.ocr_pool.wait_time,
+            'ocr_calls': self.ocr_pool.calls,
+            'input_wait_time': self.input_arbiter.wait_time,
+            'input_hold_time': self.input_arbiter.hold_time,
+        }
+        print(f"共 {summary['windows']} 个窗口，完成 {completed}/{summary['runs']} 次运行，"
+              f"耗时 {elapsed:.1f}秒，吞吐 {summary['runs_per_hour']:.1f} 次/小时")
+        print(f"OCR调用 {summary['ocr_calls']} 次，等待引擎 {summary['ocr_wait_time']:.2f}秒；"
+              f"输入等待 {summary['input_wait_time']:.2f}秒，占用 {summary['input_hold_time']:.2f}秒")
+        return summary
+
+
+def parse_job(text):
+    """解析 '配置文件=窗口标题' 形式的任务，省略窗口标题时使用配置文件中的设置"""
+    config_file, sep, window_title = text.partition('=')
+    return config_file, (window_title if sep else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多窗口并发自动点击')
+    parser.add_argument('--job', action='append', required=True,
+                        help="任务，格式为 '配置文件=窗口标题'，可重复指定")
+    parser.add_argument('--ocr_pool', type=int, default=1, help='共享OCR引擎数量')
+    parser.add_argument('--ocr_server', type=str, default=None, help='常驻OCR服务地址')
+    parser.add_argument('--ocr_shm', action='store_true', help='通过共享内存向OCR服务传递画面（服务需在本机）')
+    parser.add_argument('--ocr_profile', type=str, default=DEFAULT_PROFILE, choices=list(OCR_PROFILES), help='OCR配置档')
+    parser.add_argument('--repeat', type=int, default=1, help='每个窗口重复运行的次数')
+    parser.add_argument('--gray_match', action='store_true', help='图标匹配使用灰度图（更快，但不区分颜色）')
+    parser.add_argument('--debug_mode', type=str, default='on_failure', choices=DebugArtifactWriter.MODES,
+                        help='调试截图保存方式')
+    parser.add_argument('--allow_overlap', action='store_true', help='窗口重叠时仍然运行（截图可能包含其他窗口）')
+    args = parser.parse_args()
+
+    orchestrator = Orchestrator([parse_job(job) for job in args.job], ocr_pool_size=args.ocr_pool,
+                                ocr_server=args.ocr_server, repeat=args.repeat, ocr_profile=args.ocr_profile,
+                                ocr_use_shm=args.ocr_shm,
+                                allow_overlap=args.allow_overlap, debug_mode=args.debug_mode,
+                                match_color=not args.gray_match)
+    orchestrator.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+import os
+import csv
+import json
+import pickle
+import hashlib
+from ocr_profiles import OCR_PROFILES
+
+# 编译结果格式版本，Step 字段变化时递增，使旧缓存失效
+PLAN_VERSION = 3
+
+# 必须存在的列
+REQUIRED_COLUMNS = ['type', 'target', 'click_type', 'delay', 'shift']
+
+# 命名搜索区域，按窗口宽高的比例表示 (x1, y1, x2, y2)
+NAMED_REGIONS = {
+    'full': (0.0, 0.0, 1.0, 1.0),
+    'top-bar': (0.0, 0.0, 1.0, 0.15),
+    'bottom-bar': (0.0, 0.85, 1.0, 1.0),
+    'top-half': (0.0, 0.0, 1.0, 0.5),
+    'bottom-half': (0.0, 0.5, 1.0, 1.0),
+    'left-half': (0.0, 0.0, 0.5, 1.0),
+    'right-half': (0.5, 0.0, 1.0, 1.0),
+    'center': (0.25, 0.25, 0.75, 0.75),
+}
+
+# 等待类步骤：wait_for 等待目标出现，wait_gone 等待目标消失
+WAIT_TYPES = ("wait_for", "wait_gone")
+
+
+def get_icon_path(icon_name):
+    """图标名对应的文件路径"""
+    return f"images/icons/{icon_name}.png"
+
+
+class Step:
+    """
+    编译后的单个步骤
+
+    偏移、固定坐标、图标路径、搜索区域等在编译时解析完毕，执行时直接使用。
+    同时支持 step["type"] / step.get("roi") 的字典式访问。
+    """
+
+    __slots__ = ('type', 'target', 'click_type', 'delay', 'shift', 'offset', 'point', 'icon_paths',
+                 'wait_kind', 'wait_value', 'roi', 'roi_spec', 'timeout', 'max_retries', 'backoff', 'on_fail',
+                 'fuzzy', 'profile')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def copy(self, **changes):
+        """复制步骤并修改部分字段"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return Step(**fields)
+
+    def probe(self):
+        """等待类步骤实际要识别的目标，作为 text / template 步骤"""
+        return compile_step({'type': self.wait_kind, 'target': self.wait_value, 'fuzzy': self.fuzzy,
+                             'profile': self.profile})
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name in self.__slots__:
+            setattr(self, name, state.get(name))
+
+    def __repr__(self):
+        return f"Step({self.type!r}, {self.target!r})"
+
+
+class StepPlan:
+    """编译后的步骤序列"""
+
+    def __init__(self, steps, window_title=None, source=None):
+        self.steps = steps
+        self.window_title = window_title
+        self.source = source
+
+    def __len__(self):
+        return len(self.steps)
+
+
+def parse_shift(shift_str):
+    """
+    解析偏移值，返回x和y的偏移量
+    例如：'L50' -> (-50, 0)  # 左移50像素
+         'R30' -> (30, 0)   # 右移30像素
+         'U20' -> (0, -20)  # 上移20像素
+         'D40' -> (0, 40)   # 下移40像素
+    """
+    if not shift_str or shift_str == '0':
+        return (0, 0)
+
+    try:
+        # 如果是纯数字，直接返回(0, 0)
+        if isinstance(shift_str, (int, float)) or shift_str.isdigit():
+            return (0, 0)
+
+        direction = shift_str[0].upper()
+        pixels = int(shift_str[1:])
+
+        if direction == 'L':
+            return (-pixels, 0)
+        elif direction == 'R':
+            return (pixels, 0)
+        elif direction == 'U':
+            return (0, -pixels)
+        elif direction == 'D':
+            return (0, pixels)
+    except (IndexError, ValueError, TypeError) as e:
+        print(f"无效的偏移值: {shift_str}, 错误: {str(e)}")
+    return (0, 0)
+
+
+def parse_roi(roi_str):
+    """
+    解析搜索区域
+    例如：'100:50:800:400' -> ('pixels', (100, 50, 800, 400))
+         'top-bar'        -> ('relative', NAMED_REGIONS['top-bar'])
+    无效或未设置时返回None，表示搜索整个窗口
+    """
+    if not roi_str:
+        return None
+
+    name = str(roi_str).strip().lower()
+    if name in NAMED_REGIONS:
+        return ('relative', NAMED_REGIONS[name])
+
+    try:
+        x1, y1, x2, y2 = map(int, name.split(":"))
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError("右下角坐标必须大于左上角坐标")
+        return ('pixels', (x1, y1, x2, y2))
+    except (ValueError, TypeError) as e:
+        print(f"无效的搜索区域: {roi_str}, 错误: {str(e)}，将搜索整个窗口")
+    return None
+
+
+def resolve_roi(roi_spec, window_width, window_height):
+    """
+    将解析后的搜索区域换算为窗口坐标下的 (x1, y1, x2, y2)
+
+    Args:
+        roi_spec: parse_roi 的返回值
+    """
+    if roi_spec is None:
+        return None
+    kind, values = roi_spec
+    if kind == 'relative':
+        fx1, fy1, fx2, fy2 = values
+        return (int(fx1 * window_width), int(fy1 * window_height),
+                int(fx2 * window_width), int(fy2 * window_height))
+    return values
+
+
+def parse_wait_target(target):
+    """
+    解析等待类步骤的目标
+    例如：'text:确定'     -> ('text', '确定')
+         'template:关闭' -> ('template', '关闭')
+         '关闭'          -> 图标文件存在时按图标处理，否则按文字处理
+    """
+    target = str(target)
+    kind, sep, value = target.partition(":")
+    if sep and kind in ("text", "template"):
+        return kind, value
+    if os.path.exists(get_icon_path(target)):
+        return "template", target
+    return "text", target
+
+
+def _wait_kind_stale(step):
+    """
+    未加前缀的等待目标按图标文件是否存在决定类型，
+    图标增删或工作目录变化后，缓存中的类型可能与现在不一致
+    """
+    if step.type not in WAIT_TYPES:
+        return False
+    kind, sep, _ = step.target.partition(":")
+    if sep and kind in ("text", "template"):
+        return False
+    return parse_wait_target(step.target)[0] != step.wait_kind
+
+
+def _is_blank(value):
+    """空单元格：None、空字符串或 NaN"""
+    if value is None:
+        return True
+    if isinstance(value, float) and value != value:
+        return True
+    return isinstance(value, str) and not value.strip()
+
+
+def _text(value):
+    """单元格值转换为文字，整数值的浮点数去掉小数部分"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _optional(row, key, convert):
+    value = row.get(key)
+    return None if _is_blank(value) else convert(value)
+
+
+def _profile(value):
+    name = _text(value)
+    if name not in OCR_PROFILES:
+        raise ValueError(f"未知的OCR配置档: {name}")
+    return name
+
+
+def compile_step(row):
+    """
+    将一行配置编译为 Step
+
+    Args:
+        row: {列名: 值}
+
+    Returns:
+        Step
+    """
+    step_type = _text(row['type'])
+    target = _text(row['target'])
+    shift = _text(row['shift']) if not _is_blank(row.get('shift')) else '0'
+    roi = _optional(row, 'roi', _text)
+
+    point = None
+    icon_paths = ()
+    wait_kind = wait_value = None
+    if step_type == 'fixed':
+        try:
+            x, y = map(int, target.split(":"))
+            point = (x, y)
+        except ValueError:
+            print(f"无效的固定坐标: {target}")
+    elif step_type == 'template':
+        icon_paths = (get_icon_path(target),)
+    elif step_type == 'template_all':
+        # 多个图标名用 '|' 分隔
+        icon_paths = tuple(get_icon_path(name.strip()) for name in target.split("|") if name.strip())
+    elif step_type in WAIT_TYPES:
+        wait_kind, wait_value = parse_wait_target(target)
+        if wait_kind == 'template':
+            icon_paths = (get_icon_path(wait_value),)
+
+    return Step(
+        type=step_type,
+        target=target,
+        click_type=_text(row['click_type']) if not _is_blank(row.get('click_type')) else 'single',
+        delay=float(row['delay']) if not _is_blank(row.get('delay')) else 1.0,
+        shift=shift,
+        offset=parse_shift(shift),
+        point=point,
+        icon_paths=icon_paths,
+        wait_kind=wait_kind,
+        wait_value=wait_value,
+        roi=roi,
+        roi_spec=parse_roi(roi),
+        # 可选列：步骤的时间预算（秒），等待类步骤同时作为等待超时
+        timeout=_optional(row, 'timeout', float),
+        # 可选列：最大重试次数，不填表示不限制
+        max_retries=_optional(row, 'max_retries', lambda v: int(float(v))),
+        # 可选列：重试间隔倍增系数，不填为1（固定间隔）
+        backoff=_optional(row, 'backoff', float),
+        # 可选列：重试用尽后的处理方式 abort / skip / goto:步骤号
+        on_fail=_optional(row, 'on_fail', _text),
+        # 可选列：文字步骤允许的最大编辑距离（模糊匹配），不填为精确/包含匹配
+        fuzzy=_optional(row, 'fuzzy', lambda v: int(float(v))),
+        # 可选列：文字步骤使用的OCR配置档 fast / balanced / accurate，不填使用运行时的默认配置档
+        profile=_optional(row, 'profile', _profile),
+    )
+
+
+def compile_rows(rows, columns, window_title=None, source=None):
+    """
+    编译一组配置行
+
+    Args:
+        rows: 可迭代的 {列名: 值}
+        columns: 表头列名
+        window_title: 配置中指定的窗口标题
+
+    Returns:
+        StepPlan
+    """
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        raise ValueError(f"配置文件缺少必要的列: {', '.join(missing_columns)}")
+
+    steps = [compile_step(row) for row in rows if not _is_blank(row.get('target'))]  # 跳过空行
+    return StepPlan(steps, window_title=window_title, source=source)
+
+
+def _load_xlsx(path):
+    """使用 openpyxl 只读模式逐行读取工作簿的第一个工作表"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        columns = [_text(c) if c is not None else '' for c in header]
+        records = (dict(zip(columns, values)) for values in rows)
+        return compile_rows(records, columns, source=path)
+    finally:
+        workbook.close()
+
+
+def _load_csv(path):
+    """使用 csv 模块逐行读取"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        columns = [c.strip() for c in reader.fieldnames or []]
+        records = ({k.strip(): v for k, v in row.items() if k is not None} for row in reader)
+        return compile_rows(records, columns, source=path)
+
+
+def _load_json(path):
+    """
+    读取JSON配置
+
+    支持步骤数组，或 {"window_title": ..., "steps": [...]} 对象；
+    .jsonl 文件每行一个步骤，逐行解析。
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith('.jsonl'):
+            steps = [json.loads(line) for line in f if line.strip()]
+            window_title = None
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                steps = data.get('steps', [])
+                window_title = data.get('window_title')
+            else:
+                steps = data
+                window_title = None
+    columns = set()
+    for step in steps:
+        columns.update(step)
+    # JSON 中的可选字段可以省略，只要求 type 和 target
+    for key in REQUIRED_COLUMNS:
+        if key not in ('type', 'target'):
+            columns.add(key)
+    return compile_rows(steps, columns, window_title=window_title, source=path)
+
+
+LOADERS = {
+    '.xlsx': _load_xlsx,
+    '.xlsm': _load_xlsx,
+    '.csv': _load_csv,
+    '.json': _load_json,
+    '.jsonl': _load_json,
+}
+
+
+def _cache_path(config_file, cache_dir):
+    key = hashlib.sha1(os.path.abspath(config_file).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{key}.pkl")
+
+
+def load_plan(config_file, cache_dir='.plan_cache'):
+    """
+    加载编译后的步骤序列
+
+    编译结果按文件路径、修改时间和大小缓存到磁盘，配置文件未变化时直接读取缓存，
+    不需要再次解析工作簿。未加前缀的等待目标在读取缓存时重新检查图标文件，
+    类型发生变化时重新编译。
+
+    Args:
+        config_file: .xlsx / .csv / .json / .jsonl 配置文件
+        cache_dir: 缓存目录，None表示不使用缓存
+
+    Returns:
+        StepPlan
+    """
+    ext = os.path.splitext(config_file)[1].lower()
+    if ext not in LOADERS:
+        raise ValueError(f"不支持的配置文件格式: {ext}")
+
+    stat = os.stat(config_file)
+    signature = (PLAN_VERSION, os.path.abspath(config_file), stat.st_mtime_ns, stat.st_size)
+
+    cache_file = _cache_path(config_file, cache_dir) if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_signature, plan = pickle.load(f)
+            if cached_signature == signature and not any(_wait_kind_stale(step) for step in plan.steps):
+                return plan
+        except Exception as e:
+            print(f"读取步骤缓存失败，重新编译: {str(e)}")
+
+    plan = LOADERS[ext](config_file)
+
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = cache_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((signature, plan), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"保存步骤缓存失败: {str(e)}")
+    return plan
@@ -0,0 +1,174 @@
+import cv2
+import numpy as np
+
+
+def match_exhaustive(image, template, method=cv2.TM_CCOEFF_NORMED):
+    """
+    在整幅图像上进行全分辨率模板匹配
+
+    Args:
+        image: 大图
+        template: 模板
+        method: OpenCV匹配方法
+
+    Returns:
+        (最高匹配度, 模板左上角位置 (x, y))
+    """
+    result = cv2.matchTemplate(image, template, method)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, max_loc
+
+
+def top_peaks(response, count, suppress_width, suppress_height):
+    """
+    从匹配响应图中取出匹配度最高的若干个峰值
+
+    每取出一个峰值后将其邻域置为最小值，避免同一目标被重复选中。
+
+    Args:
+        response: cv2.matchTemplate 的结果
+        count: 最多返回的峰值数量
+        suppress_width: 抑制邻域宽度
+        suppress_height: 抑制邻域高度
+
+    Returns:
+        [(匹配度, (x, y)), ...]，按匹配度从高到低排列
+    """
+    response = response.copy()
+    height, width = response.shape[:2]
+    peaks = []
+    for _ in range(count):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(response)
+        if peaks and max_val <= -1.0:
+            break
+        peaks.append((max_val, (x, y)))
+        response[max(0, y - suppress_height):min(height, y + suppress_height + 1),
+                 max(0, x - suppress_width):min(width, x + suppress_width + 1)] = -1.0
+    return peaks
+
+
+def match_pyramid(image, template, levels=2, candidates=3, min_template_size=8,
+                  method=cv2.TM_CCOEFF_NORMED, downscale=None):
+    """
+    由粗到细的金字塔模板匹配
+
+    先在缩小 2^levels 倍的图像上匹配，取出若干候选位置，再只在候选位置
+    附近进行全分辨率匹配。模板缩小后过小时自动减少层数。
+
+    Args:
+        image: 大图
+        template: 模板
+        levels: 金字塔层数，每层缩小一半
+        candidates: 粗匹配阶段保留的候选数量
+        min_template_size: 粗匹配时模板的最小边长
+        method: OpenCV匹配方法
+        downscale: 返回缩小 2^层数 倍的大图的函数（如 Frame.scaled），可复用已缓存的缩小图
+
+    Returns:
+        (最高匹配度, 模板左上角位置 (x, y))
+    """
+    th, tw = template.shape[:2]
+    while levels > 0 and min(th, tw) >> levels < min_template_size:
+        levels -= 1
+    if levels <= 0:
+        return match_exhaustive(image, template, method)
+
+    scale = 1 << levels
+    if downscale is not None:
+        small_image = downscale(levels)
+    else:
+        small_image = cv2.resize(image, (image.shape[1] // scale, image.shape[0] // scale),
+                                 interpolation=cv2.INTER_AREA)
+    small_template = cv2.resize(template, (tw // scale, th // scale), interpolation=cv2.INTER_AREA)
+    if small_image.shape[0] < small_template.shape[0] or small_image.shape[1] < small_template.shape[1]:
+        return match_exhaustive(image, template, method)
+
+    coarse = cv2.matchTemplate(small_image, small_template, method)
+    peaks = top_peaks(coarse, candidates, small_template.shape[1] // 2, small_template.shape[0] // 2)
+
+    # 在每个候选位置附近做全分辨率精确匹配
+    height, width = image.shape[:2]
+    best_val, best_loc = -1.0, (0, 0)
+    for _, (cx, cy) in peaks:
+        x1 = max(0, cx * scale - scale)
+        y1 = max(0, cy * scale - scale)
+        x2 = min(width, cx * scale + scale + tw)
+        y2 = min(height, cy * scale + scale + th)
+        if x2 - x1 < tw or y2 - y1 < th:
+            continue
+        max_val, (x, y) = match_exhaustive(image[y1:y2, x1:x2], template, method)
+        if max_val > best_val:
+            best_val, best_loc = max_val, (x + x1, y + y1)
+    return best_val, best_loc
+
+
+def find_peaks(response, threshold, neighborhood=3):
+    """
+    向量化提取匹配响应图中所有超过阈值的局部极大值
+
+    Args:
+        response: cv2.matchTemplate 的结果
+        threshold: 匹配度阈值
+        neighborhood: 判断局部极大值的邻域大小
+
+    Returns:
+        (匹配度数组, x坐标数组, y坐标数组)
+    """
+    dilated = cv2.dilate(response, np.ones((neighborhood, neighborhood), np.uint8))
+    ys, xs = np.nonzero((response >= threshold) & (response >= dilated))
+    return response[ys, xs], xs, ys
+
+
+def non_max_suppression(boxes, scores, iou_threshold=0.3):
+    """
+    非极大值抑制
+
+    Args:
+        boxes: (N, 4) 数组，每行为 (x1, y1, x2, y2)
+        scores: (N,) 匹配度数组
+        iou_threshold: 重叠度超过该值的低分框被抑制
+
+    Returns:
+        保留的下标数组，按匹配度从高到低排列
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    boxes = boxes.astype(np.float32)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        inter_w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        inter_h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = inter_w * inter_h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-6)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def match_all(image, template, threshold, iou_threshold=0.3, method=cv2.TM_CCOEFF_NORMED):
+    """
+    找出模板在图像中所有超过阈值的匹配位置
+
+    Args:
+        image: 大图
+        template: 模板
+        threshold: 匹配度阈值
+        iou_threshold: 非极大值抑制的重叠度阈值
+        method: OpenCV匹配方法
+
+    Returns:
+        (匹配度数组, (N, 4) 匹配框数组)，按匹配度从高到低排列
+    """
+    th, tw = template.shape[:2]
+    if image.shape[0] < th or image.shape[1] < tw:
+        return np.empty(0, dtype=np.float32), np.empty((0, 4), dtype=np.int32)
+    response = cv2.matchTemplate(image, template, method)
+    scores, xs, ys = find_peaks(response, threshold)
+    boxes = np.stack([xs, ys, xs + tw, ys + th], axis=1).astype(np.int32)
+    keep = non_max_suppression(boxes, scores, iou_threshold)
+    return scores[keep], boxes[keep]
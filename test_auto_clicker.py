@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from auto_clicker import AutoClicker
+from capture_backends import CaptureBackend
+from debug_artifacts import DebugArtifactWriter
+from frame_utils import Frame
+from step_plan import compile_step
+
+
+class FrameListBackend(CaptureBackend):
+    """按顺序回放内存中的画面，最后一帧重复"""
+
+    requires_window = False
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.index = 0
+
+    def capture(self, window_controller=None):
+        frame = self.frames[min(self.index, len(self.frames) - 1)]
+        self.index += 1
+        return frame.copy(), (0, 0)
+
+
+def small_icon():
+    # 黑白棋盘格，缩小后与灰色背景几乎没有差别
+    icon = np.zeros((12, 12, 3), dtype=np.uint8)
+    icon[::2, ::2] = 255
+    icon[1::2, 1::2] = 255
+    return icon
+
+
+def make_frames(empty_count, total, icon):
+    background = np.full((1080, 1920, 3), 128, dtype=np.uint8)
+    with_icon = background.copy()
+    with_icon[500:512, 900:912] = icon
+    return [background] * empty_count + [with_icon] * (total - empty_count)
+
+
+@pytest.fixture
+def clicker_factory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "images" / "icons").mkdir(parents=True)
+    icon = small_icon()
+    cv2.imwrite(str(tmp_path / "images" / "icons" / "dot.png"), icon)
+    config = tmp_path / "steps.json"
+    config.write_text(json.dumps([{"type": "wait_for", "target": "template:dot", "timeout": 2}]), encoding='utf-8')
+
+    def create(frames, **options):
+        clicker = AutoClicker(str(config), capture_backend=FrameListBackend(frames), debug_mode='off',
+                              poll_interval=0.01, poll_max_interval=0.02, stats_dir=None, plan_cache_dir=None,
+                              warm_up_ocr=False, debug_dir=str(tmp_path / "debug"), **options)
+        checks = []
+        locate_target = clicker.locate_target
+
+        def counting_locate(*args):
+            checks.append(args[1])
+            return locate_target(*args)
+        clicker.locate_target = counting_locate
+        return clicker, checks
+    return create, icon
+
+
+def run_wait(clicker):
+    step = clicker.config["click_sequence"][0]
+    screenshot = Frame(clicker.window_controller.capture_window()[0])
+    return clicker.wait_for_target(step, screenshot, screenshot.width, screenshot.height)
+
+
+def test_wait_for_notices_small_target_missed_by_thumbnail(clicker_factory):
+    # 目标出现后缩略图不变，靠定期的强制识别发现
+    create, icon = clicker_factory
+    clicker, _ = create(make_frames(5, 200, icon), poll_recheck_interval=0.05)
+    assert run_wait(clicker)
+
+
+def test_wait_for_skips_recognition_on_unchanged_frames(clicker_factory):
+    create, icon = clicker_factory
+    clicker, checks = create(make_frames(200, 200, icon), poll_recheck_interval=10.0)
+    step = clicker.config["click_sequence"][0]
+    clicker.config["click_sequence"][0] = step.copy(timeout=0.3)
+    assert not run_wait(clicker)
+    assert len(checks) == 1
+
+
+def test_pipeline_threads_do_not_accumulate_across_runs(clicker_factory):
+    create, icon = clicker_factory
+    clicker, _ = create(make_frames(0, 5, icon), pipeline=True, prefetch_lead=0.05)
+    # 第一步成功后在延时期间预取第二步
+    clicker.config["click_sequence"] = [
+        compile_step({'type': 'template', 'target': 'dot', 'delay': 0.1}),
+        compile_step({'type': 'template', 'target': 'dot', 'delay': 0}),
+    ]
+    before = threading.active_count()
+    for _ in range(3):
+        assert clicker.run()
+        assert clicker._executor is None
+    assert threading.active_count() <= before
+
+
+def test_missing_target_backs_off_between_retries(clicker_factory):
+    create, icon = clicker_factory
+    clicker, checks = create(make_frames(3, 10, icon), retry_interval=0.05, max_retry_interval=1.0)
+    clicker.config["click_sequence"] = [compile_step({'type': 'template', 'target': 'dot', 'delay': 0,
+                                                      'backoff': 2})]
+    start = time.perf_counter()
+    assert clicker.run()
+    # 三次未找到目标，依次等待 0.05、0.1、0.2 秒
+    assert time.perf_counter() - start >= 0.35
+    assert len(checks) == 4
+    assert clicker.last_run_stats['total_retries'] == 3
+
+
+def test_max_retries_on_missing_target_is_not_spent_at_once(clicker_factory):
+    create, icon = clicker_factory
+    clicker, checks = create(make_frames(200, 200, icon), retry_interval=0.1)
+    clicker.config["click_sequence"] = [compile_step({'type': 'template', 'target': 'dot', 'delay': 0,
+                                                      'max_retries': 2})]
+    start = time.perf_counter()
+    assert not clicker.run()
+    assert time.perf_counter() - start >= 0.2
+    assert len(checks) == 3
+    assert clicker.last_run_stats['outcome'] == 'aborted'
+
+
+def test_debug_frames_are_written_only_on_failure_by_default(tmp_path):
+    debug_dir = tmp_path / 'debug'
+    clicker = AutoClicker(str(tmp_path / 'missing.json'), capture_backend=FrameListBackend([]),
+                          debug_dir=str(debug_dir))
+    writer = clicker.window_controller.debug_writer
+    assert writer.mode == 'on_failure'
+
+    frames = [np.full((20, 30, 3), value, dtype=np.uint8) for value in (10, 20, 30, 40)]
+    for frame in frames:
+        writer.submit(frame)
+    writer.close()
+    assert not debug_dir.exists()
+    assert writer.written == 0
+
+    writer.report_failure('step2')
+    writer.close()
+    names = sorted(os.listdir(debug_dir))
+    # 只写入内存中保留的最近几帧
+    assert len(names) == writer._history.maxlen == 3
+    assert all(name.startswith('step2_screenshot_') for name in names)
+    assert [int(cv2.imread(str(debug_dir / name))[0, 0, 0]) for name in names] == [20, 30, 40]
+
+
+def test_debug_writer_close_keeps_unfinished_thread(tmp_path):
+    writer = DebugArtifactWriter(str(tmp_path), mode='sampled')
+    release = threading.Event()
+
+    def slow_annotate(frame):
+        release.wait(5)
+        return frame
+    writer.submit(np.zeros((4, 4, 3), dtype=np.uint8), annotate=slow_annotate)
+    writer.close(timeout=0.05)
+    assert writer._thread is not None and writer._thread.is_alive()
+    release.set()
+    writer.close()
+    assert writer._thread is None
+    assert writer.written == 1
+
+
+@pytest.mark.parametrize('pipeline', [False, True])
+def test_step_delay_is_cut_short_by_sequence_timeout(clicker_factory, pipeline):
+    create, icon = clicker_factory
+    clicker, _ = create(make_frames(0, 5, icon), sequence_timeout=0.3, pipeline=pipeline, prefetch_lead=0.05)
+    clicker.config["click_sequence"] = [
+        compile_step({'type': 'template', 'target': 'dot', 'delay': 5}),
+        compile_step({'type': 'template', 'target': 'dot', 'delay': 0}),
+    ]
+    start = time.perf_counter()
+    assert not clicker.run()
+    assert time.perf_counter() - start < 2.0
+    assert clicker.last_run_stats['outcome'] == 'deadline'
+
+
+def test_wait_timeout_is_cut_short_by_sequence_timeout(clicker_factory):
+    create, icon = clicker_factory
+    clicker, _ = create(make_frames(200, 200, icon), sequence_timeout=0.3)
+    clicker.config["click_sequence"] = [compile_step({'type': 'wait_for', 'target': 'template:dot', 'timeout': 10})]
+    start = time.perf_counter()
+    assert not clicker.run()
+    assert time.perf_counter() - start < 2.0
+    assert clicker.last_run_stats['outcome'] == 'deadline'
+
+
+@pytest.mark.parametrize('step_type, expected', [('wait_for', False), ('wait_gone', True)])
+def test_wait_with_roi_outside_window_treats_target_as_missing(clicker_factory, step_type, expected):
+    create, icon = clicker_factory
+    clicker, checks = create(make_frames(0, 200, icon))
+    clicker.config["click_sequence"] = [compile_step({'type': step_type, 'target': 'template:dot',
+                                                      'timeout': 0.2, 'roi': '3000:2000:3500:2500'})]
+    assert run_wait(clicker) is expected
+    assert checks == []
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from cv_utils import FontRegistry, draw_labels, draw_text_with_box
+
+
+@pytest.mark.parametrize('background', [255, 0])
+def test_draw_labels_matches_sequential_draw_text_with_box(background):
+    image = np.full((200, 400, 3), background, dtype=np.uint8)
+    labels = [
+        ('确定', (10, 10)),
+        ('取消按钮', (30, 25)),      # 与上一个标签重叠
+        ('OK 0.98', (250, 120)),
+        ('边缘', (380, 190)),        # 超出图片右下角
+        ('左上', (-10, -10)),        # 超出图片左上角
+    ]
+    expected = image
+    for text, position in labels:
+        expected = draw_text_with_box(expected, text, position, text_size=20, padding=3)
+    result = draw_labels(image, labels, text_size=20, padding=3)
+    assert not np.array_equal(expected, image)
+    assert np.array_equal(result, expected)
+    # 不修改原图
+    assert (image == background).all()
+
+
+def test_font_path_is_resolved_once(tmp_path):
+    font_file = tmp_path / 'font.ttc'
+    font_file.write_bytes(b'')
+    registry = FontRegistry(font_paths=[str(tmp_path / 'missing.ttc'), str(font_file)])
+    assert registry.font_path == str(font_file)
+    os.remove(font_file)
+    assert registry.font_path == str(font_file)
+    registry.clear()
+    assert registry.font_path is None
+
+
+def test_fonts_are_cached_per_size_with_lru_eviction(tmp_path):
+    registry = FontRegistry(font_paths=[str(tmp_path / 'missing.ttc')], max_fonts=2)
+    small = registry.get(10)
+    assert registry.get(10) is small
+    medium = registry.get(12)
+    # 访问 10 后，12 成为最久未使用的字号
+    assert registry.get(10) is small
+    registry.get(14)
+    assert registry.get(10) is small
+    assert registry.get(12) is not medium
+
+
+class CountingFont:
+    def __init__(self):
+        self.calls = 0
+
+    def getbbox(self, text):
+        self.calls += 1
+        return (0, 0, 10 * len(text), 10)
+
+
+def test_text_bbox_cache_hits_and_eviction(tmp_path):
+    registry = FontRegistry(font_paths=[str(tmp_path / 'missing.ttc')], max_measurements=2)
+    font = CountingFont()
+    assert registry.bbox(font, 'ab') == (0, 0, 20, 10)
+    assert registry.bbox(font, 'ab') == (0, 0, 20, 10)
+    assert font.calls == 1
+    registry.bbox(font, 'abc')
+    registry.bbox(font, 'ab')
+    registry.bbox(font, 'abcd')
+    assert font.calls == 3
+    # 'abc' 最久未使用，已被淘汰
+    registry.bbox(font, 'ab')
+    assert font.calls == 3
+    registry.bbox(font, 'abc')
+    assert font.calls == 4
+    # 不同字体对象分别缓存
+    other = CountingFont()
+    registry.bbox(other, 'ab')
+    assert other.calls == 1
+    assert registry.bbox(object(), 'ab') is None
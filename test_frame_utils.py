@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+from frame_utils import Frame, as_frame, frame_changed, frame_fingerprint, frame_thumbnail
+
+
+def colour_image(height=120, width=160):
+    return np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def test_gray_is_computed_once():
+    frame = Frame(colour_image())
+    assert np.array_equal(frame.gray, cv2.cvtColor(frame.image, cv2.COLOR_BGR2GRAY))
+    assert frame.gray is frame.gray
+    gray_image = frame.gray.copy()
+    assert Frame(gray_image).gray is gray_image
+
+
+def test_scaled_levels():
+    frame = Frame(colour_image())
+    assert frame.half.shape == (60, 80)
+    assert frame.quarter.shape == (30, 40)
+    assert frame.scaled(1) is frame.half
+    assert frame.scaled(1, gray=False).shape == (60, 80, 3)
+    assert frame.scaled(0) is frame.gray
+    assert frame.scaled(0, gray=False) is frame.image
+
+
+def test_crop_is_memoized_and_clamped():
+    frame = Frame(colour_image())
+    cropped, offset = frame.crop((10, 20, 50, 60))
+    assert offset == (10, 20)
+    assert cropped.shape == (40, 40, 3)
+    assert frame.crop((10, 20, 50, 60))[0] is cropped
+    clamped, offset = frame.crop((-5, 100, 500, 500))
+    assert offset == (0, 100)
+    assert clamped.shape == (20, 160, 3)
+    assert frame.crop(None) == (frame, (0, 0))
+
+
+def test_child_gray_is_sliced_from_parent():
+    frame = Frame(colour_image())
+    cropped, _ = frame.crop((10, 20, 50, 60))
+    assert np.shares_memory(cropped.gray, frame.gray)
+    assert np.array_equal(cropped.gray, cv2.cvtColor(cropped.image, cv2.COLOR_BGR2GRAY))
+
+
+def test_fingerprint_distinguishes_content_and_size():
+    image = colour_image()
+    frame = Frame(image)
+    assert frame.fingerprint() == frame_fingerprint(image.copy())
+    changed = image.copy()
+    changed[:40] = 0
+    assert frame_fingerprint(changed) != frame.fingerprint()
+    # 内容相同但尺寸不同的画面指纹也不同
+    assert frame_fingerprint(np.zeros((10, 20, 3), np.uint8)) != frame_fingerprint(np.zeros((20, 20, 3), np.uint8))
+
+
+def test_thumbnail_and_frame_changed():
+    image = colour_image()
+    frame = Frame(image)
+    thumb = frame.thumbnail(32)
+    assert thumb.shape == (24, 32)
+    assert frame.thumbnail(32) is thumb
+    assert np.array_equal(thumb, frame_thumbnail(frame.gray, 32))
+    assert not frame_changed(thumb, thumb.copy())
+    assert frame_changed(None, thumb)
+    assert frame_changed(thumb, Frame(image).thumbnail(16))
+    brighter = cv2.add(thumb, 20)
+    assert frame_changed(thumb, brighter)
+    assert not frame_changed(thumb, brighter, threshold=20)
+
+
+def test_as_frame():
+    frame = Frame(colour_image())
+    assert as_frame(frame) is frame
+    assert as_frame(frame.image).image is frame.image
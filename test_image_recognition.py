@@ -0,0 +1,176 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from image_recognition import ImageRecognition, TemplateCache
+
+
+class SharedEngine:
+    def __init__(self):
+        self.requests = []
+
+    def ocr(self, image, cls=True):
+        self.requests.append(cls)
+        return [None]
+
+
+class ProfileEngine(SharedEngine):
+    supports_profiles = True
+
+    def ocr(self, image, cls=True, profile=None):
+        self.requests.append((cls, profile))
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], (profile, 0.9)]]]
+
+
+def test_shared_engine_without_profiles_rejects_step_profiles():
+    engine = SharedEngine()
+    recognition = ImageRecognition(ocr_engine=engine, ocr_profile='accurate')
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    assert len(recognition.recognize_text(image)) == 0
+    assert engine.requests == [True]
+    with pytest.raises(ValueError):
+        recognition.recognize_text(image, profile='fast')
+
+
+def test_profile_aware_engine_receives_step_profile():
+    engine = ProfileEngine()
+    recognition = ImageRecognition(ocr_engine=engine, ocr_profile='accurate')
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    assert recognition.recognize_text(image).texts == ['accurate']
+    assert recognition.recognize_text(image, profile='fast').texts == ['fast']
+    # 结果缓存按配置档区分
+    assert recognition.recognize_text(image, profile='fast').texts == ['fast']
+    assert engine.requests == [(True, 'accurate'), (False, 'fast')]
+
+
+def colored_icon(bgr):
+    icon = np.full((30, 30, 3), 255, dtype=np.uint8)
+    icon[5:25, 5:25] = bgr
+    return icon
+
+
+def test_color_matching_distinguishes_icons_with_equal_gray():
+    red, green = colored_icon((0, 0, 200)), colored_icon((0, 102, 0))
+    assert abs(int(cv2.cvtColor(red, cv2.COLOR_BGR2GRAY)[15, 15]) -
+               int(cv2.cvtColor(green, cv2.COLOR_BGR2GRAY)[15, 15])) <= 1
+    image = np.full((200, 300, 3), 128, dtype=np.uint8)
+    image[40:70, 40:70] = red
+    image[120:150, 200:230] = green
+
+    recognition = ImageRecognition()
+    assert recognition.match_color
+    assert recognition.template_matching(image, green, threshold=0.9) == (215, 135)
+    assert recognition.template_matching(image, red, threshold=0.9) == (55, 55)
+    # 灰度匹配时两个图标没有区别
+    gray = ImageRecognition(match_color=False)
+    assert gray.template_matching(image, green, threshold=0.9) in ((55, 55), (215, 135))
+
+
+def test_pyramid_color_matching_uses_color_downscales():
+    image = np.full((400, 600, 3), 128, dtype=np.uint8)
+    icon = np.zeros((48, 48, 3), dtype=np.uint8)
+    icon[:, :24] = (255, 0, 0)
+    icon[:, 24:] = (0, 0, 255)
+    icon[16:32, 16:32] = (255, 255, 255)
+    image[300:348, 100:148] = icon
+    recognition = ImageRecognition(match_method='pyramid')
+    assert recognition.template_matching(image, icon, threshold=0.9) == (124, 324)
+
+
+def write_icon(path, value, size=20):
+    cv2.imwrite(str(path), np.full((size, size, 3), value, dtype=np.uint8))
+    return str(path)
+
+
+def test_template_cache_reuses_entry_until_file_changes(tmp_path):
+    path = write_icon(tmp_path / 'a.png', 50)
+    cache = TemplateCache()
+    icon, icon_gray = cache.get(path, 1920)
+    assert icon.shape == (20, 20, 3)
+    assert icon_gray.shape == (20, 20)
+    assert cache.get(path, 1920)[0] is icon
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write_icon(path, 200)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+    reloaded, _ = cache.get(path, 1920)
+    assert reloaded is not icon
+    assert reloaded[0, 0, 0] == 200
+    assert cache.misses == 2
+
+
+def test_template_cache_rescales_when_screen_width_changes(tmp_path):
+    path = write_icon(tmp_path / 'a.png', 50)
+    cache = TemplateCache(base_width=1920)
+    assert cache.get(path, 1920)[0].shape == (20, 20, 3)
+    assert cache.get(path, 960)[0].shape == (10, 10, 3)
+    assert cache.get(path, 960)[1].shape == (10, 10)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_template_cache_evicts_least_recently_used(tmp_path):
+    paths = [write_icon(tmp_path / f'{i}.png', i * 40) for i in range(3)]
+    cache = TemplateCache(max_size=2)
+    cache.get(paths[0], 1920)
+    cache.get(paths[1], 1920)
+    # 访问 0 后，1 成为最久未使用的项
+    cache.get(paths[0], 1920)
+    cache.get(paths[2], 1920)
+    misses = cache.misses
+    cache.get(paths[0], 1920)
+    cache.get(paths[2], 1920)
+    assert cache.misses == misses
+    cache.get(paths[1], 1920)
+    assert cache.misses == misses + 1
+
+
+def test_template_cache_preload_counts_loaded_icons(tmp_path):
+    paths = [write_icon(tmp_path / f'{i}.png', 100) for i in range(2)]
+    cache = TemplateCache()
+    assert cache.preload(paths + [str(tmp_path / 'missing.png')], 1920) == 2
+    cache.get(paths[0], 1920)
+    cache.get(paths[1], 1920)
+    assert cache.hits == 2
+
+
+class CountingEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def ocr(self, image, cls=True):
+        self.calls += 1
+        return [[[[[2, 2], [30, 2], [30, 12], [2, 12]], ('确定', 0.9)]]]
+
+
+def screen_image():
+    return np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+
+def test_ocr_cache_skips_ocr_on_unchanged_frame():
+    engine = CountingEngine()
+    recognition = ImageRecognition(ocr_engine=engine)
+    image = screen_image()
+    assert recognition.find_text_location(image, '确定') is not None
+    # 新截取的相同画面，以及同一画面上的其他文字步骤
+    assert recognition.find_text_location(image.copy(), '确定') is not None
+    assert recognition.find_text_location(image, '取消') is None
+    assert engine.calls == 1
+    assert recognition.ocr_cache.hits == 2
+
+
+def test_ocr_cache_misses_on_changed_frame_and_other_roi():
+    engine = CountingEngine()
+    recognition = ImageRecognition(ocr_engine=engine)
+    image = screen_image()
+    recognition.find_text_location(image, '确定')
+    changed = image.copy()
+    changed[40:80, 40:80] = 0
+    recognition.find_text_location(changed, '确定')
+    assert engine.calls == 2
+    recognition.find_text_location(image, '确定', roi=(0, 0, 80, 60))
+    assert engine.calls == 3
+    recognition.find_text_location(image, '确定', roi=(0, 0, 80, 60))
+    assert engine.calls == 3
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from incremental_ocr import IncrementalOCR
+from ocr_result import OCRResult
+
+
+class FakeOCR:
+    """
+    按给定的文字行“识别”传入的图像
+
+    传入的图像是整幅画面的切片，由内存地址推算切片在画面中的位置；
+    只返回字符中心落在切片内的部分文字，模拟文字行被截断的情况。
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.screen = None
+        self.calls = []
+
+    def show(self, screen):
+        self.screen = screen
+        return screen
+
+    def __call__(self, image):
+        offset = image.__array_interface__['data'][0] - self.screen.__array_interface__['data'][0]
+        y, x = divmod(offset // self.screen.strides[1], self.screen.shape[1])
+        width, height = image.shape[1], image.shape[0]
+        self.calls.append((x, y, x + width, y + height))
+        boxes, texts = [], []
+        for (x1, y1, x2, y2), text in self.lines:
+            if not (y <= y1 and y2 <= y + height):
+                continue
+            step = (x2 - x1) / float(len(text))
+            chars = [i for i in range(len(text)) if x <= x1 + (i + 0.5) * step < x + width]
+            if not chars:
+                continue
+            cx1, cx2 = x1 + chars[0] * step, x1 + (chars[-1] + 1) * step
+            boxes.append([[cx1 - x, y1 - y], [cx2 - x, y1 - y], [cx2 - x, y2 - y], [cx1 - x, y2 - y]])
+            texts.append(''.join(text[i] for i in chars))
+        return OCRResult(boxes, texts)
+
+
+LINES = [((100, 10, 300, 30), 'AAAA'), ((280, 200, 500, 220), 'BBBBBBBB')]
+
+
+@pytest.fixture
+def screen():
+    return np.full((600, 800, 3), 200, dtype=np.uint8)
+
+
+def test_unchanged_frame_skips_ocr(screen):
+    fake = FakeOCR(LINES)
+    ocr = IncrementalOCR(fake)
+    first = ocr.recognize(fake.show(screen))
+    assert first.texts == ['AAAA', 'BBBBBBBB']
+    assert ocr.recognize(fake.show(screen.copy())) is first
+    assert len(fake.calls) == 1
+    assert ocr.last_ocr_ratio == 0.0
+
+
+def test_local_change_keeps_whole_lines(screen):
+    fake = FakeOCR(LINES)
+    ocr = IncrementalOCR(fake)
+    ocr.recognize(fake.show(screen))
+    changed = screen.copy()
+    changed[5:8, 5:8] = 0
+    result = ocr.recognize(fake.show(changed))
+    assert result.texts == ['AAAA', 'BBBBBBBB']
+    assert result.rects.tolist() == [[100, 10, 300, 30], [280, 200, 500, 220]]
+    # 只识别了变化区域（已扩展到覆盖两行旧文字）
+    assert len(fake.calls) == 2
+    assert fake.calls[1] == (0, 0, 500, 256)
+    assert 0.0 < ocr.last_ocr_ratio < 0.5
+
+
+def test_local_change_outside_text_reuses_lines(screen):
+    fake = FakeOCR(LINES + [((600, 500, 700, 520), 'CC')])
+    ocr = IncrementalOCR(fake)
+    ocr.recognize(fake.show(screen))
+    changed = screen.copy()
+    changed[590:595, 790:795] = 0
+    fake.lines = LINES + [((600, 500, 700, 520), 'DD')]
+    result = ocr.recognize(fake.show(changed))
+    assert result.texts == ['AAAA', 'BBBBBBBB', 'DD']
+    assert fake.calls[1:] == [(600, 384, 800, 600)]
+
+
+def test_shape_change_runs_full_ocr(screen):
+    fake = FakeOCR(LINES)
+    ocr = IncrementalOCR(fake)
+    ocr.recognize(fake.show(screen))
+    smaller = np.full((400, 600, 3), 200, dtype=np.uint8)
+    ocr.recognize(fake.show(smaller))
+    assert fake.calls[1] == (0, 0, 600, 400)
+    assert ocr.last_ocr_ratio == 1.0
+
+
+def test_large_change_falls_back_to_full_ocr(screen):
+    fake = FakeOCR(LINES)
+    ocr = IncrementalOCR(fake, full_ratio=0.5)
+    ocr.recognize(fake.show(screen))
+    changed = screen.copy()
+    changed[:, :500] = 0
+    result = ocr.recognize(fake.show(changed))
+    assert fake.calls[1] == (0, 0, 800, 600)
+    assert ocr.last_ocr_ratio == 1.0
+    assert result.texts == ['AAAA', 'BBBBBBBB']
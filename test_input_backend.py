@@ -0,0 +1,113 @@
+import pytest
+
+from input_backend import (InputBackend, ClickTiming, DDInputBackend, RecordingInputBackend,
+                           MOUSEEVENTF_ABSOLUTE, MOUSEEVENTF_MOVE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP, MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP)
+from mouse_trajectory import TrajectoryEngine
+
+
+class FakeSession:
+    def __init__(self):
+        self.operations = []
+
+    def run(self, operations):
+        self.operations.extend(operations)
+
+
+class FakeDDBackend(DDInputBackend):
+    def screen_size(self):
+        return (1920, 1080)
+
+
+def test_dd_send_maps_events_to_driver_operations():
+    backend = FakeDDBackend(session=FakeSession())
+    recorder = RecordingInputBackend(screen_size=(1920, 1080))
+    abs_x, abs_y = recorder.to_absolute(100, 200)
+    backend.send([(MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE, abs_x, abs_y),
+                  (MOUSEEVENTF_LEFTDOWN, abs_x, abs_y), (MOUSEEVENTF_LEFTUP, abs_x, abs_y),
+                  (MOUSEEVENTF_RIGHTDOWN, abs_x, abs_y), (MOUSEEVENTF_RIGHTUP, abs_x, abs_y)])
+    assert backend.session.operations == [('move', 100, 200), ('press', 1), ('release', 2),
+                                          ('press', 4), ('release', 8)]
+
+
+def test_dd_backend_accepts_generic_input_events():
+    # 基类按 send 契约构造的移动和点击事件，DD后端同样可以执行
+    backend = FakeDDBackend(session=FakeSession())
+    InputBackend.move_to(backend, 640, 360)
+    assert backend.session.operations == [('move', 640, 360)]
+
+
+def recorded_events(backend):
+    """每次 send 的事件，转换为 [(dwFlags, dx, dy), ...] 列表"""
+    return [[(item.mi.dwFlags, item.mi.dx, item.mi.dy) for item in batch] for batch in backend.batches]
+
+
+def test_single_click_event_sequence():
+    backend = RecordingInputBackend(screen_size=(1920, 1080))
+    abs_x, abs_y = backend.to_absolute(960, 540)
+    backend.click(960, 540, 'single')
+    assert recorded_events(backend) == [[(MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE, abs_x, abs_y)],
+                                        [(MOUSEEVENTF_LEFTDOWN, abs_x, abs_y)],
+                                        [(MOUSEEVENTF_LEFTUP, abs_x, abs_y)]]
+    assert backend.gaps == [backend.timing.settle, backend.timing.press]
+    assert backend.cursor_pos() == (960, 540)
+
+
+def test_double_click_event_sequence():
+    backend = RecordingInputBackend(screen_size=(1920, 1080))
+    abs_x, abs_y = backend.to_absolute(10, 20)
+    backend.click(10, 20, 'double')
+    down = [(MOUSEEVENTF_LEFTDOWN, abs_x, abs_y)]
+    up = [(MOUSEEVENTF_LEFTUP, abs_x, abs_y)]
+    assert recorded_events(backend) == [[(MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE, abs_x, abs_y)],
+                                        down, up, down, up]
+    timing = backend.timing
+    assert backend.gaps == [timing.settle, timing.press, timing.double_interval, timing.press]
+
+
+def test_right_click_event_sequence():
+    backend = RecordingInputBackend(screen_size=(1920, 1080))
+    abs_x, abs_y = backend.to_absolute(300, 400)
+    backend.click(300, 400, 'right')
+    assert recorded_events(backend) == [[(MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE, abs_x, abs_y)],
+                                        [(MOUSEEVENTF_RIGHTDOWN, abs_x, abs_y)],
+                                        [(MOUSEEVENTF_RIGHTUP, abs_x, abs_y)]]
+
+
+def test_zero_gaps_merge_click_into_one_send():
+    backend = RecordingInputBackend(ClickTiming(settle=0, press=0, double_interval=0))
+    backend.click(100, 100, 'double')
+    assert len(backend.batches) == 1
+    flags = [event[0] for event in recorded_events(backend)[0]]
+    assert flags == [MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP,
+                     MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP]
+    assert backend.gaps == []
+
+
+def test_unknown_click_type_is_rejected():
+    with pytest.raises(ValueError):
+        RecordingInputBackend().click_segments(0, 0, 'middle')
+
+
+def test_move_path_sends_all_points_at_once():
+    backend = RecordingInputBackend(screen_size=(1000, 1000))
+    backend.move_path([(10, 10), (20, 20), (30, 30)])
+    assert len(backend.batches) == 1
+    assert backend.event_count == 3
+    assert backend.cursor_pos() == (30, 30)
+
+
+def test_trajectory_batches_points_per_send():
+    backend = RecordingInputBackend(screen_size=(1920, 1080))
+    engine = TrajectoryEngine(rate=120, batch_interval=0.05)
+    stats = engine.move((0, 0), (500, 300), backend.move_path, duration=0.1)
+    assert stats['points'] == 12
+    # 0.1秒的移动按0.05秒分组，最多调用两次 send（落后时跳过中间组）
+    assert stats['calls'] == len(backend.batches) <= 2
+    assert backend.cursor_pos() == (500, 300)
+
+
+def test_trajectory_without_duration_sends_end_point_once():
+    backend = RecordingInputBackend()
+    stats = TrajectoryEngine().move((0, 0), (50, 60), backend.move_path, duration=0)
+    assert stats['calls'] == 1
+    assert backend.cursor_pos() == (50, 60)
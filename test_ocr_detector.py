@@ -0,0 +1,75 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import ocr_detector
+from ocr_detector import load_done_images, run_batch, visual_name
+from ocr_result import OCRResult
+
+# 测试用的假检测器通过 monkeypatch 替换，需要以 fork 方式启动工作进程才能继承
+requires_fork = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='需要 fork 启动方式')
+
+
+class FakeDetector:
+    def __init__(self, **options):
+        pass
+
+    def detect_result(self, image_path):
+        marker = image_path + '.crashed'
+        if os.path.basename(image_path) == 'crash.png' and not os.path.exists(marker):
+            open(marker, 'w').close()
+            os._exit(1)
+        return OCRResult([[[0, 0], [4, 0], [4, 4], [0, 4]]], [os.path.basename(image_path)], [0.9])
+
+    def visualize_opencv(self, image_path, detected_texts, output_path):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(image_path)
+
+
+def make_images(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'')
+    return str(root)
+
+
+def test_visual_name_uses_relative_path(tmp_path):
+    base = str(tmp_path)
+    assert visual_name(str(tmp_path / 'a' / '1.png'), base) == 'a__1_visual_opencv.png'
+    assert visual_name(str(tmp_path / 'b' / '1.png'), base) != visual_name(str(tmp_path / 'a' / '1.png'), base)
+
+
+def test_load_done_images_skips_errors_and_partial_lines(tmp_path):
+    jsonl = tmp_path / 'results.jsonl'
+    jsonl.write_text(json.dumps({'image': 'x.png', 'error': None}) + '\n'
+                     + json.dumps({'image': 'y.png', 'error': 'boom'}) + '\n{"image": "z.pn', encoding='utf-8')
+    assert load_done_images(str(jsonl)) == {os.path.abspath('x.png')}
+
+
+@requires_fork
+def test_batch_visuals_do_not_collide_and_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_detector, 'OCRDetector', FakeDetector)
+    source = make_images(tmp_path / 'shots', ['a/1.png', 'b/1.png'])
+    output = str(tmp_path / 'out')
+    assert run_batch([source + '/**/*.png'], output, workers=1, visual=True) == (2, 0)
+    visuals = sorted(name for name in os.listdir(output) if name.endswith('.png'))
+    assert visuals == ['a__1_visual_opencv.png', 'b__1_visual_opencv.png']
+
+    # 可视化图片被删除的图片在续跑时重新处理
+    os.remove(os.path.join(output, 'b__1_visual_opencv.png'))
+    assert run_batch([source + '/**/*.png'], output, workers=1, visual=True) == (1, 0)
+    assert run_batch([source + '/**/*.png'], output, workers=1, visual=True) == (0, 0)
+
+
+@requires_fork
+def test_batch_survives_crashing_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_detector, 'OCRDetector', FakeDetector)
+    source = make_images(tmp_path / 'shots', ['0.png', 'crash.png', '2.png', '3.png'])
+    output = str(tmp_path / 'out')
+    assert run_batch([source], output, workers=2) == (4, 0)
+    with open(os.path.join(output, 'results.jsonl'), encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(os.path.basename(r['image']) for r in records) == ['0.png', '2.png', '3.png', 'crash.png']
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from ocr_result import OCRResult
+
+
+def square(x, y, size=10):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size]]
+
+
+def paddle_result():
+    return [[
+        [square(50, 20), ('确定', 0.9)],
+        [square(10, 20), ('取消', 0.5)],
+        [square(0, 0, 4), ('x', 0.99)],
+    ]]
+
+
+def test_from_paddle_matches_line_format():
+    result = OCRResult.from_paddle(paddle_result())
+    assert len(result) == 3
+    assert result.texts == ['确定', '取消', 'x']
+    box, text, confidence = result[0]
+    assert box.tolist() == square(50, 20)
+    assert text == '确定'
+    assert confidence == pytest.approx(0.9)
+    assert [line[1] for line in result] == result.texts
+
+
+@pytest.mark.parametrize('empty', [None, [], [None]])
+def test_from_paddle_without_text(empty):
+    result = OCRResult.from_paddle(empty)
+    assert len(result) == 0
+    assert result.boxes.shape == (0, 4, 2)
+    assert result.centers.shape == (0, 2)
+    assert result.to_dicts() == []
+
+
+def test_mismatched_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        OCRResult([square(0, 0)], ['a', 'b'], [0.5, 0.5])
+
+
+def test_geometry():
+    result = OCRResult.from_paddle(paddle_result())
+    assert result.centers.tolist() == [[55, 25], [15, 25], [2, 2]]
+    assert result.rects.tolist() == [[50, 20, 60, 30], [10, 20, 20, 30], [0, 0, 4, 4]]
+    assert result.areas.tolist() == pytest.approx([100, 100, 16])
+
+
+def test_centers_match_per_point_rounding():
+    box = [[0.4, 0.4], [10.7, 0.2], [10.9, 5.3], [0.1, 5.6]]
+    result = OCRResult([box], ['a'], [1.0])
+    expected = [int(sum(p[0] for p in box) / 4), int(sum(p[1] for p in box) / 4)]
+    assert result.centers.tolist() == [expected]
+
+
+def test_filter_and_indexing():
+    result = OCRResult.from_paddle(paddle_result())
+    assert result.filter(min_confidence=0.6).texts == ['确定', 'x']
+    assert result.filter(min_area=50).texts == ['确定', '取消']
+    assert result.filter(min_confidence=0.1) is result
+    assert result[1:].texts == ['取消', 'x']
+    assert result[np.array([2, 0])].texts == ['x', '确定']
+
+
+def test_intersecting_offset_and_sorted():
+    result = OCRResult.from_paddle(paddle_result())
+    assert result.intersecting((12, 22, 55, 28)).tolist() == [True, True, False]
+    moved = result.offset(100, 200)
+    assert moved.rects[0].tolist() == [150, 220, 160, 230]
+    assert result.offset(0, 0) is result
+    assert result.sorted().texts == ['x', '取消', '确定']
+
+
+def test_concat_and_to_dicts():
+    first = OCRResult.from_paddle(paddle_result())
+    second = OCRResult.from_lines([(square(0, 100), '返回', 0.8)])
+    merged = OCRResult.concat([first, OCRResult(), second])
+    assert merged.texts == ['确定', '取消', 'x', '返回']
+    assert OCRResult.concat([OCRResult(), second]) is second
+    record = merged.to_dicts()[3]
+    assert record['text'] == '返回'
+    assert record['center'] == (5, 105)
+    assert record['confidence'] == pytest.approx(0.8)
+    assert record['box'] == square(0, 100)
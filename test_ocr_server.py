@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import image_recognition
+from image_recognition import ImageRecognition
+from ocr_server import OCRClient, OCRServer, server_running
+
+
+class FakeEngine:
+    def __init__(self, name):
+        self.name = name
+        self.shapes = []
+
+    def ocr(self, image, cls=True):
+        self.shapes.append(tuple(image.shape))
+        return [[[[[0, 0], [8, 0], [8, 8], [0, 8]], (self.name, 0.5)]]]
+
+
+@pytest.fixture
+def running_server(tmp_path):
+    address = f"unix:{tmp_path / 'ocr.sock'}"
+    server = OCRServer(address, ocr=FakeEngine('accurate'), profile='accurate')
+    server._profile_engines['fast'] = FakeEngine('fast')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if server_running(address):
+            break
+        time.sleep(0.02)
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+def text_of(result):
+    return result[0][0][1][0]
+
+
+@pytest.mark.parametrize('use_shm', [False, True])
+def test_client_round_trip_with_profiles(running_server, use_shm):
+    client = OCRClient(running_server.address, use_shm=use_shm).connect()
+    try:
+        image = np.zeros((12, 16, 3), dtype=np.uint8)
+        assert text_of(client.ocr(image)) == 'accurate'
+        assert text_of(client.ocr(image, cls=False, profile='fast')) == 'fast'
+        # 第一次识别是启动时的预热
+        assert running_server.ocr.shapes[1:] == [(12, 16, 3)]
+    finally:
+        client.close()
+
+
+def test_second_server_refuses_to_start(running_server):
+    with pytest.raises(RuntimeError):
+        OCRServer(running_server.address, ocr=FakeEngine('other')).serve_forever()
+    assert server_running(running_server.address)
+
+
+def test_stale_socket_file_is_replaced(tmp_path):
+    path = tmp_path / 'stale.sock'
+    path.write_bytes(b'')
+    server = OCRServer(f"unix:{path}", ocr=FakeEngine('accurate'))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if server_running(server.address):
+            break
+        time.sleep(0.02)
+    assert server_running(server.address)
+    server.shutdown()
+    thread.join(5)
+    assert not os.path.exists(path)
+
+
+def test_recognition_falls_back_to_local_engine_when_server_dies(running_server, monkeypatch):
+    local = FakeEngine('local')
+    real_create = image_recognition.create_ocr_engine
+
+    def create(ocr_server=None, profile=None, **options):
+        if ocr_server:
+            return real_create(ocr_server, profile, **options)
+        return local
+    monkeypatch.setattr(image_recognition, 'create_ocr_engine', create)
+
+    recognition = ImageRecognition(ocr_server=running_server.address)
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    assert recognition.recognize_text(image).texts == ['accurate']
+
+    # 服务停止后套接字文件被删除，客户端重连失败
+    running_server.shutdown()
+    recognition.ocr._sock.close()
+    recognition.ocr._sock = None
+
+    other = np.ones((10, 10, 3), dtype=np.uint8)
+    assert recognition.recognize_text(other).texts == ['local']
+    assert recognition.recognize_text(other, profile='fast').texts == ['local']
+    assert recognition.ocr_server is None
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from ocr_server import OCRClient
+from orchestrator import OCREnginePool, overlapping_windows, parse_job
+
+
+class FakeEngine:
+    def __init__(self, profile):
+        self.profile = profile
+        self.calls = []
+
+    def ocr(self, image, cls=True):
+        self.calls.append(cls)
+        return [[[[[0, 0], [1, 0], [1, 1], [0, 1]], (self.profile, 1.0)]]]
+
+
+def test_pool_creates_engines_per_profile():
+    created = []
+
+    def factory(profile):
+        created.append(profile)
+        return FakeEngine(profile)
+
+    pool = OCREnginePool(1, factory=factory, profile='accurate')
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    assert pool.ocr(image)[0][0][1][0] == 'accurate'
+    assert pool.ocr(image, cls=False, profile='fast')[0][0][1][0] == 'fast'
+    assert pool.ocr(image, profile='fast')[0][0][1][0] == 'fast'
+    assert created == ['accurate', 'fast']
+    assert pool.calls == 3
+
+
+def test_pool_passes_profile_to_profile_aware_engines():
+    class Client:
+        supports_profiles = True
+
+        def __init__(self):
+            self.requests = []
+
+        def ocr(self, image, cls=True, profile=None):
+            self.requests.append((cls, profile))
+            return [None]
+
+    client = Client()
+    pool = OCREnginePool(1, factory=lambda profile: client, profile='balanced')
+    pool.ocr(np.zeros((4, 4, 3), dtype=np.uint8), cls=False)
+    assert client.requests == [(False, 'balanced')]
+
+
+def test_pool_does_not_requeue_dead_client_when_fallback_fails():
+    class DeadClient(OCRClient):
+        def ocr(self, image, cls=True, profile=None):
+            raise ConnectionRefusedError('server gone')
+
+    clients = []
+    local_failures = [RuntimeError('no model')]
+
+    def factory(profile, ocr_server=None):
+        if ocr_server:
+            clients.append(DeadClient(ocr_server))
+            return clients[-1]
+        if local_failures:
+            raise local_failures.pop()
+        return FakeEngine(profile)
+
+    pool = OCREnginePool(1, factory=factory, ocr_server='unix:/nonexistent.sock')
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    with pytest.raises(RuntimeError):
+        pool.ocr(image)
+    # 已关闭的客户端没有放回空闲队列，名额已释放
+    assert pool._idle[pool.profile].empty()
+    assert pool._created[pool.profile] == 0
+    assert pool.ocr(image)[0][0][1][0] == pool.profile
+    assert len(clients) == 1
+
+
+def test_parse_job():
+    assert parse_job('a.xlsx=窗口1') == ('a.xlsx', '窗口1')
+    assert parse_job('a.xlsx') == ('a.xlsx', None)
+
+
+def test_overlapping_windows():
+    rects = {'a': (0, 0, 100, 100), 'b': (100, 0, 100, 100), 'c': (150, 50, 100, 100)}
+    # 相邻不算重叠
+    assert overlapping_windows(rects) == [('b', 'c')]
+    assert overlapping_windows({'a': (0, 0, 10, 10)}) == []
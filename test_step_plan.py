@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+import step_plan
+from step_plan import compile_step, load_plan, parse_roi, parse_shift, resolve_roi
+
+
+def write_config(path, steps):
+    path.write_text(json.dumps(steps, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def test_parse_shift():
+    assert parse_shift('L50') == (-50, 0)
+    assert parse_shift('R30') == (30, 0)
+    assert parse_shift('U20') == (0, -20)
+    assert parse_shift('D40') == (0, 40)
+    assert parse_shift('0') == (0, 0)
+    assert parse_shift('X9') == (0, 0)
+
+
+def test_parse_and_resolve_roi():
+    assert resolve_roi(parse_roi('top-bar'), 1000, 800) == (0, 0, 1000, 120)
+    assert resolve_roi(parse_roi('10:20:300:400'), 1000, 800) == (10, 20, 300, 400)
+    assert parse_roi('300:400:10:20') is None
+    assert parse_roi('') is None
+
+
+def test_compile_step_resolves_fields():
+    step = compile_step({'type': 'fixed', 'target': '100:200', 'click_type': None, 'delay': 2,
+                         'shift': 'R5', 'roi': 'center', 'timeout': '3', 'max_retries': 2.0})
+    assert step.point == (100, 200)
+    assert step.offset == (5, 0)
+    assert step.click_type == 'single'
+    assert step.delay == 2.0
+    assert step.roi_spec == ('relative', step_plan.NAMED_REGIONS['center'])
+    assert step.timeout == 3.0
+    assert step.max_retries == 2
+    assert step['on_fail'] is None
+    assert step.get('backoff', 1.0) == 1.0
+
+
+def test_compile_template_all_and_wait_targets():
+    step = compile_step({'type': 'template_all', 'target': 'a | b|'})
+    assert step.icon_paths == (step_plan.get_icon_path('a'), step_plan.get_icon_path('b'))
+    step = compile_step({'type': 'wait_for', 'target': 'text:确定', 'fuzzy': 1, 'profile': 'fast'})
+    assert (step.wait_kind, step.wait_value) == ('text', '确定')
+    probe = step.probe()
+    assert (probe.type, probe.target, probe.fuzzy, probe.profile) == ('text', '确定', 1, 'fast')
+    step = compile_step({'type': 'wait_gone', 'target': 'template:关闭'})
+    assert step.icon_paths == (step_plan.get_icon_path('关闭'),)
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        compile_step({'type': 'text', 'target': '确定', 'profile': 'turbo'})
+
+
+def test_plan_cache_is_reused_until_config_changes(tmp_path, monkeypatch):
+    config = write_config(tmp_path / 'steps.json', [{'type': 'text', 'target': '确定'}])
+    cache_dir = str(tmp_path / 'cache')
+    calls = []
+    load_json = step_plan.LOADERS['.json']
+    monkeypatch.setitem(step_plan.LOADERS, '.json', lambda path: calls.append(path) or load_json(path))
+
+    assert [s.target for s in load_plan(config, cache_dir).steps] == ['确定']
+    assert [s.target for s in load_plan(config, cache_dir).steps] == ['确定']
+    assert len(calls) == 1
+
+    write_config(tmp_path / 'steps.json', [{'type': 'text', 'target': '取消一下'}])
+    assert [s.target for s in load_plan(config, cache_dir).steps] == ['取消一下']
+    assert len(calls) == 2
+
+
+def test_plan_cache_rechecks_bare_wait_targets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = write_config(tmp_path / 'steps.json', [{'type': 'wait_for', 'target': '关闭'}])
+    cache_dir = str(tmp_path / 'cache')
+    assert load_plan(config, cache_dir).steps[0].wait_kind == 'text'
+
+    # 图标文件在缓存之后才加入
+    icon_path = tmp_path / step_plan.get_icon_path('关闭')
+    icon_path.parent.mkdir(parents=True)
+    icon_path.write_bytes(b'')
+    step = load_plan(config, cache_dir).steps[0]
+    assert step.wait_kind == 'template'
+    assert step.icon_paths == (step_plan.get_icon_path('关闭'),)
+
+    os.remove(icon_path)
+    assert load_plan(config, cache_dir).steps[0].wait_kind == 'text'
@@ -0,0 +1,104 @@
+import cv2
+import numpy as np
+import pytest
+
+from frame_utils import Frame
+from template_matcher import find_peaks, match_all, match_exhaustive, match_pyramid, non_max_suppression, top_peaks
+
+
+def textured(height, width, seed):
+    # 平滑后的随机纹理，缩小后仍有可匹配的结构
+    image = np.random.default_rng(seed).integers(0, 256, (height, width), dtype=np.uint8)
+    return cv2.GaussianBlur(image, (5, 5), 0)
+
+
+@pytest.fixture
+def scene():
+    image = textured(480, 640, 0)
+    template = textured(48, 64, 1)
+    image[200:248, 333:397] = template
+    return image, template
+
+
+def test_exhaustive_finds_template(scene):
+    image, template = scene
+    score, location = match_exhaustive(image, template)
+    assert location == (333, 200)
+    assert score == pytest.approx(1.0, abs=1e-4)
+
+
+@pytest.mark.parametrize('levels', [1, 2])
+def test_pyramid_matches_exhaustive(scene, levels):
+    image, template = scene
+    score, location = match_pyramid(image, template, levels=levels)
+    assert location == (333, 200)
+    assert score == pytest.approx(1.0, abs=1e-4)
+
+
+def test_pyramid_reuses_cached_downscale(scene):
+    image, template = scene
+    frame = Frame(image)
+    requested = []
+
+    def downscale(level):
+        requested.append(level)
+        return frame.scaled(level)
+    assert match_pyramid(image, template, levels=2, downscale=downscale)[1] == (333, 200)
+    assert requested == [2]
+
+
+def test_pyramid_falls_back_for_small_templates(scene):
+    image, _ = scene
+    template = image[100:110, 50:60].copy()
+    # 模板缩小后小于 min_template_size 时直接做全分辨率匹配
+    assert match_pyramid(image, template, levels=2) == match_exhaustive(image, template)
+
+
+def test_top_peaks_suppresses_neighbours():
+    response = np.full((20, 20), -1.0, dtype=np.float32)
+    response[5, 5] = 0.9
+    response[5, 6] = 0.8
+    response[15, 15] = 0.7
+    peaks = top_peaks(response, 3, 2, 2)
+    assert [loc for _, loc in peaks] == [(5, 5), (15, 15)]
+    assert peaks[0][0] == pytest.approx(0.9)
+    # 不修改传入的响应图
+    assert response[5, 6] == pytest.approx(0.8)
+
+
+def test_find_peaks_returns_local_maxima_above_threshold():
+    response = np.zeros((10, 10), dtype=np.float32)
+    response[2, 3] = 0.9
+    response[2, 4] = 0.85
+    response[7, 7] = 0.6
+    response[5, 1] = 0.3
+    scores, xs, ys = find_peaks(response, 0.5)
+    assert sorted(zip(xs.tolist(), ys.tolist())) == [(3, 2), (7, 7)]
+    assert sorted(scores.tolist()) == pytest.approx([0.6, 0.9])
+
+
+def test_non_max_suppression():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30], [0, 6, 10, 16]])
+    scores = np.array([0.8, 0.9, 0.7, 0.6], dtype=np.float32)
+    # 框1与框0重叠度约0.68被抑制；框3与框1重叠度约0.29，低于阈值保留
+    assert non_max_suppression(boxes, scores, 0.3).tolist() == [1, 2, 3]
+    assert non_max_suppression(boxes, scores, 0.2).tolist() == [1, 2]
+    assert non_max_suppression(np.empty((0, 4)), np.empty(0)).size == 0
+
+
+def test_match_all_finds_every_copy():
+    image = textured(300, 400, 2)
+    template = textured(30, 40, 3)
+    locations = [(20, 30), (200, 40), (300, 220)]
+    for x, y in locations:
+        image[y:y + 30, x:x + 40] = template
+    scores, boxes = match_all(image, template, 0.9)
+    assert sorted(map(tuple, boxes[:, :2].tolist())) == sorted(locations)
+    assert (boxes[:, 2:] - boxes[:, :2]).tolist() == [[40, 30]] * 3
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_match_all_with_template_larger_than_image():
+    scores, boxes = match_all(textured(20, 20, 4), textured(30, 30, 5), 0.5)
+    assert scores.shape == (0,)
+    assert boxes.shape == (0, 4)
@@ -0,0 +1,70 @@
+from ocr_result import OCRResult
+from text_index import TextIndex, fuzzy_substring_distance, normalize_text
+
+
+def make_index(texts, confidences=None):
+    boxes = [[[i * 10, 0], [i * 10 + 8, 0], [i * 10 + 8, 8], [i * 10, 8]] for i in range(len(texts))]
+    return TextIndex(OCRResult(boxes, texts, confidences))
+
+
+def test_normalize_text():
+    assert normalize_text('确 定（OK）') == '确定ok'
+    assert normalize_text('ＡＢＣ１２３') == 'abc123'
+    assert normalize_text(None) == ''
+
+
+def test_fuzzy_distance_is_capped_by_key_length():
+    assert fuzzy_substring_distance('确定', '取消', 2) is None
+    assert fuzzy_substring_distance('确', '取消', 5) is None
+    assert fuzzy_substring_distance('开始游戏', '点击开姶游戏吧', 1) == 1
+    # 四个字最多允许1处差异
+    assert fuzzy_substring_distance('开始游戏', '开始', 3) is None
+    assert fuzzy_substring_distance('abcdefg', 'xxabcxfgxx', 5) == 2
+
+
+def test_query_ranks_match_kinds():
+    index = make_index(['确定按钮', '确定', '请点击确定', '确认'])
+    kinds = [(c['text'], c['kind']) for c in index.query('确定')]
+    assert kinds == [('确定', 'exact'), ('确定按钮', 'prefix'), ('请点击确定', 'substring')]
+
+
+def test_query_normalizes_both_sides():
+    index = make_index(['确 定(OK)'])
+    assert index.best('确定ok')['kind'] == 'exact'
+
+
+def test_short_key_does_not_fuzzy_match_everything():
+    index = make_index(['取消', '关闭', '设置'])
+    assert index.query('确定', fuzzy=True, max_distance=2) == []
+    assert index.query('确', fuzzy=True, max_distance=1) == []
+
+
+def test_fuzzy_query_tolerates_one_error():
+    index = make_index(['开姶游戏', '退出游戏'])
+    best = index.best('开始游戏', fuzzy=True, max_distance=1)
+    assert best['text'] == '开姶游戏'
+    assert best['kind'] == 'fuzzy'
+    assert best['distance'] == 1
+    assert index.best('开始游戏') is None
+
+
+def test_punctuation_target_falls_back_to_raw_substring():
+    index = make_index(['...', '>>'])
+    assert [c['text'] for c in index.query('>>')] == ['>>']
+
+
+def test_query_many_and_centers():
+    index = make_index(['确定', '取消'])
+    results = index.query_many(['确定', '取消', '关闭'])
+    assert results['确定'][0]['center'] == (4, 4)
+    assert results['取消'][0]['center'] == (14, 4)
+    assert results['关闭'] == []
+
+
+def test_same_kind_matches_keep_reading_order():
+    # 两个“领取”按钮，第二个置信度更高，仍返回第一个
+    index = make_index(['领取', '领取', '领取奖励', '立即领取'], [0.80, 0.99, 0.7, 0.99])
+    assert [c['index'] for c in index.query('领取')] == [0, 1, 2, 3]
+    assert index.best('领取')['index'] == 0
+    index = make_index(['点击领取', '快来领取吧'], [0.6, 0.99])
+    assert index.best('领取')['index'] == 0
@@ -0,0 +1,147 @@
+import unicodedata
+
+
+# 匹配方式，按优先级从高到低排列
+MATCH_KINDS = ('exact', 'prefix', 'substring', 'fuzzy')
+
+
+def normalize_text(text):
+    """
+    归一化文字：全角转半角（NFKC）、去掉空白和标点、统一小写
+
+    例如：'确 定（OK）' -> '确定ok'
+    """
+    text = unicodedata.normalize('NFKC', text or '')
+    return ''.join(ch for ch in text.casefold()
+                   if not unicodedata.category(ch).startswith(('P', 'Z', 'C')))
+
+
+def fuzzy_substring_distance(pattern, text, max_distance):
+    """
+    pattern 与 text 中任意子串的最小编辑距离（近似子串匹配）
+
+    用于目标文字只占识别行一部分、且有个别字识别错误的情况。
+    允许的距离不超过 (len(pattern) - 1) // 2，否则短目标几乎能匹配任何文字，
+    两个字以内的目标不做模糊匹配。
+
+    Returns:
+        编辑距离，超过允许的距离时返回None
+    """
+    max_distance = min(max_distance, (len(pattern) - 1) // 2)
+    if max_distance < 1 or len(text) < len(pattern) - max_distance:
+        return None
+    # 第一行全为0：匹配可以从 text 的任意位置开始
+    column = list(range(len(pattern) + 1))
+    best = column[-1]
+    for ct in text:
+        previous_diag = 0
+        column[0] = 0
+        for i, cp in enumerate(pattern, 1):
+            value = min(column[i] + 1, column[i - 1] + 1, previous_diag + (cp != ct))
+            previous_diag = column[i]
+            column[i] = value
+        best = min(best, column[-1])
+    return best if best <= max_distance else None
+
+
+class TextIndex:
+    """
+    文字索引
+
+    由一次OCR识别结果建立，可以对同一画面查询任意多个目标文字，
+    支持精确、前缀、包含和有上限的编辑距离（模糊）匹配。
+    文字在建立索引和查询时都先归一化（全角/半角、空白、标点、大小写）。
+    """
+
+    def __init__(self, result):
+        """
+        Args:
+            result: OCRResult
+        """
+        self.result = result
+        self.normalized = [normalize_text(text) for text in result.texts]
+        self._exact = {}
+        for i, text in enumerate(self.normalized):
+            self._exact.setdefault(text, []).append(i)
+
+    def __len__(self):
+        return len(self.normalized)
+
+    def query(self, target, fuzzy=False, max_distance=1, limit=None):
+        """
+        查询目标文字
+
+        Args:
+            target: 目标文字
+            fuzzy: 是否允许编辑距离匹配
+            max_distance: 模糊匹配允许的最大编辑距离，另受目标长度限制（见 fuzzy_substring_distance）
+            limit: 最多返回的候选数，None表示全部
+
+        Returns:
+            候选列表，按匹配方式（精确 > 前缀 > 包含 > 模糊）排序，同一方式内按阅读顺序
+            （模糊匹配按编辑距离、得分）排序，每项为
+            {'index', 'text', 'kind', 'distance', 'score', 'confidence', 'center', 'box'}
+        """
+        key = normalize_text(target)
+        candidates = []
+        if not key:
+            # 目标全为标点等字符时退回原文包含匹配
+            for i, text in enumerate(self.result.texts):
+                if target and target in text:
+                    candidates.append(self._candidate(i, 'substring', 0, len(target), len(text)))
+            return self._rank(candidates, limit)
+
+        for i in self._exact.get(key, ()):
+            candidates.append(self._candidate(i, 'exact', 0, len(key), len(key)))
+        for i, text in enumerate(self.normalized):
+            if text == key:
+                continue
+            if text.startswith(key):
+                candidates.append(self._candidate(i, 'prefix', 0, len(key), len(text)))
+            elif key in text:
+                candidates.append(self._candidate(i, 'substring', 0, len(key), len(text)))
+            elif fuzzy and text:
+                distance = fuzzy_substring_distance(key, text, max_distance)
+                if distance is not None:
+                    candidates.append(self._candidate(i, 'fuzzy', distance, len(key), len(text)))
+        return self._rank(candidates, limit)
+
+    def query_many(self, targets, fuzzy=False, max_distance=1, limit=None):
+        """
+        一次查询多个目标文字
+
+        Returns:
+            {目标文字: 候选列表}
+        """
+        return {target: self.query(target, fuzzy=fuzzy, max_distance=max_distance, limit=limit)
+                for target in targets}
+
+    def best(self, target, fuzzy=False, max_distance=1):
+        """得分最高的候选，没有匹配时返回None"""
+        candidates = self.query(target, fuzzy=fuzzy, max_distance=max_distance, limit=1)
+        return candidates[0] if candidates else None
+
+    def _candidate(self, i, kind, distance, target_length, text_length):
+        confidence = float(self.result.confidences[i])
+        # 匹配程度：目标占整行的比例，编辑距离按目标长度折算
+        coverage = min(1.0, target_length / float(max(text_length, 1)))
+        similarity = coverage * (1.0 - distance / float(max(target_length, 1)))
+        center = self.result.centers[i].tolist()
+        return {
+            'index': i,
+            'text': self.result.texts[i],
+            'kind': kind,
+            'distance': distance,
+            'score': similarity * confidence,
+            'confidence': confidence,
+            'center': (center[0], center[1]),
+            'box': self.result.boxes[i],
+        }
+
+    @staticmethod
+    def _rank(candidates, limit):
+        # 同一匹配方式内按阅读顺序（识别结果的顺序）排列，与原来返回第一个匹配行一致，
+        # 画面上有多个相同按钮时点击哪一个不受置信度波动影响；只有模糊匹配按得分排列
+        candidates.sort(key=lambda c: (MATCH_KINDS.index(c['kind']), c['distance'],
+                                       -c['score'] if c['kind'] == 'fuzzy' else 0.0, c['index']))
+        return candidates if limit is None else candidates[:limit]
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from cv_utils import imread_cn
+from image_recognition import create_ocr_engine
+from ocr_detector import collect_images
+from ocr_profiles import OCR_PROFILES, use_cls
+from ocr_result import OCRResult
+from text_index import normalize_text
+
+
+def run_profile(profile, images, use_gpu, repeat):
+    """
+    用一个配置档识别全部截图
+
+    Returns:
+        (每张图的耗时列表, 每张图识别出的归一化文字计数)
+    """
+    start = time.perf_counter()
+    engine = create_ocr_engine(profile=profile, use_gpu=use_gpu)
+    cls = use_cls(profile)
+    # 预热，排除首次识别的额外开销
+    engine.ocr(np.full((32, 128, 3), 255, dtype=np.uint8), cls=cls)
+    print(f"[{profile}] 模型加载及预热耗时: {time.perf_counter() - start:.2f}秒")
+
+    latencies = []
+    texts = []
+    for image in images:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = OCRResult.from_paddle(engine.ocr(image, cls=cls))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        latencies.append(best)
+        texts.append(Counter(t for t in map(normalize_text, result.texts) if t))
+    return latencies, texts
+
+
+def recall(found, reference):
+    """以参考结果中的文字为准，统计被找到的比例（按归一化文字计数匹配）"""
+    total = sum(reference.values())
+    if total == 0:
+        return None
+    return sum(min(count, found[text]) for text, count in reference.items()) / float(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR配置档对比：各配置档的识别耗时和相对 accurate 的召回率')
+    parser.add_argument('--images', type=str, nargs='+', default=['screenshots'], help='截图目录、文件或通配符')
+    parser.add_argument('--profiles', type=str, nargs='+', default=list(OCR_PROFILES), choices=list(OCR_PROFILES),
+                        help='要测试的配置档')
+    parser.add_argument('--no_gpu', action='store_true', help='不使用GPU')
+    parser.add_argument('--repeat', type=int, default=1, help='每张图重复次数，取最小值')
+    parser.add_argument('--limit', type=int, default=None, help='最多使用的截图数量')
+    parser.add_argument('--json', type=str, default=None, help='结果保存路径')
+    args = parser.parse_args()
+
+    paths = collect_images(args.images)[:args.limit]
+    images = [image for image in (imread_cn(path) for path in paths) if image is not None]
+    if not images:
+        print("没有可用的截图")
+        return
+    print(f"截图数量: {len(images)}")
+
+    # 召回率以 accurate 的结果为参考
+    profiles = list(args.profiles)
+    if 'accurate' not in profiles:
+        profiles.append('accurate')
+    runs = {profile: run_profile(profile, images, not args.no_gpu, args.repeat) for profile in profiles}
+    reference = runs['accurate'][1]
+
+    results = {}
+    print("=" * 64)
+    print(f"{'配置档':<12}{'平均(ms)':>12}{'P95(ms)':>12}{'文字数':>10}{'召回率':>12}")
+    for profile in profiles:
+        latencies, texts = runs[profile]
+        recalls = [r for r in (recall(found, ref) for found, ref in zip(texts, reference)) if r is not None]
+        results[profile] = {
+            'mean_ms': float(np.mean(latencies) * 1000),
+            'p95_ms': float(np.percentile(latencies, 95) * 1000),
+            'texts': sum(sum(t.values()) for t in texts),
+            'recall': float(np.mean(recalls)) if recalls else None,
+        }
+        r = results[profile]
+        recall_text = f"{r['recall']:.3f}" if r['recall'] is not None else '-'
+        print(f"{profile:<12}{r['mean_ms']:>12.1f}{r['p95_ms']:>12.1f}{r['texts']:>10}{recall_text:>12}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 每个测量在独立的子进程中运行，保证导入是冷启动
+IMPORT_TARGETS = [
+    'cv2',
+    'numpy',
+    'openpyxl',
+    'pandas',
+    'matplotlib.pyplot',
+    'paddleocr',
+    'image_recognition',
+    'window_controller',
+    'ocr_detector',
+    'auto_clicker',
+]
+
+INIT_SNIPPETS = {
+    'WindowController()': "from window_controller import WindowController\nWindowController()",
+    'ImageRecognition()': "from image_recognition import ImageRecognition\nImageRecognition()",
+    'ImageRecognition().ocr': "from image_recognition import ImageRecognition\nImageRecognition().ocr",
+    'ImageRecognition().warm_up()': "from image_recognition import ImageRecognition\nImageRecognition().warm_up(background=False)",
+    'OCRDetector()': "from ocr_detector import OCRDetector\nOCRDetector()",
+}
+
+RUNNER = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+try:
+    exec(compile({code!r}, '<bench>', 'exec'))
+    print(json.dumps({{'ok': True, 'seconds': time.perf_counter() - start}}))
+except Exception as e:
+    print(json.dumps({{'ok': False, 'error': str(e)}}))
+"""
+
+
+def measure(code):
+    """在新的Python进程中执行代码并返回耗时"""
+    output = subprocess.run(
+        [sys.executable, '-c', RUNNER.format(root=ROOT, code=code)],
+        cwd=ROOT, capture_output=True, text=True
+    ).stdout.strip().splitlines()
+    try:
+        return json.loads(output[-1])
+    except (IndexError, ValueError):
+        return {'ok': False, 'error': '没有输出'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时测试：各模块导入耗时和各组件初始化耗时')
+    parser.add_argument('--config', type=str, default=None, help='同时测量 AutoClicker(config) 的初始化耗时')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数，取最小值')
+    parser.add_argument('--json', type=str, default=None, help='结果保存路径')
+    args = parser.parse_args()
+
+    snippets = [(f"import {name}", f"import {name}") for name in IMPORT_TARGETS]
+    snippets += list(INIT_SNIPPETS.items())
+    if args.config:
+        snippets.append((f"AutoClicker({args.config!r})",
+                         f"from auto_clicker import AutoClicker\nAutoClicker({args.config!r})"))
+
+    results = {}
+    print(f"{'项目':<40}{'耗时(秒)':>12}")
+    print("-" * 52)
+    for label, code in snippets:
+        runs = [measure(code) for _ in range(args.repeat)]
+        times = [r['seconds'] for r in runs if r['ok']]
+        if times:
+            results[label] = min(times)
+            print(f"{label:<40}{min(times):>12.3f}")
+        else:
+            results[label] = None
+            print(f"{label:<40}{'失败':>12}  {runs[-1].get('error', '')}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cv_utils import imread_cn
+from image_recognition import TemplateCache
+from template_matcher import match_exhaustive, match_pyramid
+
+
+def compare(screenshots, icons, levels, candidates, repeat):
+    """
+    对比金字塔匹配与全分辨率匹配的结果和耗时
+
+    两种方式找到的位置相差超过2像素或匹配度相差超过0.02时视为不一致。
+    """
+    cache = TemplateCache()
+    total_exhaustive = 0.0
+    total_pyramid = 0.0
+    mismatches = 0
+    pairs = 0
+
+    for screenshot_path in screenshots:
+        image = imread_cn(screenshot_path)
+        if image is None:
+            continue
+        for icon_path in icons:
+            cached = cache.get(icon_path, image.shape[1])
+            if cached is None:
+                continue
+            template = cached[0]
+            if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+                continue
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                full_val, full_loc = match_exhaustive(image, template)
+            total_exhaustive += (time.perf_counter() - start) / repeat
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                pyr_val, pyr_loc = match_pyramid(image, template, levels=levels, candidates=candidates)
+            total_pyramid += (time.perf_counter() - start) / repeat
+
+            pairs += 1
+            same_loc = abs(full_loc[0] - pyr_loc[0]) <= 2 and abs(full_loc[1] - pyr_loc[1]) <= 2
+            if not same_loc or abs(full_val - pyr_val) > 0.02:
+                mismatches += 1
+                print(f"不一致: {os.path.basename(screenshot_path)} / {os.path.basename(icon_path)} "
+                      f"全分辨率 {full_loc} ({full_val:.3f}) vs 金字塔 {pyr_loc} ({pyr_val:.3f})")
+
+    if pairs == 0:
+        print("没有可比较的截图和图标")
+        return
+
+    print("=" * 50)
+    print(f"比较组数: {pairs}, 不一致: {mismatches}")
+    print(f"全分辨率平均耗时: {total_exhaustive / pairs * 1000:.2f}ms")
+    print(f"金字塔平均耗时: {total_pyramid / pairs * 1000:.2f}ms (levels={levels}, candidates={candidates})")
+    if total_pyramid > 0:
+        print(f"加速比: {total_exhaustive / total_pyramid:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='金字塔模板匹配正确性与速度对比')
+    parser.add_argument('--screenshots', type=str, default='screenshots/*.png', help='截图路径通配符')
+    parser.add_argument('--icons', type=str, default='images/icons/*.png', help='图标路径通配符')
+    parser.add_argument('--levels', type=int, default=2, help='金字塔层数')
+    parser.add_argument('--candidates', type=int, default=3, help='候选数量')
+    parser.add_argument('--repeat', type=int, default=5, help='每组重复次数')
+    args = parser.parse_args()
+
+    compare(sorted(glob.glob(args.screenshots)), sorted(glob.glob(args.icons)),
+            args.levels, args.candidates, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
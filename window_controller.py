@@ -1,26 +1,57 @@
-import os
 import time
-import numpy as np
 import cv2
-import win32gui
-import win32con
-import win32api
-import win32process
-import win32com.client
-import pywinauto
-import ctypes
-from ctypes import wintypes
-from PIL import ImageGrab
+from debug_artifacts import DebugArtifactWriter
+from capture_backends import GDICaptureBackend
+from input_backend import SendInputBackend, RecordingInputBackend, DDInputBackend
+from mouse_trajectory import TrajectoryEngine
+
+try:
+    import win32gui
+    import win32con
+    import win32api
+except ImportError:
+    # 非Windows环境下只能使用不依赖窗口的后端（如回放）
+    win32gui = win32con = win32api = None
 
 class WindowController:
-    def __init__(self):
+    def __init__(self, debug_writer=None, capture_backend=None, input_backend=None, trajectory=None):
         self.window_handle = None
         self.window_title = None
+        # 截图后端，默认使用GDI截取真实窗口
+        self.capture_backend = capture_backend if capture_backend is not None else GDICaptureBackend()
+        # 鼠标输入后端，离线模式下只记录事件不真正发送
+        if input_backend is None:
+            input_backend = RecordingInputBackend() if self.offline else SendInputBackend()
+        self.input_backend = input_backend
+        # DD驱动输入后端，首次点击Ace云手机时创建
+        self.dd_backend = None
+        # 鼠标移动轨迹引擎，按距离决定移动时长
+        self.trajectory = trajectory if trajectory is not None else TrajectoryEngine()
+        # 调试截图由后台线程写入，不阻塞截图和点击
+        self.debug_writer = debug_writer if debug_writer is not None else DebugArtifactWriter()
+        # 最近一次截图 (截图, 窗口左上角坐标)，用于点击可视化
+        self.last_capture = None
+        
+    def get_window_name(self):
+        """获取当前窗口标题，离线模式下返回配置的标题"""
+        if self.offline or win32gui is None or not self.window_handle:
+            return self.window_title or ""
+        return win32gui.GetWindowText(self.window_handle)
+        
+    @property
+    def offline(self):
+        """截图后端不依赖真实窗口（如回放模式）"""
+        return not self.capture_backend.requires_window
         
     def find_window(self, window_title):
         """
         查找指定标题的窗口
         """
+        if self.offline:
+            print(f"离线模式，跳过查找窗口: {window_title}")
+            self.window_title = window_title
+            return True
+            
         try:
             # 使用win32gui查找窗口
             def callback(hwnd, windows):
@@ -45,8 +76,22 @@ class WindowController:
             print(f"查找窗口时出错: {str(e)}")
             return False
     
+    def is_window_alive(self):
+        """窗口是否仍然存在且可见（不改变前台窗口）"""
+        if self.offline:
+            return True
+        if not self.window_handle:
+            return False
+        try:
+            return bool(win32gui.IsWindow(self.window_handle) and win32gui.IsWindowVisible(self.window_handle))
+        except Exception:
+            return False
+            
     def set_foreground(self):
         """激活窗口，确保窗口可见并置于前台"""
+        if self.offline:
+            return True
+            
         if not self.window_handle:
             print("错误: 未找到窗口")
             return False
@@ -146,33 +191,17 @@ class WindowController:
         返回:
             tuple: (截图, 窗口左上角坐标) 或 None (如果失败)
         """
-        if not self.window_handle:
-            print("错误: 未找到窗口")
-            return None
-        
         try:
-            # 获取窗口位置
-            rect = self.get_window_rect()
-            if not rect:
-                print("错误: 无法获取窗口位置")
+            capture = self.capture_backend.capture(self)
+            if capture is None:
                 return None
-                
-            left, top, width, height = rect
+            screenshot_cv = capture[0]
             
-            # 使用PIL截取屏幕
-            screenshot = ImageGrab.grab(bbox=(left, top, left + width, top + height))
+            # 交给后台线程保存截图
+            self.debug_writer.submit(screenshot_cv, "screenshot")
             
-            # 转换为OpenCV格式
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-            
-            # 保存截图
-            screenshot_dir = "screenshots"
-            os.makedirs(screenshot_dir, exist_ok=True)
-            screenshot_path = os.path.join(screenshot_dir, f"screenshot.png")
-            cv2.imwrite(screenshot_path, screenshot_cv)
-            
-            return (screenshot_cv, (left, top))
+            self.last_capture = capture
+            return self.last_capture
             
         except Exception as e:
             print(f"捕获窗口截图失败: {str(e)}")
@@ -207,19 +236,12 @@ class WindowController:
             global_x = left + x
             global_y = top + y
             
-            # 可选：截图并可视化点击位置
-            screenshot = self.capture_window()
-            if screenshot is not None:
-                # 创建可视化图像
-                visual_img = screenshot[0].copy()
-                
-                # 在点击位置绘制圆圈
-                cv2.circle(visual_img, (x, y), 20, (0, 255, 0), 2)  # 绿色圆圈
-                cv2.circle(visual_img, (x, y), 5, (0, 0, 255), -1)  # 红色圆点
-                
-                # 保存可视化图像
-                cv2.imwrite("click_target.png", visual_img)
-                print("点击目标可视化图像保存到: click_target.png")
+            # 可选：在最近一次截图上可视化点击位置（不重新截图，绘制和保存在后台线程完成）
+            if self.last_capture is not None:
+                self.debug_writer.submit(
+                    self.last_capture[0], "click_target",
+                    annotate=lambda img: self._draw_click_target(img, x, y)
+                )
             
             # 检查窗口是否为Ace云手机
             window_name = win32gui.GetWindowText(self.window_handle)
@@ -253,6 +275,14 @@ class WindowController:
             print(f"点击失败: {str(e)}")
             return False
     
+    @staticmethod
+    def _draw_click_target(image, x, y):
+        """在截图副本上标记点击位置"""
+        visual_img = image.copy()
+        cv2.circle(visual_img, (x, y), 20, (0, 255, 0), 2)  # 绿色圆圈
+        cv2.circle(visual_img, (x, y), 5, (0, 0, 255), -1)  # 红色圆点
+        return visual_img
+    
     def force_click(self, x, y, click_type='single', move_duration=0):
         """
         强制点击指定位置，绕过一些应用的安全限制
@@ -261,18 +291,17 @@ class WindowController:
             x (int): 全局X坐标
             y (int): 全局Y坐标
             click_type (str): 'single', 'double', 或 'right'
-            move_duration (float): 鼠标移动动画持续时间
+            move_duration (float): 鼠标移动动画持续时间，0表示直接移动，None表示按距离自动计算
             
         Returns:
             bool: 操作是否成功
         """
         try:
             # 判断软件类型，针对不同软件使用不同策略
-            window_name = win32gui.GetWindowText(self.window_handle)
-            using_direct_message = False
+            window_name = self.get_window_name()
             
             # 对于特定软件使用更强力的方法
-            if "Ace云手机" in window_name:
+            if "Ace云手机" in window_name and not self.offline:
                 print("检测到Ace云手机，尝试使用专用方法点击")
                 # 使用专门的Ace云手机点击方法
                 result = self.click_ace_cloud(x, y, click_type)
@@ -282,167 +311,17 @@ class WindowController:
                     print("专用方法失败，尝试常规方法...")
             
             # 常规方法：使用SendInput模拟鼠标操作
-            MOUSEEVENTF_MOVE = 0x0001
-            MOUSEEVENTF_LEFTDOWN = 0x0002
-            MOUSEEVENTF_LEFTUP = 0x0004
-            MOUSEEVENTF_RIGHTDOWN = 0x0008
-            MOUSEEVENTF_RIGHTUP = 0x0010
-            MOUSEEVENTF_ABSOLUTE = 0x8000
-            
-            class POINT(ctypes.Structure):
-                _fields_ = [("x", ctypes.c_long), ("y", ctypes.c_long)]
-                
-            class MOUSEINPUT(ctypes.Structure):
-                _fields_ = [
-                    ("dx", wintypes.LONG),
-                    ("dy", wintypes.LONG),
-                    ("mouseData", wintypes.DWORD),
-                    ("dwFlags", wintypes.DWORD),
-                    ("time", wintypes.DWORD),
-                    ("dwExtraInfo", ctypes.POINTER(wintypes.ULONG))
-                ]
-                
-            class INPUT(ctypes.Structure):
-                _fields_ = [
-                    ("type", wintypes.DWORD),
-                    ("mi", MOUSEINPUT)
-                ]
-                
-            # 获取鼠标当前位置
-            current_position = POINT()
-            ctypes.windll.user32.GetCursorPos(ctypes.byref(current_position))
-            
-            # 计算屏幕尺寸
-            screen_width = ctypes.windll.user32.GetSystemMetrics(0)
-            screen_height = ctypes.windll.user32.GetSystemMetrics(1)
-            
-            # 计算绝对坐标 (0-65535范围)
-            abs_x = int(65535 * x / screen_width)
-            abs_y = int(65535 * y / screen_height)
+            backend = self.input_backend
             
             # 模拟鼠标移动
-            if move_duration > 0:
-                # 计算步骤
-                steps = int(move_duration * 60)  # 60fps
-                start_x, start_y = current_position.x, current_position.y
-                
-                for step in range(1, steps + 1):
-                    # 计算当前步骤位置
-                    current_x = start_x + int((x - start_x) * step / steps)
-                    current_y = start_y + int((y - start_y) * step / steps)
-                    
-                    # 计算绝对坐标
-                    step_abs_x = int(65535 * current_x / screen_width)
-                    step_abs_y = int(65535 * current_y / screen_height)
-                    
-                    # 创建输入事件
-                    move_input = INPUT()
-                    move_input.type = 0  # INPUT_MOUSE
-                    move_input.mi.dx = step_abs_x
-                    move_input.mi.dy = step_abs_y
-                    move_input.mi.mouseData = 0
-                    move_input.mi.dwFlags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE
-                    move_input.mi.time = 0
-                    move_input.mi.dwExtraInfo = ctypes.pointer(wintypes.ULONG(0))
-                    
-                    # 发送输入
-                    ctypes.windll.user32.SendInput(1, ctypes.byref(move_input), ctypes.sizeof(INPUT))
-                    
-                    # 短暂延迟
-                    time.sleep(1 / 60)
-            else:
-                # 直接移动到目标位置
-                move_input = INPUT()
-                move_input.type = 0  # INPUT_MOUSE
-                move_input.mi.dx = abs_x
-                move_input.mi.dy = abs_y
-                move_input.mi.mouseData = 0
-                move_input.mi.dwFlags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE
-                move_input.mi.time = 0
-                move_input.mi.dwExtraInfo = ctypes.pointer(wintypes.ULONG(0))
-                
-                # 发送输入
-                ctypes.windll.user32.SendInput(1, ctypes.byref(move_input), ctypes.sizeof(INPUT))
-            
-            # 等待短暂时间，确保鼠标移动完成
-            time.sleep(0.05)
-            
-            # 执行点击
-            if click_type in ['single', 'double']:
-
-                # 按下左键
-                click_down = INPUT()
-                click_down.type = 0  # INPUT_MOUSE
-                click_down.mi.dx = abs_x
-                click_down.mi.dy = abs_y
-                click_down.mi.mouseData = 0
-                click_down.mi.dwFlags = MOUSEEVENTF_LEFTDOWN
-                click_down.mi.time = 0
-                click_down.mi.dwExtraInfo = ctypes.pointer(wintypes.ULONG(0))
-                
-                # 发送按下输入
-                ctypes.windll.user32.SendInput(1, ctypes.byref(click_down), ctypes.sizeof(INPUT))
-                
-                # 等待短暂时间
-                time.sleep(0.05)
-                
-                # 释放左键
-                click_up = INPUT()
-                click_up.type = 0  # INPUT_MOUSE
-                click_up.mi.dx = abs_x
-                click_up.mi.dy = abs_y
-                click_up.mi.mouseData = 0
-                click_up.mi.dwFlags = MOUSEEVENTF_LEFTUP
-                click_up.mi.time = 0
-                click_up.mi.dwExtraInfo = ctypes.pointer(wintypes.ULONG(0))
-                
-                # 发送释放输入
-                ctypes.windll.user32.SendInput(1, ctypes.byref(click_up), ctypes.sizeof(INPUT))
-                
-                # 如果是双击，执行第二次点击
-                if click_type == 'double':
-                    time.sleep(0.1)  # 双击间隔
-                    
-                    # 再次按下左键
-                    ctypes.windll.user32.SendInput(1, ctypes.byref(click_down), ctypes.sizeof(INPUT))
-                    
-                    # 等待短暂时间
-                    time.sleep(0.05)
-                    
-                    # 再次释放左键
-                    ctypes.windll.user32.SendInput(1, ctypes.byref(click_up), ctypes.sizeof(INPUT))
-                    
-            elif click_type == 'right':
-                # 右键点击
-                
-                # 按下右键
-                click_down = INPUT()
-                click_down.type = 0  # INPUT_MOUSE
-                click_down.mi.dx = abs_x
-                click_down.mi.dy = abs_y
-                click_down.mi.mouseData = 0
-                click_down.mi.dwFlags = MOUSEEVENTF_RIGHTDOWN
-                click_down.mi.time = 0
-                click_down.mi.dwExtraInfo = ctypes.pointer(wintypes.ULONG(0))
-                
-                # 发送按下输入
-                ctypes.windll.user32.SendInput(1, ctypes.byref(click_down), ctypes.sizeof(INPUT))
-                
-                # 等待短暂时间
-                time.sleep(0.05)
-                
-                # 释放右键
-                click_up = INPUT()
-                click_up.type = 0  # INPUT_MOUSE
-                click_up.mi.dx = abs_x
-                click_up.mi.dy = abs_y
-                click_up.mi.mouseData = 0
-                click_up.mi.dwFlags = MOUSEEVENTF_RIGHTUP
-                click_up.mi.time = 0
-                click_up.mi.dwExtraInfo = ctypes.pointer(wintypes.ULONG(0))
-                
-                # 发送释放输入
-                ctypes.windll.user32.SendInput(1, ctypes.byref(click_up), ctypes.sizeof(INPUT))
+            if move_duration is None or move_duration > 0:
+                stats = self.trajectory.move(backend.cursor_pos(), (x, y), backend.move_path, duration=move_duration)
+                if stats['requested'] > 0:
+                    print(f"鼠标移动耗时: {stats['achieved']:.3f}秒 (请求 {stats['requested']:.3f}秒, "
+                          f"{stats['sent']}/{stats['points']} 点, {stats['calls']} 次发送)")
+            
+            # 移动到目标位置并点击，间隔为0的事件合并为一次SendInput
+            backend.click(x, y, click_type)
                        
             print(f"使用Windows API强制点击位置 ({x}, {y}), 类型: {click_type}")
             return True
@@ -463,69 +342,18 @@ class WindowController:
         返回:
             bool: 点击是否成功
         """
-        success = False
         print(f"Ace云手机点击: ({x}, {y}), 类型: {click_type}")
         
-        # 尝试激活窗口
+        # 使用DD驱动程序执行点击，驱动在进程内只加载和初始化一次
         try:
-            self.activate_window()
-        except Exception as e:
-            print(f"无法激活Ace云手机窗口: {str(e)}")
-        
-        # 使用DD驱动程序执行点击
-        try:
-            # 加载DD驱动DLL
-            try:
-                # 首先尝试通过相对路径加载
-                dd_dll = ctypes.windll.LoadLibrary(r'dd43390.dll')
-                print("成功加载DD驱动DLL（相对路径）")
-            except:
-                print(f"无法加载DD驱动DLL: {str(e)}")
-                return False
-            
-            # 初始化DD驱动
-            st = dd_dll.DD_btn(0)
-            if st != 1:
-                print(f"DD驱动初始化失败，状态码: {st}")
-                return False
-            
-            print("DD驱动初始化成功")
-            
-            # 移动鼠标到目标位置
-            print(f"移动鼠标到: ({x}, {y})")
-            dd_dll.DD_mov(x, y)
-            time.sleep(0.1)  # 短暂延迟确保移动完成
-            
-            # 根据点击类型执行点击
-            if click_type == 'single':
-                # 单击左键
-                print("执行左键单击")
-                dd_dll.DD_btn(1)  # 左键按下
-                time.sleep(0.05)
-                dd_dll.DD_btn(2)  # 左键释放
-            elif click_type == 'double':
-                # 双击左键
-                print("执行左键双击")
-                dd_dll.DD_btn(1)  # 左键按下
-                time.sleep(0.05)
-                dd_dll.DD_btn(2)  # 左键释放
-                time.sleep(0.05)
-                dd_dll.DD_btn(1)  # 左键按下
-                time.sleep(0.05)
-                dd_dll.DD_btn(2)  # 左键释放
-            elif click_type == 'right':
-                # 右键单击
-                print("执行右键单击")
-                dd_dll.DD_btn(4)  # 右键按下
-                time.sleep(0.05)
-                dd_dll.DD_btn(8)  # 右键释放
-            
+            if self.dd_backend is None:
+                self.dd_backend = DDInputBackend()
+            self.dd_backend.click(x, y, click_type)
             print("DD驱动点击执行成功")
-            success = True
+            return True
         except Exception as e:
             print(f"使用DD驱动点击失败: {str(e)}")
-        
-        return success
+            return False
 
     def show_click_indicator(self, x, y, duration=0.3, color=(255, 0, 0)):
         """